@@ -5,5 +5,6 @@ Módulos principais do Planet App.
 from planet_app.core.file_manager import FileManager
 from planet_app.core.api_handler import PlanetAPIHandler
 from planet_app.core.planet_app import PlanetApp
+from planet_app.core.spatial_index import PlotIndex
 
-__all__ = ['FileManager', 'PlanetAPIHandler', 'PlanetApp']
\ No newline at end of file
+__all__ = ['FileManager', 'PlanetAPIHandler', 'PlanetApp', 'PlotIndex']
\ No newline at end of file
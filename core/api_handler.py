@@ -3,51 +3,122 @@ Módulo para manipulação da API da Planet.
 """
 
 import datetime
+import hashlib
 import time
 from dateutil import parser
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from planet_app.utils.logging_config import get_logger
+from planet_app.utils import serialization
+from planet_app.utils.tracing import span
+from planet_app.utils.http_metrics import MeteredSession, RateLimitedRetry
+from planet_app.utils.rate_limit import shared_rate_limiter
+from planet_app.core.order_templates import load_order_templates, DEFAULT_ORDER_TEMPLATE
+from planet_app.core.geometry_utils import (
+    deduplicate_geometries, simplify_to_budget, geodataframe_to_aois, named_geometries_from_geojson,
+    MAX_VERTICES
+)
 
 import geopandas as gpd
-import pandas as pd
-from shapely.geometry import Polygon, MultiPolygon
-import json
+from shapely.geometry import Polygon, MultiPolygon, shape
 
 
 logger = get_logger("PlanetAPIHandler")
 
+# Geometrias contadas juntas na pré-verificação com o endpoint stats
+STATS_CLUSTER_SIZE = 8
+
 class PlanetAPIHandler:
     """Classe para gerenciar interações com a API da Planet"""
     
-    def __init__(self, api_key):
+    # Tempo (em segundos) durante o qual uma validação bem-sucedida é reaproveitada
+    VALIDATION_CACHE_TTL = 15 * 60
+    VALIDATION_CACHE_FILE = "validation_cache.json"
+    
+    # Registro em memória das validações: {hash_da_chave: timestamp}
+    _validation_cache = {}
+    
+    # Tipos de item buscados
+    ITEM_TYPES = ["PSScene"]
+    
+    # URL da API de ordens
+    ORDERS_URL = 'https://api.planet.com/compute/ops/orders/v2'
+    
+    # Resultados por página ao paginar buscas salvas
+    SAVED_SEARCH_PAGE_SIZE = 250
+    
+    # Períodos que terminaram há mais dias que isto usam a quick-search: a busca salva
+    # é paginada a partir da cena mais recente e teria de percorrer todo o intervalo
+    SAVED_SEARCH_MAX_AGE_DAYS = 30
+    
+    # Novas tentativas do adaptador HTTP (ver _create_session)
+    HTTP_RETRIES = 3
+    HTTP_RETRY_BACKOFF = 1.0
+    
+    # Parâmetros de download em blocos
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    DOWNLOAD_TIMEOUT = 60
+    
+    def __init__(self, api_key, cache_dir=None):
         self.api_key = api_key
         self.session = None
+        self.cache_dir = cache_dir
         self.url_base = "https://api.planet.com/data/v1/"
         logger.info("PlanetAPIHandler inicializado")
     
+    def _create_session(self):
+        """
+        Cria a sessão HTTP autenticada, sem realizar nenhuma requisição
+        
+        Returns:
+            requests.Session: Sessão configurada com a chave de API
+        """
+        # O ritmo das requisições é controlado pelo limite de taxa compartilhado por
+        # todos os processos da máquina que usam a mesma chave
+        self.session = MeteredSession(rate_limiter=shared_rate_limiter(self.api_key))
+        self.session.auth = (self.api_key, '')
+        
+        # Novas tentativas automáticas (com espera crescente e respeitando Retry-After)
+        # para limites de taxa e falhas temporárias do servidor; apenas métodos idempotentes.
+        # Cada nova tentativa também consome uma ficha do limite de taxa compartilhado
+        retry = RateLimitedRetry(
+            total=self.HTTP_RETRIES,
+            backoff_factor=self.HTTP_RETRY_BACKOFF,
+            status_forcelist=(429, 502, 503, 504),
+            raise_on_status=False,
+            rate_limiter=self.session.rate_limiter
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        return self.session
+    
+    def _get_session(self):
+        """
+        Retorna a sessão atual, criando-a se ainda não existir
+        
+        Returns:
+            requests.Session: Sessão autenticada
+        """
+        if self.session is None:
+            self._create_session()
+        return self.session
+    
     def initialize_session(self):
         """
         Inicializa a sessão para comunicação com a API e valida a autenticação
+        com uma única requisição autenticada
         
         Returns:
             bool: True se a sessão foi inicializada com sucesso e a autenticação é válida, False caso contrário
         """
         try:
-            # Criar a sessão
-            self.session = requests.Session()
-            self.session.auth = (self.api_key, '')
+            session = self._create_session()
             
-            # Teste inicial de conexão
-            base_response = self.session.get(self.url_base)
-            if base_response.status_code != 200:
-                logger.error(f"Falha na conexão básica com a API: {base_response.status_code}")
-                return False
-                
-            # Tentar acessar um endpoint protegido que requer autenticação válida
-            # Por exemplo, tentar listar os recursos disponíveis ou obter informações do usuário
-            auth_test_endpoint = f"{self.url_base}asset-types"  # Endpoint que requer autenticação
-            auth_response = self.session.get(auth_test_endpoint)
+            # Um único endpoint protegido valida conexão e autenticação ao mesmo tempo
+            auth_test_endpoint = f"{self.url_base}asset-types"
+            auth_response = session.get(auth_test_endpoint)
             
             # Verificar se a resposta indica autenticação bem-sucedida
             if auth_response.status_code == 200:
@@ -59,108 +130,124 @@ class PlanetAPIHandler:
             else:
                 logger.warning(f"Resposta inesperada ao testar autenticação: {auth_response.status_code}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Erro ao inicializar sessão: {e}")
             return False
     
+    def _key_hash(self):
+        """Retorna o hash SHA-256 da chave de API (a chave nunca é gravada em disco)"""
+        return hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()
+    
+    def _cache_file_path(self):
+        """Retorna o caminho do arquivo de cache de validação, se houver diretório configurado"""
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, self.VALIDATION_CACHE_FILE)
+    
+    def _load_validation_cache(self):
+        """
+        Carrega o registro de validações do disco, mesclando com o registro em memória
+        
+        Returns:
+            dict: Dicionário {hash_da_chave: timestamp da validação}
+        """
+        cache_path = self._cache_file_path()
+        if cache_path and os.path.exists(cache_path):
+            try:
+                stored = serialization.load(cache_path)
+                for key_hash, validated_at in stored.items():
+                    if validated_at > self._validation_cache.get(key_hash, 0):
+                        self._validation_cache[key_hash] = validated_at
+            except Exception as e:
+                logger.warning(f"Nao foi possivel ler o cache de validacao: {e}")
+        return self._validation_cache
+    
+    def _is_validation_cached(self):
+        """
+        Verifica se a chave atual foi validada recentemente
+        
+        Returns:
+            bool: True se existe uma validação dentro do prazo VALIDATION_CACHE_TTL
+        """
+        validated_at = self._load_validation_cache().get(self._key_hash())
+        return validated_at is not None and (time.time() - validated_at) < self.VALIDATION_CACHE_TTL
+    
+    def _record_validation(self):
+        """Registra a validação bem-sucedida da chave atual em memória e em disco"""
+        now = time.time()
+        cache = self._load_validation_cache()
+        cache[self._key_hash()] = now
+        
+        cache_path = self._cache_file_path()
+        if not cache_path:
+            return
+        
+        # Descartar entradas expiradas antes de gravar
+        valid_entries = {
+            key_hash: validated_at for key_hash, validated_at in cache.items()
+            if now - validated_at < self.VALIDATION_CACHE_TTL
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            serialization.dump(valid_entries, cache_path)
+        except Exception as e:
+            logger.warning(f"Nao foi possivel gravar o cache de validacao: {e}")
+    
     def validate_api_key(self):
         """
         Valida a chave de API fornecida
         
+        Usa o registro local de validações quando a chave foi validada há menos de
+        VALIDATION_CACHE_TTL segundos; caso contrário faz uma única requisição
+        autenticada e mantém a sessão criada para as chamadas seguintes.
+        
         Returns:
             bool: True se a chave é válida, False caso contrário
         """
-        # Implementação simplificada - aqui você adicionaria a lógica real
-        # para validar a chave com a API da Planet
         try:
-            if self.api_key and len(self.api_key) > 20:
-                # Create session
-                if self.initialize_session():
-                    logger.info("Chave API validada com sucesso")
-                    return True
-                else:
-                    logger.warning("Falha na conexão com a API")
-                    return False
-            else:
+            if not self.api_key or len(self.api_key) <= 20:
                 logger.warning("Chave API invalida - muito curta")
                 return False
+            
+            if self._is_validation_cached():
+                self._get_session()
+                logger.info("Chave API validada a partir do cache local")
+                return True
+            
+            if self.initialize_session():
+                self._record_validation()
+                logger.info("Chave API validada com sucesso")
+                return True
+            else:
+                logger.warning("Falha na conexão com a API")
+                return False
         except Exception as e:
             logger.error(f"Erro ao validar chave API: {e}")
             return False
     
-    def process_shapefile(self, shapefile_path):
+    def process_shapefile(self, shapefile_path, max_vertices=MAX_VERTICES, max_payload_bytes=None):
         """
         Processa um arquivo shapefile e converte para GeoJSON com manipulações específicas
         
         Args:
             shapefile_path (str): Caminho do arquivo shapefile
-                
+            max_vertices (int, optional): Número máximo de vértices por talhão. Default: MAX_VERTICES
+            max_payload_bytes (int, optional): Tamanho máximo do GeoJSON de cada talhão em bytes. Default: None
+        
         Returns:
             dict: GeoJSON resultante do processamento
         """
-        logger.info(f"Processando shapefile: {shapefile_path}")
-        
         try:
-            # Carregar o shapefile usando geopandas
-            gdf_limites = gpd.read_file(shapefile_path)
-            
-            # Função para simplificar geometria
-            def simplificar_geometria(geom):
-                # Simplifica a geometria mantendo a topologia, com tolerância de 0.001
-                # Ajuste a tolerância conforme necessário
-                return geom.simplify(tolerance=0.001, preserve_topology=True)
-            
-            # Função para remover coordenadas Z
-            def remove_z_coordinates(geom):
-                if isinstance(geom, Polygon):
-                    # Remove coordenadas Z do Polygon, incluindo buracos
-                    exterior = [(x, y) for x, y, *_ in geom.exterior.coords]
-                    interiors = [[(x, y) for x, y, *_ in interior.coords] for interior in geom.interiors]
-                    return Polygon(exterior, interiors)
-                elif isinstance(geom, MultiPolygon):
-                    # Remove coordenadas Z de cada Polygon no MultiPolygon
-                    return MultiPolygon([remove_z_coordinates(p) for p in geom.geoms])
-                else:
-                    return geom  # Retorna a geometria original caso não seja Polygon ou MultiPolygon
-            
-            # Aplicar simplificação nas geometrias
-            geometrias_simplificadas = [simplificar_geometria(geom) for geom in gdf_limites['geometry']]
-            
-            # Criar novo GeoDataFrame com geometrias simplificadas
-            gdf_simplificado = gpd.GeoDataFrame(geometry=geometrias_simplificadas)
-            gdf_simplificado = pd.concat([gdf_limites.drop(columns='geometry'), gdf_simplificado], axis=1)
-            gdf_simplificado = gdf_simplificado.set_geometry('geometry')
-            
-            # Remover coordenadas Z
-            gdf_simplificado['geometry'] = gdf_simplificado['geometry'].apply(remove_z_coordinates)
-            
-            # Converter para GeoJSON
-            data = json.loads(gdf_simplificado.to_json())
-            
-            # Verificar se existem as propriedades necessárias
-            features = data.get("features", [])
+            gdf_talhoes = self.process_shapefile_to_gdf(shapefile_path, max_vertices, max_payload_bytes)
             
-            # Criar um dicionário com "Talhao" como chave
-            new_dict = {}
-            
-            for feature in features:
-                properties = feature.get("properties", {})
-                
-                # Verificar se as propriedades necessárias existem
-                if "layer" in properties and "Talhao" in properties:
-                    talhao = f'{properties["layer"]}_{properties["Talhao"]}'
-                    geometry = feature["geometry"]
-                    new_dict[talhao] = geometry
-                else:
-                    # Usar um identificador genérico se as propriedades não existirem
-                    talhao_id = f"talhao_{len(new_dict) + 1}"
-                    new_dict[talhao_id] = feature["geometry"]
+            # Criar um dicionário com o nome do talhão como chave
+            new_dict = geodataframe_to_aois(gdf_talhoes)
             logger.info(f"JSON processado com sucesso {len(new_dict)} talhoes encontrados")
             
             # Retornar o resultado como um dicionário
             return new_dict
-            
+        
         except Exception as e:
             logger.error(f"Erro ao processar shapefile: {e}")
             # Retornar um GeoJSON vazio em caso de erro
@@ -168,9 +255,70 @@ class PlanetAPIHandler:
                 "type": "FeatureCollection",
                 "features": []
             }
+    
+    def process_shapefile_to_gdf(self, shapefile_path, max_vertices=MAX_VERTICES, max_payload_bytes=None):
+        """
+        Processa um arquivo shapefile mantendo os atributos originais
+        
+        Args:
+            shapefile_path (str): Caminho do arquivo shapefile
+            max_vertices (int, optional): Número máximo de vértices por talhão. Default: MAX_VERTICES
+            max_payload_bytes (int, optional): Tamanho máximo do GeoJSON de cada talhão em bytes. Default: None
+        
+        Returns:
+            geopandas.GeoDataFrame: Talhões simplificados, em 2D, com a coluna "area_name"
+                                    e as colunas de atributos do shapefile
+        """
+        logger.info(f"Processando shapefile: {shapefile_path}")
+        
+        # Carregar o shapefile usando geopandas
+        with span("shapefile.read") as s:
+            gdf_limites = gpd.read_file(shapefile_path)
+            s.set("items", len(gdf_limites))
+        
+        # Função para remover coordenadas Z
+        def remove_z_coordinates(geom):
+            if isinstance(geom, Polygon):
+                # Remove coordenadas Z do Polygon, incluindo buracos
+                exterior = [(x, y) for x, y, *_ in geom.exterior.coords]
+                interiors = [[(x, y) for x, y, *_ in interior.coords] for interior in geom.interiors]
+                return Polygon(exterior, interiors)
+            elif isinstance(geom, MultiPolygon):
+                # Remove coordenadas Z de cada Polygon no MultiPolygon
+                return MultiPolygon([remove_z_coordinates(p) for p in geom.geoms])
+            else:
+                return geom  # Retorna a geometria original caso não seja Polygon ou MultiPolygon
+        
+        # Simplificar apenas as geometrias acima do orçamento de vértices/bytes
+        with span("shapefile.simplify", items=len(gdf_limites)):
+            geometrias_simplificadas, erro_area = simplify_to_budget(
+                gdf_limites.geometry, max_vertices=max_vertices, max_bytes=max_payload_bytes
+            )
+        if len(erro_area):
+            logger.info(
+                f"Simplificacao adaptativa: erro de area medio {erro_area.mean():.4%}, "
+                f"maximo {erro_area.max():.4%}"
+            )
+        
+        # Criar novo GeoDataFrame com geometrias simplificadas
+        gdf_simplificado = gdf_limites.set_geometry(geometrias_simplificadas)
+        gdf_simplificado[erro_area.name] = erro_area
+        
+        # Remover coordenadas Z
+        gdf_simplificado['geometry'] = gdf_simplificado['geometry'].apply(remove_z_coordinates)
         
+        # Nome do talhão: "<layer>_<Talhao>" quando as colunas existem, identificador genérico caso contrário
+        if "layer" in gdf_simplificado.columns and "Talhao" in gdf_simplificado.columns:
+            gdf_simplificado["area_name"] = (
+                gdf_simplificado["layer"].astype(str) + "_" + gdf_simplificado["Talhao"].astype(str)
+            )
+        else:
+            gdf_simplificado["area_name"] = [f"talhao_{i + 1}" for i in range(len(gdf_simplificado))]
+        
+        return gdf_simplificado.reset_index(drop=True)
     
-    def search_images(self, geojson, start_date, end_date, cloud_cover=0.25):
+    def search_images(self, geojson, start_date, end_date, cloud_cover=0.25, cancel_token=None, plot_index=None,
+                      precheck=False):
         """
         Busca imagens disponíveis com base em uma área de interesse
         
@@ -179,96 +327,447 @@ class PlanetAPIHandler:
             start_date (str): Data de início da busca (formato ISO)
             end_date (str): Data de fim da busca (formato ISO)
             cloud_cover (float, optional): Cobertura máxima de nuvens (0-1). Default: 0.25
-            
+            cancel_token (CancellationToken, optional): Token consultado entre as áreas;
+                                                        se acionado, a busca para e retorna o que já foi obtido
+            plot_index (PlotIndex, optional): Índice dos talhões; se informado, cada resultado recebe
+                                              a cobertura do seu talhão e dos demais talhões que a cena toca
+            precheck (bool, optional): Se True, pula as áreas sem cenas usando o endpoint stats. Default: False
+        
         Returns:
             tuple: (list de imagens encontradas, list de links para download)
         """
-        logger.info(f"Buscando imagens de {start_date} ate {end_date} com cobertura de nuvens <= {cloud_cover}")
-        #Defini o cabeçalho da requisição
-        headers = {"Content-Type": "application/json","Authorization": "api-key {}".format(self.api_key)}
+        all_results = []
+        download_links = []
         
         try:
-            # Define o cabeçalho para as solicitações HTTP
-            headers = {
-                "Content-Type": "application/json", "Authorization": f"api-key {self.api_key}"
-            }
-            
-            # Lista para armazenar resultados
-            all_results = []
-            download_links = []
-            
-            # Determinar o método de busca com base no formato do geojson
-            if "features" in geojson:
-                # Formato GeoJSON padrão com array de features
-                features = geojson.get("features", [])
-                
-                logger.info(f"Processando busca para {len(features)} geometrias no GeoJSON")
-                
-                for idx, feature in enumerate(features):
-                    geometry = feature.get("geometry", {})
-                    
-                    # Buscar imagens para esta geometria
-                    feature_images = self._get_image_ids(
-                        geometry, start_date, end_date, cloud_cover, headers
-                    )
-                    
-                    if feature_images:
-                        # Adicionar identificador da feature para organização
-                        feature_name = f"feature_{idx+1}"
-                        if "properties" in feature and feature["properties"]:
-                            props = feature["properties"]
-                            if "layer" in props and "Talhao" in props:
-                                feature_name = f"{props['layer']}_{props['Talhao']}"
-                            elif "name" in props:
-                                feature_name = props["name"]
-                        
-                        # Processar resultados
-                        for img in feature_images:
-                            img_id = img.get("id", "")
-                            img_data = self._process_image_result(img, feature_name)
-                            all_results.append(img_data)
-                            
-                            # Adicionar link para download
-                            if "_links" in img and "assets" in img["_links"]:
-                                download_links.append(img["_links"]["assets"])
-                    
-                    # Evitar rate limiting
-                    time.sleep(0.3)
-                    
-            elif isinstance(geojson, dict) and all(isinstance(key, str) for key in geojson.keys()):
-                # Formato alternativo: dicionário com nome -> geometria
-                logger.info(f"Processando busca para {len(geojson)} áreas nomeadas")
-                
-                for name, geometry in geojson.items():
-                    # Buscar imagens para esta geometria
-                    feature_images = self._get_image_ids(
-                        geometry, start_date, end_date, cloud_cover, headers
-                    )
-                    
-                    if feature_images:
-                        # Processar resultados
-                        for img in feature_images:
-                            img_id = img.get("id", "")
-                            img_data = self._process_image_result(img, name)
-                            all_results.append(img_data)
-                            
-                            # Adicionar link para download
-                            if "_links" in img and "assets" in img["_links"]:
-                                download_links.append(img["_links"]["assets"])
-                    
-                    # Evitar rate limiting
-                    time.sleep(0.3)
-            else:
-                # Formato não reconhecido
-                logger.error("Formato de GeoJSON não reconhecido")
-                return [], []
+            for batch in self.iter_search_images(
+                geojson, start_date, end_date, cloud_cover, cancel_token=cancel_token, plot_index=plot_index,
+                precheck=precheck
+            ):
+                all_results.extend(batch["images"])
+                download_links.extend(batch["links"])
             
             logger.info(f"Busca finalizada. Encontradas {len(all_results)} imagens")
             return all_results, download_links
-                
+        
         except Exception as e:
             logger.error(f"Erro ao buscar imagens: {e}")
             return [], []
+    
+    def iter_search_images(self, geojson, start_date, end_date, cloud_cover=0.25, cancel_token=None, plot_index=None,
+                           completed_keys=None, known_results=None, precheck=False, saved_searches=None):
+        """
+        Busca imagens área por área, entregando os resultados assim que cada busca termina
+        
+        Args:
+            geojson (dict): GeoJSON representando a área de interesse
+            start_date (str): Data de início da busca (formato ISO)
+            end_date (str): Data de fim da busca (formato ISO)
+            cloud_cover (float, optional): Cobertura máxima de nuvens (0-1). Default: 0.25
+            cancel_token (CancellationToken, optional): Token consultado entre as áreas
+            plot_index (PlotIndex, optional): Índice dos talhões usado para calcular a cobertura
+            completed_keys (set, optional): Chaves de geometria já buscadas (puladas ao retomar uma busca)
+            known_results (dict, optional): Cenas já entregues, indexadas pelo ID (não são entregues de novo)
+            precheck (bool, optional): Se True, conta as cenas de cada geometria com o endpoint
+                                       stats antes da busca e pula as geometrias sem cenas. Default: False
+            saved_searches (SavedSearchStore, optional): Registro de buscas salvas; se informado, cada
+                                                         geometria é buscada pela sua busca salva no servidor
+                                                         (criada na primeira vez) em vez da quick-search
+        
+        Yields:
+            dict: {"key": chave da geometria, "area_names": áreas buscadas,
+                   "images": cenas novas (ainda não entregues), "links": links de download das cenas novas,
+                   "matched_ids": IDs de todas as cenas encontradas na área}
+        
+        Raises:
+            ValueError: Se o formato do GeoJSON não for reconhecido
+        """
+        logger.info(f"Buscando imagens de {start_date} ate {end_date} com cobertura de nuvens <= {cloud_cover}")
+        
+        # Define o cabeçalho para as solicitações HTTP
+        headers = {
+            "Content-Type": "application/json", "Authorization": f"api-key {self.api_key}"
+        }
+        
+        # Determinar as áreas nomeadas com base no formato do geojson
+        named_geometries = named_geometries_from_geojson(geojson)
+        if named_geometries is None:
+            raise ValueError("Formato de GeoJSON não reconhecido")
+        
+        # Áreas com a mesma geometria canônica são buscadas uma única vez
+        unique_geometries = deduplicate_geometries(named_geometries)
+        logger.info(
+            f"Processando busca para {len(named_geometries)} áreas "
+            f"({len(unique_geometries)} geometrias unicas)"
+        )
+        
+        # Resultados indexados pelo ID da cena: cada cena é entregue uma única vez,
+        # com a lista de áreas em que foi encontrada
+        results_by_id = known_results if known_results is not None else {}
+        completed_keys = completed_keys or set()
+        if completed_keys:
+            logger.info(f"Retomando busca: {len(completed_keys & set(unique_geometries))} geometrias ja concluidas")
+        
+        # Geometrias sem nenhuma cena não passam pela quick-search
+        empty_keys = set()
+        if precheck:
+            pending_groups = {
+                key: group for key, group in unique_geometries.items() if key not in completed_keys
+            }
+            empty_keys = self._find_empty_geometries(
+                pending_groups, start_date, end_date, cloud_cover, headers, cancel_token=cancel_token
+            )
+        
+        for key, group in unique_geometries.items():
+            if key in completed_keys:
+                continue
+            
+            if cancel_token and cancel_token.is_cancelled():
+                logger.info("Busca cancelada pelo usuario")
+                return
+            
+            if key in empty_keys:
+                yield {"key": key, "area_names": group["names"], "images": [], "links": [], "matched_ids": []}
+                continue
+            
+            # Buscar imagens para esta geometria
+            if saved_searches is not None:
+                feature_images = self._search_saved(
+                    saved_searches, key, group, start_date, end_date, cloud_cover, headers
+                )
+            else:
+                feature_images = self._get_image_ids(
+                    group["geometry"], start_date, end_date, cloud_cover, headers
+                )
+            
+            # Processar resultados para todas as áreas que compartilham a geometria
+            new_images = []
+            new_links = []
+            matched_ids = []
+            for img in feature_images:
+                is_new = img.get("id") not in results_by_id
+                record = self._merge_image_result(results_by_id, new_links, img, group["names"])
+                if record is None:
+                    continue
+                matched_ids.append(record["id"])
+                if is_new:
+                    new_images.append(record)
+            
+            # Cobertura dos talhões calculada em lote para as cenas novas
+            if plot_index is not None and new_images:
+                plot_index.annotate_results(new_images)
+            
+            yield {
+                "key": key,
+                "area_names": group["names"],
+                "images": new_images,
+                "links": new_links,
+                "matched_ids": matched_ids
+            }
+    
+    def _merge_image_result(self, results_by_id, download_links, image_data, area_names):
+        """
+        Acrescenta uma cena aos resultados, sem duplicar cenas já encontradas em outras áreas
+        
+        Args:
+            results_by_id (dict): Resultados já processados, indexados pelo ID da cena
+            download_links (list): Links de download (cada cena entra uma única vez)
+            image_data (dict): Dados da imagem retornada pela API
+            area_names (list): Áreas em que a cena foi encontrada
+        
+        Returns:
+            dict: Registro da cena (novo ou existente) ou None se a cena não tiver ID
+        """
+        img_id = image_data.get("id", "")
+        if not img_id:
+            return None
+        
+        record = results_by_id.get(img_id)
+        if record is None:
+            record = self._process_image_result(image_data, area_names[0])
+            record["area_names"] = []
+            results_by_id[img_id] = record
+            
+            # Adicionar link para download
+            if record["download_link"]:
+                download_links.append(record["download_link"])
+        
+        for name in area_names:
+            if name not in record["area_names"]:
+                record["area_names"].append(name)
+        return record
+    
+    def _build_search_filter(self, geometries, start_date, end_date, cloud_cover):
+        """
+        Monta o filtro usado na busca de imagens (quick-search e stats)
+        
+        Args:
+            geometries (list): Geometrias no formato GeoJSON; com mais de uma, o filtro
+                               aceita cenas que intersectam qualquer uma delas
+            start_date (str): Data de início (None para não limitar)
+            end_date (str): Data de fim (None para não limitar)
+            cloud_cover (float): Cobertura máxima de nuvens
+        
+        Returns:
+            dict: Filtro no formato da Data API
+        """
+        geometry_filters = [
+            {"type": "GeometryFilter", "field_name": "geometry", "config": geometry}
+            for geometry in geometries
+        ]
+        if len(geometry_filters) == 1:
+            geometry_filter = geometry_filters[0]
+        else:
+            geometry_filter = {"type": "OrFilter", "config": geometry_filters}
+        
+        config = [geometry_filter]
+        if start_date or end_date:
+            date_range = {}
+            if start_date:
+                date_range["gte"] = start_date
+            if end_date:
+                date_range["lte"] = end_date
+            config.append({
+                "type": "DateRangeFilter",
+                "field_name": "acquired",
+                "config": date_range})
+        config.extend([{
+            "type": "RangeFilter",
+            "field_name": "cloud_cover",
+            "config": {
+                "lte": cloud_cover}}, {
+            "type": "PermissionFilter",
+            "config": [
+                "assets:download"]
+        }])
+        
+        return {"type": "AndFilter", "config": config}
+    
+    def _count_images(self, geometries, start_date, end_date, cloud_cover, headers):
+        """
+        Conta, pelo endpoint stats, as cenas que atendem ao filtro da busca
+        
+        Args:
+            geometries (list): Geometrias GeoJSON; com mais de uma, conta as cenas
+                               que intersectam qualquer uma delas
+            start_date (str): Data de início
+            end_date (str): Data de fim
+            cloud_cover (float): Cobertura máxima de nuvens
+            headers (dict): Cabeçalhos HTTP para a requisição
+        
+        Returns:
+            int: Número de cenas ou None se a contagem falhou
+        """
+        query = {
+            "item_types": self.ITEM_TYPES,
+            "interval": "year",
+            "filter": self._build_search_filter(geometries, start_date, end_date, cloud_cover)
+        }
+        
+        try:
+            with span("search.stats", geometries=len(geometries)) as s:
+                response = self._get_session().post(
+                    f"{self.url_base}stats", data=serialization.dumps(query), headers=headers
+                )
+                s.set("status", response.status_code)
+                s.set("bytes", len(response.content))
+            if response.status_code != 200:
+                logger.warning(f"Erro na contagem de imagens: {response.status_code}, {response.text}")
+                return None
+            return sum(bucket.get("count", 0) for bucket in response.json().get("buckets", []))
+        except Exception as e:
+            logger.warning(f"Erro na contagem de imagens: {e}")
+            return None
+    
+    def _find_empty_geometries(self, groups, start_date, end_date, cloud_cover, headers,
+                               cluster_size=STATS_CLUSTER_SIZE, cancel_token=None):
+        """
+        Identifica, com o endpoint stats, as geometrias sem nenhuma cena
+        
+        As geometrias são ordenadas pela curva de Hilbert e contadas em grupos de
+        vizinhas (um OrFilter por grupo). Um grupo sem cenas descarta todas as suas
+        geometrias de uma vez; um grupo com cenas é dividido ao meio e cada metade
+        é contada de novo, até chegar às geometrias individuais.
+        
+        Args:
+            groups (dict): Geometrias únicas {chave: {"geometry": ..., "names": [...]}}
+            start_date (str): Data de início
+            end_date (str): Data de fim
+            cloud_cover (float): Cobertura máxima de nuvens
+            headers (dict): Cabeçalhos HTTP para a requisição
+            cluster_size (int, optional): Geometrias por grupo na primeira contagem. Default: STATS_CLUSTER_SIZE
+            cancel_token (CancellationToken, optional): Token consultado entre as contagens
+        
+        Returns:
+            set: Chaves das geometrias sem cenas (geometrias cuja contagem falhou não entram)
+        """
+        keys = list(groups.keys())
+        if not keys:
+            return set()
+        
+        # Geometrias vizinhas ficam no mesmo grupo
+        shapes = gpd.GeoSeries([shape(groups[key]["geometry"]) for key in keys])
+        if len(keys) > 1:
+            keys = [keys[i] for i in shapes.hilbert_distance().to_numpy().argsort(kind="stable")]
+        
+        empty_keys = set()
+        pending = [keys[i:i + cluster_size] for i in range(0, len(keys), cluster_size)]
+        requests_made = 0
+        while pending:
+            if cancel_token and cancel_token.is_cancelled():
+                break
+            
+            cluster = pending.pop()
+            count = self._count_images(
+                [groups[key]["geometry"] for key in cluster], start_date, end_date, cloud_cover, headers
+            )
+            requests_made += 1
+            if count == 0:
+                empty_keys.update(cluster)
+            elif count and len(cluster) > 1:
+                middle = len(cluster) // 2
+                pending.extend([cluster[middle:], cluster[:middle]])
+        
+        logger.info(
+            f"Pre-verificacao (stats): {len(empty_keys)} de {len(keys)} geometrias sem cenas "
+            f"({requests_made} contagens)"
+        )
+        return empty_keys
+    
+    def _create_saved_search(self, geometry, cloud_cover, name, headers):
+        """
+        Cria uma busca salva (endpoint searches) para uma geometria
+        
+        A busca salva não tem período: as datas são aplicadas ao paginar os resultados,
+        de modo que a mesma busca atende a execuções com períodos diferentes.
+        
+        Args:
+            geometry (dict): Geometria no formato GeoJSON
+            cloud_cover (float): Cobertura máxima de nuvens
+            name (str): Nome da busca salva
+            headers (dict): Cabeçalhos HTTP para a requisição
+        
+        Returns:
+            str: ID da busca salva ou None em caso de erro
+        """
+        query = {
+            "name": name,
+            "item_types": self.ITEM_TYPES,
+            "filter": self._build_search_filter([geometry], None, None, cloud_cover)
+        }
+        
+        with span("search.saved_create") as s:
+            response = self._get_session().post(
+                f"{self.url_base}searches", data=serialization.dumps(query), headers=headers
+            )
+            s.set("status", response.status_code)
+        if response.status_code in (200, 201):
+            search_id = response.json().get("id")
+            logger.info(f"Busca salva criada: {name} ({search_id})")
+            return search_id
+        
+        logger.error(f"Erro ao criar busca salva: {response.status_code}, {response.text}")
+        return None
+    
+    def _get_saved_search_images(self, search_id, start_date, end_date, headers):
+        """
+        Pagina os resultados de uma busca salva dentro de um período
+        
+        Os resultados são pedidos da cena mais recente para a mais antiga e a
+        paginação para assim que uma página chega a cenas anteriores ao início
+        do período.
+        
+        Args:
+            search_id (str): ID da busca salva
+            start_date (str): Data de início (formato ISO)
+            end_date (str): Data de fim (formato ISO)
+            headers (dict): Cabeçalhos HTTP para a requisição
+        
+        Returns:
+            list: Resultados dentro do período ou None se a busca salva não existe mais
+        """
+        start = parser.isoparse(start_date)
+        end = parser.isoparse(end_date)
+        url = f"{self.url_base}searches/{search_id}/results"
+        params = {"_page_size": self.SAVED_SEARCH_PAGE_SIZE, "_sort": "acquired desc"}
+        
+        results = []
+        while url:
+            with span("search.saved_page") as s:
+                response = self._get_session().get(url, params=params, headers=headers)
+                s.set("status", response.status_code)
+                s.set("bytes", len(response.content))
+            if response.status_code == 404:
+                return None
+            if response.status_code != 200:
+                logger.error(f"Erro ao paginar busca salva: {response.status_code}, {response.text}")
+                break
+            
+            page = response.json()
+            reached_start = False
+            for feature in page.get("features", []):
+                acquired = parser.isoparse(feature.get("properties", {}).get("acquired"))
+                if acquired < start:
+                    reached_start = True
+                    break
+                if acquired <= end:
+                    results.append(feature)
+            
+            if reached_start:
+                break
+            
+            # O link da próxima página já contém os parâmetros
+            url = page.get("_links", {}).get("_next")
+            params = None
+        
+        return results
+    
+    def _search_saved(self, saved_searches, key, group, start_date, end_date, cloud_cover, headers):
+        """
+        Busca as imagens de uma geometria pela sua busca salva, criando-a se necessário
+        
+        A busca salva é usada apenas para períodos recentes (ver SAVED_SEARCH_MAX_AGE_DAYS);
+        períodos mais antigos usam a quick-search.
+        
+        Args:
+            saved_searches (SavedSearchStore): Registro das buscas salvas
+            key (str): Chave canônica da geometria
+            group (dict): {"geometry": geometria, "names": [nomes das áreas]}
+            start_date (str): Data de início
+            end_date (str): Data de fim
+            cloud_cover (float): Cobertura máxima de nuvens
+            headers (dict): Cabeçalhos HTTP para a requisição
+        
+        Returns:
+            list: Lista de resultados da busca
+        """
+        end = parser.isoparse(end_date)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=datetime.timezone.utc)
+        max_age = datetime.timedelta(days=self.SAVED_SEARCH_MAX_AGE_DAYS)
+        if datetime.datetime.now(datetime.timezone.utc) - end > max_age:
+            # Período antigo: a quick-search filtra as datas no servidor
+            return self._get_image_ids(group["geometry"], start_date, end_date, cloud_cover, headers)
+        
+        search_id = saved_searches.get(key, cloud_cover)
+        if search_id:
+            results = self._get_saved_search_images(search_id, start_date, end_date, headers)
+            if results is not None:
+                return results
+            # A busca salva foi apagada no servidor: criar de novo
+            logger.warning(f"Busca salva {search_id} nao encontrada; recriando")
+            saved_searches.discard(key, cloud_cover)
+        
+        search_id = self._create_saved_search(
+            group["geometry"], cloud_cover, f"planet_app_{group['names'][0]}_{key[:8]}", headers
+        )
+        if not search_id:
+            # Sem busca salva, recorre à quick-search
+            return self._get_image_ids(group["geometry"], start_date, end_date, cloud_cover, headers)
+        
+        saved_searches.set(key, cloud_cover, search_id)
+        return self._get_saved_search_images(search_id, start_date, end_date, headers) or []
+    
     def _get_image_ids(self, geometry, start_date, end_date, cloud_cover, headers):
         """
         Busca IDs de imagens da API Planet com base nos critérios fornecidos
@@ -279,56 +778,40 @@ class PlanetAPIHandler:
             end_date (str): Data de fim
             cloud_cover (float): Cobertura máxima de nuvens
             headers (dict): Cabeçalhos HTTP para a requisição
-            
+        
         Returns:
             list: Lista de resultados da busca
         """
         # Cria um objeto de consulta (query) para a API da Planet
         query = {
-            "item_types": ["PSScene"],
-            "filter": {            
-                "type": "AndFilter",
-                "config": [{
-                        "type": "GeometryFilter",
-                        "field_name": "geometry",
-                        "config": geometry},{
-                        "type": "DateRangeFilter",
-                        "field_name": "acquired",
-                        "config": {
-                            "gte": start_date,
-                            "lte": end_date}},{
-                        "type": "RangeFilter",
-                        "field_name": "cloud_cover",
-                        "config": {
-                            "lte": cloud_cover}},{
-                        "type":"PermissionFilter",
-                        "config":[
-                            "assets:download"]
-                    }
-                ]
-            }
+            "item_types": self.ITEM_TYPES,
+            "filter": self._build_search_filter([geometry], start_date, end_date, cloud_cover)
         }
         
-        # Converte o objeto de consulta para JSON
-        query_json = json.dumps(query)
+        # Converte o objeto de consulta para JSON compacto
+        query_json = serialization.dumps(query)
         
         # Define a URL de solicitação
         url = f"{self.url_base}quick-search"
         
-        # Envia a solicitação
-        response = requests.post(url, data=query_json, headers=headers)
-        
-        # Verifica se a solicitação foi bem-sucedida
-        if response.status_code == 200:
-            # Extrai os resultados
-            results = response.json().get("features", [])
-            if results:
-                return results
-        else:
-            logger.error(f"Erro na busca de imagens: {response.status_code}, {response.text}")
+        # Envia a solicitação reaproveitando a sessão autenticada
+        with span("search.quick_search") as s:
+            response = self._get_session().post(url, data=query_json, headers=headers)
+            s.set("status", response.status_code)
+            s.set("bytes", len(response.content))
+            
+            # Verifica se a solicitação foi bem-sucedida
+            if response.status_code == 200:
+                # Extrai os resultados
+                results = response.json().get("features", [])
+                s.set("items", len(results))
+                if results:
+                    return results
+            else:
+                logger.error(f"Erro na busca de imagens: {response.status_code}, {response.text}")
         
         return []
-
+    
     def _process_image_result(self, image_data, feature_name=""):
         """
         Processa o resultado de uma imagem retornada pela API
@@ -336,7 +819,7 @@ class PlanetAPIHandler:
         Args:
             image_data (dict): Dados da imagem retornada pela API
             feature_name (str): Nome da feature/área associada
-            
+        
         Returns:
             dict: Dados processados da imagem
         """
@@ -353,6 +836,7 @@ class PlanetAPIHandler:
             "sun_azimuth": properties.get("sun_azimuth", 0),
             "sun_elevation": properties.get("sun_elevation", 0),
             "gsd": properties.get("gsd", 0),  # Ground sample distance (resolução)
+            "footprint": image_data.get("geometry"),  # Footprint da cena (GeoJSON)
             "download_link": ""
         }
         
@@ -362,108 +846,49 @@ class PlanetAPIHandler:
         
         return processed_data
     
-    def create_order(self, selected_images):
+    def create_order(self, selected_images, template=None, aois=None, links_dir=None, ledger=None):
         """
         Cria uma ordem de download para as imagens selecionadas usando a API Planet
         
         Args:
             selected_images (list): Lista de dicionários com informações das imagens
-            
+            template (OrderTemplate, optional): Modelo da ordem (pacote e ferramentas).
+                                                Default: modelo DEFAULT_ORDER_TEMPLATE
+            aois (dict, optional): Geometrias das áreas {nome: geometria}, usadas no recorte;
+                                   sem a geometria da área, a ordem não é recortada
+            links_dir (str, optional): Diretório onde o resumo das ordens é salvo
+            ledger (OrderLedger, optional): Registro de ordens; áreas já pedidas com as mesmas
+                                            cenas e o mesmo modelo não são enviadas de novo
+        
         Returns:
             dict: Informações da ordem criada ou None se houve erro
         """
         logger.info(f"Criando ordem para {len(selected_images)} imagens")
         
         try:
-            # Agrupar imagens por área/talhão
+            if template is None:
+                template = load_order_templates()[DEFAULT_ORDER_TEMPLATE]
+            aois = aois or {}
+            
+            # Agrupar imagens por área/talhão: uma cena encontrada em várias áreas entra
+            # na ordem de cada uma, recortada na geometria da própria área
             images_by_area = {}
             for img in selected_images:
-                area_name = img.get("area_name", "unknown_area")
-                if area_name not in images_by_area:
-                    images_by_area[area_name] = {
-                        "images": [],
-                        "geometry": img.get("geometry", {})
-                    }
-                images_by_area[area_name]["images"].append(img["id"])
-            
-            # URL para a API de ordens
-            orders_url = 'https://api.planet.com/compute/ops/orders/v2'
-            
-            # Cabeçalhos para a requisição
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            # Autenticação
-            auth = requests.auth.HTTPBasicAuth(self.api_key, '')
+                for area_name in img.get("area_names") or [img.get("area_name", "unknown_area")]:
+                    item_ids = images_by_area.setdefault(area_name, [])
+                    if img["id"] not in item_ids:
+                        item_ids.append(img["id"])
             
             # Lista para armazenar respostas das ordens
             order_responses = []
             error_list = []
             
-            # Criar uma ordem para cada área
-            for area_name, area_data in images_by_area.items():
+            # Criar uma ordem para cada área: apenas nome, cenas e recorte variam entre as ordens
+            for area_name, item_ids in images_by_area.items():
                 try:
-                    # Parâmetros da ordem
-                    order_params = {
-                        "name": area_name,
-                        "source_type": "scenes",
-                        "order_type": "partial",
-                        "products": [
-                            {
-                                "item_ids": area_data["images"],
-                                "item_type": "PSScene",
-                                "product_bundle": "analytic_8b_sr_udm2"
-                            }
-                        ],
-                        "tools": [
-                            {"clip": {"aoi": area_data["geometry"]}},
-                            {"harmonize": {"target_sensor": "Sentinel-2"}},
-                            {"reproject": {"projection": "WGS84", "kernel": "cubic"}},
-                            {"composite": {"group_by": "strip_id"}},
-                            {"bandmath": {
-                                "b1": "b1",
-                                "b2": "b2",
-                                "b3": "b3",
-                                "b4": "b4",
-                                "b5": "b5",
-                                "b6": "b6",
-                                "b7": "b7",
-                                "b8": "b8",
-                                "pixel_type": "32R"
-                            }}
-                        ],
-                        "delivery": {
-                            "archive_type": "zip",
-                            "archive_filename": "{{name}}_{{order_id}}.zip"
-                        }
-                    }
-                    
-                    # Enviar requisição para criar a ordem
-                    response = requests.post(
-                        orders_url, 
-                        data=json.dumps(order_params), 
-                        auth=auth, 
-                        headers=headers
+                    order_responses.append(
+                        self.submit_order(area_name, item_ids, template, aois.get(area_name), ledger=ledger)
                     )
-                    
-                    # Verificar resposta
-                    response.raise_for_status()
-                    
-                    # Adicionar resposta à lista
-                    order_response = response.json()
-                    order_responses.append({
-                        "area_name": area_name,
-                        "order_id": order_response.get("id", ""),
-                        "status": order_response.get("state", ""),
-                        "created_at": datetime.datetime.now().isoformat(),
-                        "links": order_response.get("_links", {}),
-                        "item_count": len(area_data["images"])
-                    })
-                    
-                    # Pequeno delay para evitar rate limiting
-                    time.sleep(0.25)
-                    
                 except Exception as e:
                     logger.error(f"Erro ao criar ordem para área {area_name}: {e}")
                     error_list.append({
@@ -471,29 +896,164 @@ class PlanetAPIHandler:
                         "error": str(e)
                     })
             
-            # Salvar links das ordens em um arquivo
-            self._save_order_links(order_responses)
-            
-            # Retornar resultados
+            return self.summarize_orders(
+                order_responses, error_list, [img["id"] for img in selected_images], links_dir
+            )
+        
+        except Exception as e:
+            logger.error(f"Erro ao criar ordens: {e}")
+            return None
+    
+    def submit_order(self, area_name, item_ids, template, aoi=None, ledger=None):
+        """
+        Envia uma ordem para uma área
+        
+        Args:
+            area_name (str): Nome da área (usado como nome da ordem)
+            item_ids (list): IDs das cenas
+            template (OrderTemplate): Modelo da ordem
+            aoi (dict, optional): Geometria de recorte
+            ledger (OrderLedger, optional): Registro de ordens consultado antes do envio; uma ordem
+                                            igual ainda válida é reaproveitada ("reused": True)
+        
+        Returns:
+            dict: Registro da ordem ({"area_name", "order_id", "status", "created_at",
+                  "links", "item_count", "template", "reused"})
+        
+        Raises:
+            requests.HTTPError: Se a API recusar a ordem
+        """
+        if ledger is None:
+            return self._post_order(area_name, item_ids, template, aoi)
+        
+        # A ordem é reservada no registro antes do envio, para que envios simultâneos
+        # (outras threads ou processos) não criem a mesma ordem; a requisição é feita sem a trava
+        existing = ledger.claim(area_name, item_ids, template.fingerprint)
+        if existing is not None:
+            logger.info(f"Ordem {existing['order_id']} reaproveitada para a area {area_name}")
             return {
-                "order_id": f"batch_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}",
-                "status": "processing",
-                "created_at": datetime.datetime.now().isoformat(),
-                "orders": order_responses,
-                "errors": error_list,
-                "items": [img["id"] for img in selected_images]
+                "area_name": area_name,
+                "order_id": existing["order_id"],
+                "status": existing["state"],
+                "created_at": existing["created_at"],
+                "links": existing["links"],
+                "item_count": len(existing["item_ids"]),
+                "template": existing["template"],
+                "reused": True
             }
-            
+        
+        try:
+            order = self._post_order(area_name, item_ids, template, aoi)
+        except Exception:
+            ledger.release(area_name, item_ids, template.fingerprint)
+            raise
+        
+        if order["order_id"]:
+            ledger.record(order, item_ids, template.fingerprint)
+        else:
+            ledger.release(area_name, item_ids, template.fingerprint)
+        return order
+    
+    def _post_order(self, area_name, item_ids, template, aoi=None):
+        """
+        Cria uma ordem na Orders API (sem consultar o registro de ordens)
+        
+        Args:
+            area_name (str): Nome da área (usado como nome da ordem)
+            item_ids (list): IDs das cenas
+            template (OrderTemplate): Modelo da ordem
+            aoi (dict, optional): Geometria de recorte
+        
+        Returns:
+            dict: Registro da ordem (ver submit_order)
+        
+        Raises:
+            requests.HTTPError: Se a API recusar a ordem
+        """
+        payload = template.build_payload(area_name, item_ids, aoi)
+        
+        # Enviar requisição para criar a ordem
+        with span("order.create", items=len(item_ids), bytes=len(payload)) as s:
+            response = self._get_session().post(
+                self.ORDERS_URL, 
+                data=payload, 
+                auth=requests.auth.HTTPBasicAuth(self.api_key, ''), 
+                headers={"Content-Type": "application/json"}
+            )
+            s.set("status", response.status_code)
+        
+        # Verificar resposta
+        response.raise_for_status()
+        
+        order_response = response.json()
+        return {
+            "area_name": area_name,
+            "order_id": order_response.get("id", ""),
+            "status": order_response.get("state", ""),
+            "created_at": datetime.datetime.now().isoformat(),
+            "links": order_response.get("_links", {}),
+            "item_count": len(item_ids),
+            "template": template.name,
+            "reused": False
+        }
+    
+    def get_order_state(self, order_id):
+        """
+        Consulta o estado de uma ordem na Orders API
+        
+        Args:
+            order_id (str): ID da ordem
+        
+        Returns:
+            str: Estado da ordem (queued, running, success, partial, failed, cancelled)
+                 ou None em caso de erro
+        """
+        try:
+            with span("order.get") as s:
+                response = self._get_session().get(f"{self.ORDERS_URL}/{order_id}", timeout=self.DOWNLOAD_TIMEOUT)
+                s.set("status", response.status_code)
+            response.raise_for_status()
+            return response.json().get("state")
         except Exception as e:
-            logger.error(f"Erro ao criar ordens: {e}")
+            logger.error(f"Erro ao consultar a ordem {order_id}: {e}")
             return None
+    
+    def summarize_orders(self, order_responses, error_list, item_ids, links_dir=None):
+        """
+        Reúne as ordens de um lote, salvando o resumo dos links se houver diretório
+        
+        Args:
+            order_responses (list): Ordens criadas (ver submit_order)
+            error_list (list): Erros por área ({"area_name", "error"})
+            item_ids (list): IDs de todas as cenas do lote
+            links_dir (str, optional): Diretório onde o resumo das ordens é salvo
         
-    def _save_order_links(self, order_responses):
+        Returns:
+            dict: Informações do lote de ordens
+        """
+        # Salvar links das ordens em um arquivo
+        if links_dir and order_responses:
+            self._save_order_links(order_responses, links_dir)
+        
+        return {
+            "order_id": f"batch_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}",
+            "status": "processing",
+            "created_at": datetime.datetime.now().isoformat(),
+            "orders": order_responses,
+            "errors": error_list,
+            "items": list(item_ids)
+        }
+    
+    def _save_order_links(self, order_responses, links_dir):
         """
         Salva os links das ordens em um arquivo de texto
         
         Args:
             order_responses (list): Lista de respostas das ordens criadas
+            links_dir (str): Diretório do arquivo
+        
+        Returns:
+            str: Caminho do arquivo salvo ou None em caso de erro
         """
         try:
             # Criar nome de arquivo com data atual
@@ -501,7 +1061,7 @@ class PlanetAPIHandler:
             filename = f"orders_{timestamp}.txt"
             
             # Caminho do arquivo
-            file_path = os.path.join(self.links_dir, filename)
+            file_path = os.path.join(links_dir, filename)
             
             # Escrever links no arquivo
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -513,35 +1073,96 @@ class PlanetAPIHandler:
                     f.write(f"Status: {order['status']}\n")
                     f.write(f"Link: {order['links'].get('_self', '')}\n")
                     f.write(f"Número de itens: {order['item_count']}\n")
+                    f.write(f"Modelo: {order['template']}\n")
+                    if order.get("reused"):
+                        f.write("Reaproveitada de um envio anterior\n")
                     f.write("\n---\n\n")
             
             logger.info(f"Links das ordens salvos em: {file_path}")
             return file_path
-            
+        
         except Exception as e:
             logger.error(f"Erro ao salvar links das ordens: {e}")
             return None
     
-    def download_image(self, download_link, output_path):
+    def get_assets(self, assets_url):
         """
-        Baixa uma imagem a partir do link fornecido
+        Obtém a listagem de assets de uma cena (link "_links.assets" da busca)
+        
+        Args:
+            assets_url (str): URL da listagem de assets
+        
+        Returns:
+            dict: {tipo_do_asset: asset} ou None em caso de erro
+        """
+        try:
+            with span("asset.get") as s:
+                response = self._get_session().get(assets_url, timeout=self.DOWNLOAD_TIMEOUT)
+                s.set("status", response.status_code)
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"Erro ao obter assets: {response.status_code}, {response.text}")
+        except Exception as e:
+            logger.warning(f"Erro ao obter assets: {e}")
+        return None
+    
+    def activate_asset(self, asset):
+        """
+        Solicita a ativação de um asset
+        
+        Args:
+            asset (dict): Asset da listagem retornada por get_assets
+        
+        Returns:
+            bool: True se a ativação foi aceita (ou o asset já está ativo)
+        """
+        activate_link = asset.get("_links", {}).get("activate")
+        if not activate_link:
+            return False
+        
+        try:
+            with span("asset.activate") as s:
+                response = self._get_session().get(activate_link, timeout=self.DOWNLOAD_TIMEOUT)
+                s.set("status", response.status_code)
+            if response.status_code in (200, 202, 204):
+                return True
+            logger.warning(f"Erro ao ativar asset: {response.status_code}, {response.text}")
+        except Exception as e:
+            logger.warning(f"Erro ao ativar asset: {e}")
+        return False
+    
+    def download_image(self, download_link, output_path, progress=None):
+        """
+        Baixa uma imagem a partir do link fornecido, gravando em blocos
         
         Args:
             download_link (str): Link para download da imagem
             output_path (str): Caminho onde a imagem será salva
-            
+            progress (ProgressTracker, optional): Rastreador que recebe o tamanho do arquivo
+                                                  e os bytes de cada bloco gravado
+        
         Returns:
             str: Caminho da imagem baixada
         """
         logger.info(f"Baixando imagem: {download_link}")
         
         try:
-            # Simulação de download
-            time.sleep(3)
-            
-            # Simula a criação de um arquivo
-            with open(output_path, 'w') as f:
-                f.write("Conteúdo simulado da imagem")
+            with span("download.file") as s, \
+                    self._get_session().get(download_link, stream=True, timeout=self.DOWNLOAD_TIMEOUT) as response:
+                s.set("status", response.status_code)
+                response.raise_for_status()
+                
+                if progress:
+                    progress.file_started(int(response.headers.get("Content-Length", 0) or 0))
+                
+                with open(output_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        s.add("bytes", len(chunk))
+                        if progress:
+                            progress.add_bytes(len(chunk))
             
             logger.info(f"Imagem salva em: {output_path}")
             return output_path
@@ -0,0 +1,211 @@
+"""
+Ativação dos assets da Data API antes do download.
+"""
+
+import heapq
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("AssetActivator")
+
+# Asset baixado por padrão e tipos oferecidos na interface
+DEFAULT_ASSET_TYPE = "ortho_analytic_4b"
+ASSET_TYPES = ("ortho_analytic_4b", "ortho_analytic_4b_sr", "ortho_analytic_8b", "ortho_visual")
+
+# Threads que consultam/ativam assets e tamanho da fila de entrada
+ACTIVATION_WORKERS = 4
+ACTIVATION_QUEUE_SIZE = 32
+
+# Intervalo entre consultas de um asset em ativação (dobrado a cada consulta)
+POLL_INITIAL_DELAY = 5.0
+POLL_MAX_DELAY = 60.0
+
+# Tempo máximo de espera pela ativação de um asset (segundos)
+ACTIVATION_TIMEOUT = 30 * 60
+
+
+def is_asset_listing(link):
+    """
+    Indica se o link é uma listagem de assets da Data API (e não um arquivo para download)
+    
+    Args:
+        link (str): Link lido do arquivo de links
+    
+    Returns:
+        bool: True para links ".../items/<id>/assets"
+    """
+    return urlparse(link).path.rstrip("/").endswith("/assets")
+
+
+class AssetActivator:
+    """
+    Estágio de ativação entre a leitura dos links e o download.
+    
+    Cada listagem de assets recebida por submit() é consultada por uma das
+    threads de ativação: se o asset escolhido já estiver ativo, seu "location"
+    é entregue imediatamente a on_ready; se estiver inativo, a ativação é
+    solicitada e o asset entra na agenda de consultas, com intervalo dobrado a
+    cada consulta (backoff) até POLL_MAX_DELAY. Uma thread de agenda devolve
+    os assets à fila quando chega a hora da próxima consulta, de modo que
+    ativação, consultas e downloads acontecem ao mesmo tempo.
+    """
+    
+    def __init__(self, api_handler, on_ready, on_failed, asset_type=DEFAULT_ASSET_TYPE, cancel_token=None,
+                 workers=ACTIVATION_WORKERS, timeout=ACTIVATION_TIMEOUT):
+        """
+        Inicializa o estágio e inicia as threads
+        
+        Args:
+            api_handler (PlanetAPIHandler): Manipulador da API
+            on_ready (callable): Chamado como on_ready(item_id, location) quando o asset fica ativo
+            on_failed (callable): Chamado como on_failed(item_id) quando o asset não pôde ser ativado
+            asset_type (str, optional): Tipo de asset a baixar. Default: DEFAULT_ASSET_TYPE
+            cancel_token (CancellationToken, optional): Token de cancelamento cooperativo
+            workers (int, optional): Número de threads de ativação. Default: ACTIVATION_WORKERS
+            timeout (float, optional): Espera máxima pela ativação de cada asset. Default: ACTIVATION_TIMEOUT
+        """
+        self.api_handler = api_handler
+        self.on_ready = on_ready
+        self.on_failed = on_failed
+        self.asset_type = asset_type
+        self.cancel_token = cancel_token
+        self.timeout = timeout
+        
+        self._queue = queue.Queue(maxsize=ACTIVATION_QUEUE_SIZE)
+        self._schedule = []
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        self._threads.append(threading.Thread(target=self._scheduler, daemon=True))
+        for thread in self._threads:
+            thread.start()
+    
+    def _cancelled(self):
+        return self.cancel_token is not None and self.cancel_token.is_cancelled()
+    
+    def submit(self, item_id, assets_url):
+        """
+        Envia uma listagem de assets para ativação (bloqueia se a fila estiver cheia)
+        
+        Args:
+            item_id: Identificador repassado a on_ready/on_failed
+            assets_url (str): URL da listagem de assets
+        """
+        with self._condition:
+            self._pending += 1
+        self._queue.put((item_id, assets_url, 0, time.monotonic() + self.timeout))
+    
+    def close(self):
+        """Aguarda a conclusão de todos os assets enviados e encerra as threads"""
+        with self._condition:
+            while self._pending > 0:
+                self._condition.wait(timeout=1.0)
+                if self._cancelled():
+                    self._drop_schedule()
+            self._closed = True
+            self._condition.notify_all()
+        
+        for _ in range(len(self._threads) - 1):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+    
+    def _finish(self, item_id, location=None):
+        """Entrega o resultado de um asset e atualiza a contagem de pendentes"""
+        try:
+            if location:
+                self.on_ready(item_id, location)
+            else:
+                self.on_failed(item_id)
+        except Exception as e:
+            logger.error(f"Erro ao entregar o resultado da ativacao: {e}")
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+    
+    def _drop_schedule(self):
+        """Descarta os assets agendados (chamado com o lock adquirido, após o cancelamento)"""
+        dropped = len(self._schedule)
+        self._schedule = []
+        self._pending -= dropped
+    
+    def _worker(self):
+        """Consulta cada asset recebido, solicita a ativação e agenda a próxima consulta"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            item_id, assets_url, attempt, deadline = item
+            if self._cancelled():
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify_all()
+                continue
+            
+            try:
+                self._process(item_id, assets_url, attempt, deadline)
+            except Exception as e:
+                logger.error(f"Erro na ativacao de {assets_url}: {e}")
+                self._finish(item_id)
+    
+    def _process(self, item_id, assets_url, attempt, deadline):
+        """
+        Verifica o estado de um asset e decide entre entregar, ativar ou aguardar
+        
+        Args:
+            item_id: Identificador do item
+            assets_url (str): URL da listagem de assets
+            attempt (int): Número de consultas já feitas
+            deadline (float): Instante (time.monotonic) limite para a ativação
+        """
+        assets = self.api_handler.get_assets(assets_url)
+        asset = (assets or {}).get(self.asset_type)
+        
+        if assets is not None and asset is None:
+            logger.warning(f"Asset {self.asset_type} nao disponivel em {assets_url}")
+            self._finish(item_id)
+            return
+        
+        if asset is not None:
+            status = asset.get("status")
+            if status == "active" and asset.get("location"):
+                self._finish(item_id, asset["location"])
+                return
+            if status == "inactive":
+                self.api_handler.activate_asset(asset)
+        
+        if time.monotonic() >= deadline:
+            logger.warning(f"Tempo esgotado aguardando a ativacao de {assets_url}")
+            self._finish(item_id)
+            return
+        
+        delay = min(POLL_INITIAL_DELAY * (2 ** attempt), POLL_MAX_DELAY)
+        with self._condition:
+            heapq.heappush(self._schedule, (time.monotonic() + delay, attempt + 1, item_id, assets_url, deadline))
+            self._condition.notify_all()
+    
+    def _scheduler(self):
+        """Devolve à fila de trabalho os assets cuja próxima consulta chegou"""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    if self._cancelled():
+                        self._drop_schedule()
+                        self._condition.notify_all()
+                    if self._schedule and self._schedule[0][0] <= time.monotonic():
+                        break
+                    wait = self._schedule[0][0] - time.monotonic() if self._schedule else 1.0
+                    self._condition.wait(timeout=min(max(wait, 0.0), 1.0))
+                
+                _, attempt, item_id, assets_url, deadline = heapq.heappop(self._schedule)
+            
+            self._queue.put((item_id, assets_url, attempt, deadline))
@@ -3,24 +3,39 @@ Módulo para gerenciamento de arquivos e diretórios do Planet App.
 """
 
 import os
-import json
 import datetime
 from tkinter import filedialog
 from planet_app.utils.logging_config import get_logger
+from planet_app.utils import serialization
+from planet_app.utils.tracing import traced
+from planet_app.core.geometry_utils import (
+    write_wkb_collection, read_wkb_collection, aois_to_geodataframe, geodataframe_to_aois,
+    named_geometries_from_geojson
+)
+import geopandas as gpd
+from shapely.geometry import box
 
 logger = get_logger("FileManager")
 
 class FileManager:
     """Classe para gerenciar arquivos e diretórios"""
     
+    # Tamanho dos row groups do GeoParquet (menor = leitura por bbox mais seletiva)
+    PARQUET_ROW_GROUP_SIZE = 2000
+    
     def __init__(self):
         self.output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output")
         self.json_dir = os.path.join(self.output_dir, "json")
         self.images_dir = os.path.join(self.output_dir, "images")
         self.links_dir = os.path.join(self.output_dir, "links")
+        self.cache_dir = os.path.join(self.output_dir, "cache")
+        self.journals_dir = os.path.join(self.output_dir, "journals")
+        self.jobs_dir = os.path.join(self.output_dir, "jobs")
+        self.order_ledger_path = os.path.join(self.output_dir, "order_ledger.jsonl")
         
         # Criar estrutura de diretórios
-        for directory in [self.output_dir, self.json_dir, self.images_dir, self.links_dir]:
+        for directory in [self.output_dir, self.json_dir, self.images_dir, self.links_dir, self.cache_dir,
+                          self.journals_dir, self.jobs_dir]:
             if not os.path.exists(directory):
                 os.makedirs(directory)
                 logger.info(f"Diretorio criado: {directory}")
@@ -50,13 +65,14 @@ class FileManager:
         """
         return filedialog.askdirectory(title=title)
     
-    def save_json(self, data, filename=None):
+    def save_json(self, data, filename=None, pretty=False):
         """
-        Salva dados em formato JSON
+        Salva dados em formato JSON (compacto por padrão)
         
         Args:
             data (dict): Dados a serem salvos
             filename (str, optional): Nome do arquivo. Se None, gera um nome com timestamp
+            pretty (bool, optional): Se True, grava o JSON indentado. Default: False
             
         Returns:
             str: Caminho completo do arquivo salvo
@@ -66,12 +82,66 @@ class FileManager:
             filename = f"planet_data_{timestamp}.json"
         
         file_path = os.path.join(self.json_dir, filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        serialization.dump(data, file_path, pretty=pretty)
         
         logger.info(f"Arquivo JSON salvo: {file_path}")
         return file_path
     
+    # Extensão de arquivo de cada formato de áreas suportado
+    AOI_FORMATS = {
+        "json": ".json",
+        "wkb": ".wkb",
+        "parquet": ".parquet",
+        "fgb": ".fgb"
+    }
+    
+    @traced("aois.save")
+    def save_aois(self, aois, filename=None, output_format="json"):
+        """
+        Salva as áreas processadas no formato escolhido
+        
+        Os formatos "parquet" (GeoParquet) e "fgb" (FlatGeobuf) preservam as colunas
+        de atributos e gravam índice espacial, permitindo leitura parcial por bbox.
+        
+        Args:
+            aois (dict | geopandas.GeoDataFrame): Dicionário {nome: geometria GeoJSON} ou
+                                                  GeoDataFrame com a coluna "area_name"
+            filename (str, optional): Nome do arquivo. Se None, gera um nome com timestamp
+            output_format (str, optional): "json", "wkb", "parquet" ou "fgb". Default: "json"
+            
+        Returns:
+            str: Caminho completo do arquivo salvo
+        """
+        if output_format not in self.AOI_FORMATS:
+            raise ValueError(f"Formato de saida nao suportado: {output_format}")
+        
+        if not filename:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"planet_data_{timestamp}{self.AOI_FORMATS[output_format]}"
+        
+        # JSON e WKB guardam apenas nome -> geometria; GeoParquet e FlatGeobuf guardam a tabela inteira
+        if output_format in ("json", "wkb") and isinstance(aois, gpd.GeoDataFrame):
+            aois = geodataframe_to_aois(aois)
+        elif output_format in ("parquet", "fgb") and not isinstance(aois, gpd.GeoDataFrame):
+            aois = aois_to_geodataframe(aois)
+        
+        if output_format == "json":
+            return self.save_json(aois, filename)
+        
+        file_path = os.path.join(self.json_dir, filename)
+        if output_format == "wkb":
+            write_wkb_collection(file_path, aois)
+        elif output_format == "parquet":
+            # Ordenar pela curva de Hilbert agrupa talhões próximos nos mesmos row groups,
+            # e a coluna de bbox permite descartar row groups na leitura por bbox
+            aois = aois.iloc[aois.geometry.hilbert_distance().argsort()]
+            aois.to_parquet(file_path, index=False, write_covering_bbox=True, row_group_size=self.PARQUET_ROW_GROUP_SIZE)
+        else:
+            aois.to_file(file_path, driver="FlatGeobuf", SPATIAL_INDEX="YES")
+        
+        logger.info(f"Arquivo de areas ({output_format}) salvo: {file_path}")
+        return file_path
+    
     def save_links(self, links, filename=None):
         """
         Salva links em arquivo de texto
@@ -95,6 +165,20 @@ class FileManager:
         logger.info(f"Links salvos: {file_path}")
         return file_path
     
+    def append_links(self, file_path, links):
+        """
+        Acrescenta links ao final de um arquivo de links existente
+        
+        Args:
+            file_path (str): Caminho do arquivo de links
+            links (list): Lista de links a serem acrescentados
+        """
+        if not links:
+            return
+        with open(file_path, 'a', encoding='utf-8') as f:
+            for link in links:
+                f.write(f"{link}\n")
+    
     def load_json(self, file_path):
         """
         Carrega dados de um arquivo JSON
@@ -105,24 +189,88 @@ class FileManager:
         Returns:
             dict: Dados carregados do arquivo JSON
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = serialization.load(file_path)
         
         logger.info(f"Arquivo JSON carregado: {file_path}")
         return data
     
+    def load_aois_gdf(self, file_path, bbox=None):
+        """
+        Carrega áreas processadas como GeoDataFrame, com todos os atributos salvos
+        
+        Args:
+            file_path (str): Caminho do arquivo (.parquet, .fgb, .json ou .wkb)
+            bbox (tuple, optional): (minx, miny, maxx, maxy) para ler apenas as áreas que
+                                    intersectam o retângulo (leitura parcial em .parquet e .fgb)
+            
+        Returns:
+            geopandas.GeoDataFrame: Áreas com a coluna "area_name"
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == ".parquet":
+            gdf = gpd.read_parquet(file_path, bbox=bbox, memory_map=True)
+        elif extension == ".fgb":
+            gdf = gpd.read_file(file_path, bbox=bbox)
+        else:
+            gdf = aois_to_geodataframe(dict(named_geometries_from_geojson(self.load_aois(file_path)) or []))
+            if bbox:
+                gdf = gdf.iloc[gdf.sindex.query(box(*bbox))].sort_index()
+        
+        logger.info(f"{len(gdf)} areas carregadas de: {file_path}")
+        return gdf
+    
+    @traced("aois.load")
+    def load_aois(self, file_path, bbox=None):
+        """
+        Carrega áreas processadas, escolhendo o leitor pela extensão do arquivo
+        
+        Args:
+            file_path (str): Caminho do arquivo (.json, .wkb, .parquet ou .fgb)
+            bbox (tuple, optional): (minx, miny, maxx, maxy) para leitura parcial (.parquet e .fgb)
+            
+        Returns:
+            dict: GeoJSON (FeatureCollection ou dicionário {nome: geometria})
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in (".parquet", ".fgb"):
+            return geodataframe_to_aois(self.load_aois_gdf(file_path, bbox=bbox))
+        if extension == ".wkb":
+            data = read_wkb_collection(file_path)
+            logger.info(f"Arquivo WKB carregado: {file_path}")
+            return data
+        return self.load_json(file_path)
+    
+    def iter_links(self, file_path):
+        """
+        Lê os links de um arquivo de texto sob demanda, uma linha por vez
+        
+        Linhas em branco e comentários (iniciados por "#") são ignorados.
+        
+        Args:
+            file_path (str): Caminho do arquivo de texto
+            
+        Yields:
+            str: Link de download
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                link = line.strip()
+                if link and not link.startswith("#"):
+                    yield link
+    
     def load_links(self, file_path):
         """
         Carrega links de um arquivo de texto
         
+        Para arquivos grandes prefira iter_links, que não mantém a lista em memória.
+        
         Args:
             file_path (str): Caminho do arquivo de texto
             
         Returns:
             list: Lista de links carregados do arquivo
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            links = [line.strip() for line in f.readlines()]
+        links = list(self.iter_links(file_path))
         
         logger.info(f"Links carregados: {file_path}")
         return links
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""
+Funções auxiliares para manipulação das geometrias dos talhões.
+"""
+
+import hashlib
+import struct
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+from planet_app.utils.logging_config import get_logger
+from planet_app.utils import serialization
+
+logger = get_logger("GeometryUtils")
+
+# Casas decimais usadas na canonização (5 casas ~ 1,1 m em graus)
+GEOMETRY_PRECISION = 5
+
+# Orçamento padrão da simplificação adaptativa
+MAX_VERTICES = 500
+SIMPLIFY_BASE_TOLERANCE = 1e-5
+SIMPLIFY_MAX_ITERATIONS = 16
+
+# Cabeçalho do formato binário de áreas (registros nome + WKB)
+WKB_COLLECTION_MAGIC = b"PLANETWKB1"
+_RECORD_LENGTH = struct.Struct("<I")
+
+
+def _set_precision_or_keep(geometry, grid_size):
+    """Arredonda uma geometria para a grade, mantendo-a como está se o GEOS falhar"""
+    try:
+        return shapely.set_precision(geometry, grid_size)
+    except shapely.errors.GEOSException as e:
+        logger.warning(f"Geometria mantida sem arredondamento: {e}")
+        return geometry
+
+
+def _canonicalize(shapes, precision):
+    """
+    Canoniza um array de geometrias shapely (ver canonicalize_geometries)
+    
+    Args:
+        shapes (numpy.ndarray): Array de geometrias shapely
+        precision (int): Casas decimais mantidas
+    
+    Returns:
+        numpy.ndarray: Array de geometrias canonizadas
+    """
+    # Geometrias inválidas (ex: anel que se cruza) fazem o arredondamento falhar
+    shapes = shapes.copy()
+    invalid = ~shapely.is_valid(shapes)
+    if invalid.any():
+        shapes[invalid] = shapely.make_valid(shapes[invalid])
+    
+    grid_size = 10 ** -precision
+    try:
+        snapped = shapely.set_precision(shapes, grid_size)
+    except shapely.errors.GEOSException:
+        # Uma geometria problemática não deve impedir a canonização das demais
+        snapped = np.array([_set_precision_or_keep(geometry, grid_size) for geometry in shapes], dtype=object)
+    return shapely.normalize(snapped)
+
+
+def canonicalize_geometries(geometries, precision=GEOMETRY_PRECISION):
+    """
+    Canoniza um conjunto de geometrias GeoJSON para comparação
+    
+    As coordenadas são arredondadas para a grade de precisão e a geometria é
+    normalizada (orientação dos anéis, ponto inicial e ordem das partes), de
+    forma que talhões iguais ou quase iguais resultem na mesma geometria.
+    Geometrias inválidas são corrigidas (make_valid) antes do arredondamento.
+    
+    Args:
+        geometries (list): Lista de geometrias no formato GeoJSON (dict)
+        precision (int, optional): Casas decimais mantidas. Default: GEOMETRY_PRECISION
+    
+    Returns:
+        numpy.ndarray: Array de geometrias shapely canonizadas
+    """
+    shapes = np.array([shape(geometry) for geometry in geometries], dtype=object)
+    return _canonicalize(shapes, precision)
+
+
+def geometry_keys(geometries, precision=GEOMETRY_PRECISION):
+    """
+    Calcula o hash (SHA-1 do WKB canônico) de cada geometria
+    
+    Geometrias que a canonização esvazia ou degenera (ex: talhões menores que
+    a grade de precisão, que viram POLYGON EMPTY) usam o WKB original, para
+    que talhões diferentes não recebam a mesma chave.
+    
+    Args:
+        geometries (list): Lista de geometrias no formato GeoJSON (dict)
+        precision (int, optional): Casas decimais mantidas. Default: GEOMETRY_PRECISION
+    
+    Returns:
+        list: Lista de hashes hexadecimais, na mesma ordem das geometrias
+    """
+    if not geometries:
+        return []
+    shapes = np.array([shape(geometry) for geometry in geometries], dtype=object)
+    canonical = _canonicalize(shapes, precision)
+    
+    degenerate = shapely.is_empty(canonical) | (shapely.get_dimensions(canonical) < shapely.get_dimensions(shapes))
+    if degenerate.any():
+        canonical[degenerate] = shapes[degenerate]
+    
+    wkbs = shapely.to_wkb(canonical, output_dimension=2)
+    return [hashlib.sha1(wkb).hexdigest() for wkb in wkbs]
+
+
+def deduplicate_geometries(named_geometries, precision=GEOMETRY_PRECISION):
+    """
+    Agrupa áreas que compartilham a mesma geometria canônica
+    
+    Args:
+        named_geometries (list): Lista de tuplas (nome, geometria GeoJSON)
+        precision (int, optional): Casas decimais mantidas. Default: GEOMETRY_PRECISION
+    
+    Returns:
+        dict: Dicionário {hash: {"geometry": geometria, "names": [nomes]}}, na ordem
+              da primeira ocorrência; a geometria mantida é a da primeira área do grupo
+    """
+    names = [name for name, _ in named_geometries]
+    geometries = [geometry for _, geometry in named_geometries]
+    
+    unique = {}
+    for name, geometry, key in zip(names, geometries, geometry_keys(geometries, precision)):
+        if key not in unique:
+            unique[key] = {"geometry": geometry, "names": []}
+        unique[key]["names"].append(name)
+    
+    duplicates = len(names) - len(unique)
+    if duplicates:
+        logger.info(f"{duplicates} geometrias duplicadas encontradas; {len(unique)} geometrias unicas")
+    return unique
+
+
+def _over_budget(geometries, max_vertices, max_bytes):
+    """
+    Indica quais geometrias excedem o orçamento de vértices e/ou de bytes
+    
+    Args:
+        geometries (numpy.ndarray): Array de geometrias shapely
+        max_vertices (int): Número máximo de vértices (None desativa o limite)
+        max_bytes (int): Tamanho máximo do GeoJSON em bytes (None desativa o limite)
+    
+    Returns:
+        numpy.ndarray: Máscara booleana das geometrias acima do orçamento
+    """
+    over = np.zeros(len(geometries), dtype=bool)
+    if max_vertices:
+        over |= shapely.get_num_coordinates(geometries) > max_vertices
+    if max_bytes:
+        sizes = np.fromiter((len(g) for g in shapely.to_geojson(geometries)), dtype=np.int64, count=len(geometries))
+        over |= sizes > max_bytes
+    return over
+
+
+def simplify_to_budget(geoseries, max_vertices=MAX_VERTICES, max_bytes=None,
+                       base_tolerance=SIMPLIFY_BASE_TOLERANCE, max_iterations=SIMPLIFY_MAX_ITERATIONS):
+    """
+    Simplifica cada geometria apenas o necessário para caber no orçamento
+    
+    Geometrias dentro do orçamento permanecem intactas. As demais são
+    simplificadas com tolerância crescente (dobrada a cada iteração, a partir
+    de base_tolerance) até atingirem o limite de vértices e/ou de bytes do
+    GeoJSON. Cada iteração processa de uma vez todas as geometrias ainda acima
+    do orçamento.
+    
+    Args:
+        geoseries (geopandas.GeoSeries): Geometrias a simplificar
+        max_vertices (int, optional): Número máximo de vértices por geometria. Default: MAX_VERTICES
+        max_bytes (int, optional): Tamanho máximo do GeoJSON de cada geometria em bytes. Default: None
+        base_tolerance (float, optional): Tolerância inicial. Default: SIMPLIFY_BASE_TOLERANCE
+        max_iterations (int, optional): Número máximo de iterações. Default: SIMPLIFY_MAX_ITERATIONS
+    
+    Returns:
+        tuple: (GeoSeries simplificada, Series com o erro relativo de área de cada geometria)
+    """
+    original = geoseries.to_numpy()
+    simplified = original.copy()
+    tolerances = np.full(len(original), base_tolerance, dtype=float)
+    
+    pending = np.nonzero(_over_budget(original, max_vertices, max_bytes))[0]
+    for _ in range(max_iterations):
+        if len(pending) == 0:
+            break
+        simplified[pending] = shapely.simplify(original[pending], tolerances[pending], preserve_topology=True)
+        still_over = _over_budget(simplified[pending], max_vertices, max_bytes)
+        pending = pending[still_over]
+        tolerances[pending] *= 2
+    
+    if len(pending):
+        logger.warning(f"{len(pending)} geometrias continuam acima do orcamento apos a simplificacao")
+    
+    # Erro relativo de área introduzido pela simplificação
+    original_area = shapely.area(original)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        area_error = np.where(
+            original_area > 0,
+            np.abs(shapely.area(simplified) - original_area) / original_area,
+            0.0
+        )
+    
+    return (
+        gpd.GeoSeries(simplified, index=geoseries.index, crs=geoseries.crs),
+        pd.Series(area_error, index=geoseries.index, name="simplification_area_error")
+    )
+
+
+def geometries_to_geojson(geometries):
+    """
+    Converte um array de geometrias shapely em dicionários GeoJSON
+    
+    Args:
+        geometries (numpy.ndarray): Array de geometrias shapely
+    
+    Returns:
+        list: Lista de geometrias no formato GeoJSON (dict)
+    """
+    return [serialization.loads(text) for text in shapely.to_geojson(geometries)]
+
+
+def write_wkb_collection(file_path, named_geometries):
+    """
+    Grava áreas nomeadas em formato binário (nome + WKB por registro)
+    
+    Cada registro é composto por: tamanho do nome (uint32), nome em UTF-8,
+    tamanho do WKB (uint32) e o WKB da geometria em 2D.
+    
+    Args:
+        file_path (str): Caminho do arquivo de saída
+        named_geometries (dict): Dicionário {nome: geometria GeoJSON ou shapely}
+    """
+    names = list(named_geometries.keys())
+    geometries = [
+        geometry if isinstance(geometry, BaseGeometry) else shape(geometry)
+        for geometry in named_geometries.values()
+    ]
+    wkbs = shapely.to_wkb(geometries, output_dimension=2)
+    
+    with open(file_path, 'wb') as f:
+        f.write(WKB_COLLECTION_MAGIC)
+        for name, wkb in zip(names, wkbs):
+            encoded_name = str(name).encode("utf-8")
+            f.write(_RECORD_LENGTH.pack(len(encoded_name)))
+            f.write(encoded_name)
+            f.write(_RECORD_LENGTH.pack(len(wkb)))
+            f.write(wkb)
+
+
+def read_wkb_collection(file_path, as_geojson=True):
+    """
+    Lê áreas nomeadas gravadas por write_wkb_collection
+    
+    Args:
+        file_path (str): Caminho do arquivo
+        as_geojson (bool, optional): Se True, retorna geometrias GeoJSON; se False,
+                                     geometrias shapely. Default: True
+    
+    Returns:
+        dict: Dicionário {nome: geometria}
+    """
+    with open(file_path, 'rb') as f:
+        data = memoryview(f.read())
+    
+    if bytes(data[:len(WKB_COLLECTION_MAGIC)]) != WKB_COLLECTION_MAGIC:
+        raise ValueError(f"Arquivo nao esta no formato de areas WKB: {file_path}")
+    
+    names = []
+    wkbs = []
+    offset = len(WKB_COLLECTION_MAGIC)
+    while offset < len(data):
+        (name_length,) = _RECORD_LENGTH.unpack_from(data, offset)
+        offset += _RECORD_LENGTH.size
+        names.append(bytes(data[offset:offset + name_length]).decode("utf-8"))
+        offset += name_length
+        (wkb_length,) = _RECORD_LENGTH.unpack_from(data, offset)
+        offset += _RECORD_LENGTH.size
+        wkbs.append(bytes(data[offset:offset + wkb_length]))
+        offset += wkb_length
+    
+    geometries = shapely.from_wkb(wkbs)
+    if as_geojson:
+        geometries = geometries_to_geojson(geometries)
+    return dict(zip(names, geometries))
+
+
+
+def aois_to_geodataframe(aois, crs="EPSG:4326"):
+    """
+    Converte um dicionário de áreas nomeadas em GeoDataFrame
+    
+    Args:
+        aois (dict): Dicionário {nome: geometria GeoJSON}
+        crs (str, optional): Sistema de referência das geometrias. Default: "EPSG:4326"
+    
+    Returns:
+        geopandas.GeoDataFrame: GeoDataFrame com a coluna "area_name"
+    """
+    return gpd.GeoDataFrame(
+        {"area_name": list(aois.keys())},
+        geometry=[shape(geometry) for geometry in aois.values()],
+        crs=crs
+    )
+
+
+def geodataframe_to_aois(gdf, name_column="area_name"):
+    """
+    Converte um GeoDataFrame em dicionário de áreas nomeadas
+    
+    Args:
+        gdf (geopandas.GeoDataFrame): GeoDataFrame com a coluna de nomes
+        name_column (str, optional): Coluna com o nome de cada área. Default: "area_name"
+    
+    Returns:
+        dict: Dicionário {nome: geometria GeoJSON}
+    """
+    return dict(zip(gdf[name_column], geometries_to_geojson(gdf.geometry.to_numpy())))
+
+
+
+def named_geometries_from_geojson(geojson):
+    """
+    Converte o GeoJSON de entrada em uma lista de áreas nomeadas
+    
+    Args:
+        geojson (dict): FeatureCollection ou dicionário {nome: geometria}
+    
+    Returns:
+        list: Lista de tuplas (nome, geometria) ou None se o formato não for reconhecido
+    """
+    if "features" in geojson:
+        # Formato GeoJSON padrão com array de features
+        named_geometries = []
+        for idx, feature in enumerate(geojson.get("features", [])):
+            feature_name = f"feature_{idx+1}"
+            if "properties" in feature and feature["properties"]:
+                props = feature["properties"]
+                if "layer" in props and "Talhao" in props:
+                    feature_name = f"{props['layer']}_{props['Talhao']}"
+                elif "area_name" in props:
+                    feature_name = props["area_name"]
+                elif "name" in props:
+                    feature_name = props["name"]
+            named_geometries.append((feature_name, feature.get("geometry", {})))
+        return named_geometries
+    
+    if isinstance(geojson, dict) and all(isinstance(key, str) for key in geojson.keys()):
+        # Formato alternativo: dicionário com nome -> geometria
+        return list(geojson.items())
+    
+    return None
@@ -0,0 +1,356 @@
+"""
+Registro local (JSONL) das ordens enviadas à Orders API.
+"""
+
+import os
+import hashlib
+import datetime
+import threading
+import contextlib
+import socket
+import time
+import uuid
+from planet_app.utils import serialization
+from planet_app.utils.file_lock import locked_path
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("OrderLedger")
+
+# Estados finais de uma ordem na Orders API
+FINAL_STATES = ("success", "partial", "failed", "cancelled")
+
+# Estados em que a ordem não será entregue e pode ser enviada de novo
+RETRYABLE_STATES = ("failed", "cancelled")
+
+# Reservas de envio mais antigas que isto são consideradas abandonadas
+RESERVATION_TIMEOUT_SECONDS = 300
+
+# Intervalo entre consultas enquanto outro envio da mesma ordem está em andamento
+RESERVATION_POLL_SECONDS = 1.0
+
+
+def items_hash(item_ids):
+    """
+    Calcula o hash de um conjunto de cenas (independe da ordem dos IDs)
+    
+    Args:
+        item_ids (list): IDs das cenas
+    
+    Returns:
+        str: Hash SHA-1 (16 caracteres) dos IDs ordenados
+    """
+    return hashlib.sha1("\n".join(sorted(set(item_ids))).encode("utf-8")).hexdigest()[:16]
+
+
+class OrderLedger:
+    """
+    Registro das ordens, com uma linha JSON por ordem criada ou atualização de estado.
+    
+    Cada ordem é identificada pela área, pelo hash do conjunto de cenas e pelo
+    hash do modelo (pacote, ferramentas e entrega). Antes de enviar uma ordem,
+    o registro é consultado: uma ordem igual que não falhou nem foi cancelada é
+    reaproveitada em vez de enviada de novo. O registro é seguro para uso por
+    várias threads e por vários processos: cada operação é feita sob uma trava
+    do arquivo e começa lendo as linhas gravadas por outros processos desde a
+    última leitura. Pode ser consultado por outras etapas (acompanhamento de
+    estado, download).
+    
+    O envio de uma ordem é reservado no registro (claim) antes da requisição,
+    que é feita sem a trava; envios da mesma ordem aguardam a reserva ser
+    concluída (record) ou liberada (release). Reservas de processos que não
+    existem mais, ou mais antigas que RESERVATION_TIMEOUT_SECONDS, são
+    consideradas abandonadas e a ordem pode ser enviada de novo.
+    """
+    
+    def __init__(self, file_path):
+        """
+        Inicializa o registro, carregando as ordens já gravadas
+        
+        Args:
+            file_path (str): Caminho do arquivo JSONL
+        """
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._offset = 0
+        self._orders = {}
+        self._by_key = {}
+        self._reservations = {}
+        self._claimed = {}
+        with self.locked():
+            logger.info(f"Registro de ordens carregado: {len(self._orders)} ordens")
+    
+    @staticmethod
+    def _key(area_name, order_items_hash, template_hash):
+        return f"{area_name}|{order_items_hash}|{template_hash}"
+    
+    def _write(self, entry):
+        """Acrescenta uma linha ao registro e força a gravação em disco"""
+        with open(self.file_path, 'ab') as f:
+            f.write(serialization.dumps(entry) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _apply(self, entry):
+        """Aplica uma linha do registro ao estado em memória"""
+        if entry.get("type") == "order":
+            record = {key: value for key, value in entry.items() if key != "type"}
+            key = self._key(record["area_name"], record["items_hash"], record["template_hash"])
+            self._orders[record["order_id"]] = record
+            self._by_key[key] = record
+            self._reservations.pop(key, None)
+        elif entry.get("type") == "reservation":
+            self._reservations[entry["key"]] = entry
+        elif entry.get("type") == "release":
+            reservation = self._reservations.get(entry["key"])
+            if reservation is not None and reservation["reservation_id"] == entry["reservation_id"]:
+                del self._reservations[entry["key"]]
+        elif entry.get("type") == "state":
+            record = self._orders.get(entry["order_id"])
+            if record is not None:
+                record["state"] = entry["state"]
+                record["updated_at"] = entry["updated_at"]
+    
+    def _refresh(self):
+        """Aplica as linhas completas gravadas desde a última leitura (linhas inválidas são ignoradas)"""
+        if not os.path.exists(self.file_path):
+            return
+        
+        if os.path.getsize(self.file_path) < self._offset:
+            # Arquivo substituído ou truncado: reconstrói o estado desde o início
+            self._offset = 0
+            self._orders = {}
+            self._by_key = {}
+            self._reservations = {}
+        
+        with open(self.file_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(serialization.loads(line))
+            except (ValueError, KeyError):
+                logger.warning(f"Linha invalida ignorada no registro de ordens: {self.file_path}")
+    
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Trava o registro (entre threads e processos) e o atualiza com as linhas novas do arquivo
+        
+        Pode ser usada de forma aninhada pela mesma thread; a trava do arquivo é
+        mantida até a saída do bloco mais externo.
+        
+        Uso:
+            with ledger.locked():
+                if ledger.find(...) is None:
+                    ... criar a ordem ...
+                    ledger.record(...)
+        """
+        with self._lock:
+            if self._depth > 0:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            
+            with locked_path(self.file_path):
+                self._depth = 1
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    self._depth = 0
+    
+    def find(self, area_name, item_ids, template_hash):
+        """
+        Procura uma ordem já enviada para a mesma área, cenas e modelo
+        
+        Args:
+            area_name (str): Nome da área
+            item_ids (list): IDs das cenas
+            template_hash (str): Hash do modelo (OrderTemplate.fingerprint)
+        
+        Returns:
+            dict: Registro da ordem ou None se não houver ordem reaproveitável
+        """
+        with self.locked():
+            record = self._by_key.get(self._key(area_name, items_hash(item_ids), template_hash))
+            if record is None or record.get("state") in RETRYABLE_STATES:
+                return None
+            return dict(record)
+    
+    @staticmethod
+    def _abandoned(reservation):
+        """Indica se uma reserva de envio foi abandonada (processo encerrado ou tempo esgotado)"""
+        if time.time() - reservation["reserved_at"] > RESERVATION_TIMEOUT_SECONDS:
+            return True
+        if os.name != "posix" or reservation.get("host") != socket.gethostname():
+            return False
+        try:
+            os.kill(reservation["pid"], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+    
+    def claim(self, area_name, item_ids, template_hash):
+        """
+        Reserva o envio de uma ordem ou retorna a ordem igual já registrada
+        
+        Se outro envio da mesma ordem estiver em andamento (nesta ou em outra
+        thread ou processo), aguarda a sua conclusão. Quem recebe None deve
+        enviar a ordem e chamar record() ou, em caso de erro, release().
+        
+        Args:
+            area_name (str): Nome da área
+            item_ids (list): IDs das cenas
+            template_hash (str): Hash do modelo (OrderTemplate.fingerprint)
+        
+        Returns:
+            dict: Registro da ordem reaproveitável ou None se o envio foi reservado
+        """
+        key = self._key(area_name, items_hash(item_ids), template_hash)
+        waiting = False
+        while True:
+            with self.locked():
+                record = self._by_key.get(key)
+                if record is not None and record.get("state") not in RETRYABLE_STATES:
+                    return dict(record)
+                
+                reservation = self._reservations.get(key)
+                if reservation is None or self._abandoned(reservation):
+                    if reservation is not None:
+                        logger.warning(f"Reserva abandonada da ordem da area {area_name} descartada")
+                    entry = {
+                        "type": "reservation",
+                        "key": key,
+                        "reservation_id": uuid.uuid4().hex,
+                        "host": socket.gethostname(),
+                        "pid": os.getpid(),
+                        "reserved_at": time.time()
+                    }
+                    self._write(entry)
+                    self._refresh()
+                    self._claimed[key] = entry["reservation_id"]
+                    return None
+            
+            if not waiting:
+                logger.info(f"Ordem da area {area_name} em envio por outro processo; aguardando")
+                waiting = True
+            time.sleep(RESERVATION_POLL_SECONDS)
+    
+    def release(self, area_name, item_ids, template_hash):
+        """
+        Libera a reserva de envio de uma ordem que não foi criada
+        
+        Args:
+            area_name (str): Nome da área
+            item_ids (list): IDs das cenas
+            template_hash (str): Hash do modelo (OrderTemplate.fingerprint)
+        """
+        key = self._key(area_name, items_hash(item_ids), template_hash)
+        with self.locked():
+            reservation_id = self._claimed.pop(key, None)
+            if reservation_id is None:
+                return
+            self._write({"type": "release", "key": key, "reservation_id": reservation_id})
+            self._refresh()
+    
+    def record(self, order, item_ids, template_hash):
+        """
+        Registra uma ordem criada
+        
+        Args:
+            order (dict): Registro da ordem (ver PlanetAPIHandler.submit_order)
+            item_ids (list): IDs das cenas
+            template_hash (str): Hash do modelo (OrderTemplate.fingerprint)
+        """
+        now = datetime.datetime.now().isoformat()
+        entry = {
+            "type": "order",
+            "order_id": order["order_id"],
+            "area_name": order["area_name"],
+            "items_hash": items_hash(item_ids),
+            "item_ids": sorted(set(item_ids)),
+            "template": order.get("template", ""),
+            "template_hash": template_hash,
+            "state": order.get("status", ""),
+            "links": order.get("links", {}),
+            "created_at": order.get("created_at") or now,
+            "updated_at": now
+        }
+        with self.locked():
+            self._write(entry)
+            self._refresh()
+            self._claimed.pop(self._key(entry["area_name"], entry["items_hash"], template_hash), None)
+    
+    def update_state(self, order_id, state):
+        """
+        Registra o estado atual de uma ordem (apenas se mudou)
+        
+        Args:
+            order_id (str): ID da ordem
+            state (str): Estado informado pela Orders API
+        """
+        with self.locked():
+            record = self._orders.get(order_id)
+            if record is None or record.get("state") == state:
+                return
+            entry = {
+                "type": "state",
+                "order_id": order_id,
+                "state": state,
+                "updated_at": datetime.datetime.now().isoformat()
+            }
+            self._write(entry)
+            self._refresh()
+    
+    def get(self, order_id):
+        """
+        Retorna o registro de uma ordem
+        
+        Args:
+            order_id (str): ID da ordem
+        
+        Returns:
+            dict: Registro da ordem ou None se não estiver no registro
+        """
+        with self.locked():
+            record = self._orders.get(order_id)
+            return dict(record) if record is not None else None
+    
+    def orders(self, states=None, area_name=None):
+        """
+        Lista as ordens registradas
+        
+        Args:
+            states (tuple, optional): Filtra pelos estados informados
+            area_name (str, optional): Filtra pela área
+        
+        Returns:
+            list: Registros das ordens, na ordem de criação
+        """
+        with self.locked():
+            return [
+                dict(record) for record in self._orders.values()
+                if (states is None or record.get("state") in states)
+                and (area_name is None or record["area_name"] == area_name)
+            ]
+    
+    def pending(self):
+        """
+        Lista as ordens que ainda não chegaram a um estado final
+        
+        Returns:
+            list: Registros das ordens pendentes
+        """
+        with self.locked():
+            return [dict(record) for record in self._orders.values() if record.get("state") not in FINAL_STATES]
@@ -0,0 +1,115 @@
+"""
+Envio de ordens em paralelo à busca de imagens.
+"""
+
+import queue
+import threading
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("OrderPipeline")
+
+# Threads que enviam ordens e tamanho da fila de ordens aguardando envio
+ORDER_WORKERS = 2
+ORDER_QUEUE_SIZE = 16
+
+
+class OrderSubmitter:
+    """
+    Estágio de envio de ordens alimentado pela busca.
+    
+    Cada área cuja seleção de cenas termina é enviada por submit() e criada
+    por uma das threads de envio enquanto a busca das demais áreas continua,
+    de modo que o processamento das ordens na Planet começa antes do fim da
+    busca. close() aguarda os envios pendentes e devolve o resumo do lote no
+    mesmo formato de PlanetAPIHandler.create_order.
+    """
+    
+    def __init__(self, api_handler, template, links_dir=None, cancel_token=None, on_order=None,
+                 ledger=None, workers=ORDER_WORKERS):
+        """
+        Inicializa o estágio e inicia as threads
+        
+        Args:
+            api_handler (PlanetAPIHandler): Manipulador da API
+            template (OrderTemplate): Modelo das ordens
+            links_dir (str, optional): Diretório onde o resumo das ordens é salvo
+            cancel_token (CancellationToken, optional): Ordens ainda na fila são descartadas após o cancelamento
+            on_order (callable, optional): Chamado como on_order(ordem) a cada ordem criada
+            ledger (OrderLedger, optional): Registro de ordens (evita ordens duplicadas)
+            workers (int, optional): Número de threads de envio. Default: ORDER_WORKERS
+        """
+        self.api_handler = api_handler
+        self.template = template
+        self.links_dir = links_dir
+        self.cancel_token = cancel_token
+        self.on_order = on_order
+        self.ledger = ledger
+        
+        self.order_responses = []
+        self.errors = []
+        self.item_ids = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=ORDER_QUEUE_SIZE)
+        
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, area_name, item_ids, aoi=None):
+        """
+        Enfileira a ordem de uma área (bloqueia se a fila estiver cheia)
+        
+        Args:
+            area_name (str): Nome da área (usado como nome da ordem)
+            item_ids (list): IDs das cenas
+            aoi (dict, optional): Geometria de recorte
+        """
+        if not item_ids:
+            return
+        with self._lock:
+            self.item_ids.extend(item_ids)
+        self._queue.put((area_name, list(item_ids), aoi))
+    
+    def close(self):
+        """
+        Aguarda o envio das ordens enfileiradas e encerra as threads
+        
+        Returns:
+            dict: Resumo do lote de ordens (ver PlanetAPIHandler.summarize_orders)
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        
+        logger.info(f"{len(self.order_responses)} ordens criadas durante a busca, {len(self.errors)} com erro")
+        return self.api_handler.summarize_orders(self.order_responses, self.errors, self.item_ids, self.links_dir)
+    
+    def _worker(self):
+        """Cria as ordens recebidas pela fila"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            area_name, item_ids, aoi = item
+            if self.cancel_token and self.cancel_token.is_cancelled():
+                continue
+            
+            try:
+                order = self.api_handler.submit_order(area_name, item_ids, self.template, aoi, ledger=self.ledger)
+            except Exception as e:
+                logger.error(f"Erro ao criar ordem para área {area_name}: {e}")
+                with self._lock:
+                    self.errors.append({"area_name": area_name, "error": str(e)})
+                continue
+            
+            with self._lock:
+                self.order_responses.append(order)
+            logger.info(f"Ordem {order['order_id']} criada para a area {area_name} ({len(item_ids)} cenas)")
+            
+            if self.on_order:
+                try:
+                    self.on_order(order)
+                except Exception as e:
+                    logger.error(f"Erro ao notificar a ordem criada: {e}")
@@ -0,0 +1,252 @@
+"""
+Modelos de ordem (pacote de produto e cadeia de ferramentas) da Orders API.
+
+Os modelos padrão ficam em resources/order_templates.json e podem ser
+complementados ou substituídos por um arquivo order_templates.json no
+diretório de saída, sem alterar o código. A parte fixa de cada modelo é
+serializada uma única vez; ao criar uma ordem, apenas o nome, os IDs das
+cenas e a geometria de recorte são inseridos no corpo da requisição.
+"""
+
+import os
+import hashlib
+from planet_app.utils import serialization
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("OrderTemplates")
+
+# Modelos distribuídos com a aplicação
+BUILTIN_TEMPLATES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "order_templates.json"
+)
+
+# Nome do arquivo de modelos do usuário (no diretório de saída)
+USER_TEMPLATES_FILE = "order_templates.json"
+
+DEFAULT_ORDER_TEMPLATE = "padrao"
+
+# Tipos de pixel aceitos pela ferramenta bandmath ("Auto" mantém o tipo nativo do produto)
+PIXEL_TYPES = ("Auto", "8U", "16U", "16S", "32R")
+
+# Formatos de arquivo de saída ("GeoTIFF" é o padrão da Orders API)
+FILE_FORMATS = ("GeoTIFF", "COG")
+
+# Número de bandas de cada pacote de produto (para seleção de bandas)
+BUNDLE_BANDS = {
+    "analytic_udm2": 4,
+    "analytic_sr_udm2": 4,
+    "analytic_8b_udm2": 8,
+    "analytic_8b_sr_udm2": 8,
+    "visual": 3,
+}
+
+COMPOSITE_TOOL = {"composite": {"group_by": "strip_id"}}
+
+
+def _tool_name(tool):
+    """Retorna o nome de uma ferramenta da cadeia ({"nome": parâmetros})"""
+    return next(iter(tool))
+
+
+def _insert_before(tools, tool, names):
+    """Insere a ferramenta antes da primeira ferramenta com um dos nomes (ou no fim)"""
+    for index, existing in enumerate(tools):
+        if _tool_name(existing) in names:
+            tools.insert(index, tool)
+            return
+    tools.append(tool)
+
+
+class OrderTemplate:
+    """Modelo de ordem com a parte fixa do corpo da requisição já serializada"""
+    
+    def __init__(self, name, product_bundle, item_type="PSScene", tools=None, clip=True, delivery=None,
+                 order_type="partial", description=""):
+        """
+        Inicializa o modelo
+        
+        Args:
+            name (str): Nome do modelo
+            product_bundle (str): Pacote de produto (ex: "analytic_8b_sr_udm2")
+            item_type (str, optional): Tipo de item. Default: "PSScene"
+            tools (list, optional): Ferramentas aplicadas depois do recorte
+            clip (bool, optional): Recortar as cenas na geometria da área. Default: True
+            delivery (dict, optional): Opções de entrega da ordem
+            order_type (str, optional): "partial" ou "full". Default: "partial"
+            description (str, optional): Descrição exibida na interface
+        """
+        self.name = name
+        self.product_bundle = product_bundle
+        self.item_type = item_type
+        self.tools = list(tools or [])
+        self.clip = clip
+        self.delivery = delivery
+        self.order_type = order_type
+        self.description = description
+        
+        # Trechos fixos do corpo, na ordem em que aparecem
+        self._products_prefix = (
+            b',"source_type":"scenes","order_type":' + serialization.dumps(order_type)
+            + b',"products":[{"item_ids":'
+        )
+        self._products_suffix = (
+            b',"item_type":' + serialization.dumps(item_type)
+            + b',"product_bundle":' + serialization.dumps(product_bundle) + b'}],"tools":['
+        )
+        self._tools = serialization.dumps(self.tools)[1:-1]
+        self._tail = b']'
+        if delivery:
+            self._tail += b',"delivery":' + serialization.dumps(delivery)
+        self._tail += b'}'
+        
+        # Identifica o produto pedido (pacote, ferramentas e entrega), independente do nome do modelo
+        self.fingerprint = hashlib.sha1(
+            b"|".join((self._products_prefix, self._products_suffix, self._tools, self._tail, b"%d" % bool(clip)))
+        ).hexdigest()[:16]
+    
+    @classmethod
+    def from_dict(cls, name, data):
+        """
+        Cria um modelo a partir da sua entrada no arquivo de modelos
+        
+        Args:
+            name (str): Nome do modelo
+            data (dict): Entrada do arquivo ({"product_bundle", "tools", "clip", ...})
+        
+        Returns:
+            OrderTemplate: Modelo criado
+        """
+        return cls(
+            name,
+            data["product_bundle"],
+            item_type=data.get("item_type", "PSScene"),
+            tools=data.get("tools"),
+            clip=data.get("clip", True),
+            delivery=data.get("delivery"),
+            order_type=data.get("order_type", "partial"),
+            description=data.get("description", "")
+        )
+    
+    def with_options(self, bands=None, pixel_type=None, file_format=None, composite=None):
+        """
+        Cria uma variante do modelo com opções de entrega de um job
+        
+        Opções None mantêm o que o modelo define. Sem seleção de bandas e com
+        pixel_type "Auto", a ferramenta bandmath é removida e o produto é entregue
+        no tipo nativo (16 bits para os produtos analíticos).
+        
+        Args:
+            bands (list, optional): Bandas entregues, numeradas a partir de 1 (ex: [2, 4, 6, 8])
+            pixel_type (str, optional): Tipo de pixel da saída (ver PIXEL_TYPES)
+            file_format (str, optional): Formato dos arquivos (ver FILE_FORMATS)
+            composite (bool, optional): Compor as cenas de uma mesma faixa (strip) em um único arquivo
+        
+        Returns:
+            OrderTemplate: Novo modelo (a parte fixa é serializada uma vez por job)
+        """
+        if pixel_type is not None and pixel_type not in PIXEL_TYPES:
+            raise ValueError(f"Tipo de pixel invalido: {pixel_type}")
+        if file_format is not None and file_format not in FILE_FORMATS:
+            raise ValueError(f"Formato de arquivo invalido: {file_format}")
+        
+        tools = [dict(tool) for tool in self.tools]
+        
+        if composite is not None:
+            tools = [tool for tool in tools if _tool_name(tool) != "composite"]
+            if composite:
+                _insert_before(tools, COMPOSITE_TOOL, ("bandmath", "file_format"))
+        
+        if bands or pixel_type is not None:
+            current = next((tool["bandmath"] for tool in tools if _tool_name(tool) == "bandmath"), None)
+            tools = [tool for tool in tools if _tool_name(tool) != "bandmath"]
+            
+            band_count = BUNDLE_BANDS.get(self.product_bundle)
+            all_bands = [f"b{band}" for band in range(1, (band_count or 0) + 1)]
+            if bands:
+                if band_count is not None and any(band < 1 or band > band_count for band in bands):
+                    raise ValueError(f"O pacote {self.product_bundle} tem apenas {band_count} bandas")
+                expressions = [f"b{band}" for band in bands]
+            elif current is not None:
+                keys = sorted((key for key in current if key != "pixel_type"), key=lambda key: int(key[1:]))
+                expressions = [current[key] for key in keys]
+            else:
+                expressions = all_bands
+            
+            if pixel_type is None:
+                pixel_type = current.get("pixel_type", "Auto") if current else "Auto"
+            
+            # Todas as bandas no tipo nativo: a conversão é desnecessária
+            if not (expressions == all_bands and pixel_type == "Auto"):
+                if not expressions:
+                    raise ValueError(f"Numero de bandas desconhecido para o pacote {self.product_bundle}")
+                bandmath = {f"b{index}": expression for index, expression in enumerate(expressions, start=1)}
+                bandmath["pixel_type"] = pixel_type
+                _insert_before(tools, {"bandmath": bandmath}, ("file_format",))
+        
+        if file_format is not None:
+            tools = [tool for tool in tools if _tool_name(tool) != "file_format"]
+            if file_format != "GeoTIFF":
+                tools.append({"file_format": {"format": file_format}})
+        
+        return OrderTemplate(
+            self.name, self.product_bundle, item_type=self.item_type, tools=tools, clip=self.clip,
+            delivery=self.delivery, order_type=self.order_type, description=self.description
+        )
+    
+    def build_payload(self, order_name, item_ids, aoi=None):
+        """
+        Monta o corpo JSON da requisição de criação da ordem
+        
+        Args:
+            order_name (str): Nome da ordem
+            item_ids (list): IDs das cenas
+            aoi (dict, optional): Geometria GeoJSON de recorte (ignorada se o modelo não recorta)
+        
+        Returns:
+            bytes: Corpo da requisição em JSON
+        """
+        tools = []
+        if self.clip and aoi:
+            tools.append(b'{"clip":{"aoi":' + serialization.dumps(aoi) + b'}}')
+        if self._tools:
+            tools.append(self._tools)
+        
+        return b''.join((
+            b'{"name":', serialization.dumps(order_name),
+            self._products_prefix, serialization.dumps(list(item_ids)),
+            self._products_suffix, b','.join(tools),
+            self._tail
+        ))
+
+
+def load_order_templates(*paths):
+    """
+    Carrega os modelos de ordem dos arquivos indicados
+    
+    Arquivos posteriores complementam os anteriores; um modelo com o mesmo nome
+    substitui o já carregado. Arquivos inexistentes são ignorados.
+    
+    Args:
+        *paths (str): Caminhos dos arquivos de modelos. Default: apenas os modelos padrão
+    
+    Returns:
+        dict: {nome: OrderTemplate}
+    """
+    templates = {}
+    for path in paths or (BUILTIN_TEMPLATES_FILE,):
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            entries = serialization.load(path)
+        except Exception as e:
+            logger.error(f"Erro ao ler os modelos de ordem em {path}: {e}")
+            continue
+        
+        for name, data in entries.items():
+            try:
+                templates[name] = OrderTemplate.from_dict(name, data)
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.error(f"Modelo de ordem invalido '{name}' em {path}: {e}")
+    
+    logger.info(f"{len(templates)} modelos de ordem carregados")
+    return templates
@@ -3,20 +3,46 @@ Classe principal da aplicação Planet App.
 """
 
 import os
-import json
 import datetime
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from planet_app.core.file_manager import FileManager
 from planet_app.core.api_handler import PlanetAPIHandler
-from planet_app.utils.logging_config import get_logger
+from planet_app.core.spatial_index import PlotIndex
+from planet_app.core.geometry_utils import named_geometries_from_geojson
+from planet_app.core.scene_selection import select_scenes, DEFAULT_WINDOW_DAYS
+from planet_app.core.search_journal import SearchJournal
+from planet_app.core.saved_searches import SavedSearchStore
+from planet_app.core.sharded_search import (
+    StopFileToken, job_dir_for, prepare_job, run_shard, merge_shard_results
+)
+from planet_app.core.order_templates import (
+    load_order_templates, BUILTIN_TEMPLATES_FILE, USER_TEMPLATES_FILE, DEFAULT_ORDER_TEMPLATE
+)
+from planet_app.core.order_pipeline import OrderSubmitter
+from planet_app.core.order_ledger import OrderLedger
+from planet_app.core.asset_activation import AssetActivator, is_asset_listing, DEFAULT_ASSET_TYPE
+from planet_app.utils.logging_config import get_logger, log_file_path, setup_worker_logging
+from planet_app.utils.tracing import traced
 
 logger = get_logger("PlanetApp")
 
+# Downloads simultâneos e tamanho máximo da fila de links aguardando download
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_QUEUE_SIZE = 32
+
 class PlanetApp:
     """Classe principal que gerencia o fluxo da aplicação"""
     
     def __init__(self, api_key=None):
         self.file_manager = FileManager()
         self.api_handler = None
+        self.order_templates = load_order_templates(
+            BUILTIN_TEMPLATES_FILE, os.path.join(self.file_manager.output_dir, USER_TEMPLATES_FILE)
+        )
+        self.order_ledger = OrderLedger(self.file_manager.order_ledger_path)
         self.setup_api(api_key) if api_key else None
         logger.info("PlanetApp inicializado")
     
@@ -26,24 +52,25 @@ class PlanetApp:
         
         Args:
             api_key (str): Chave de API da Planet
-            
+        
         Returns:
             bool: True se a configuração foi bem-sucedida, False caso contrário
         """
-        self.api_handler = PlanetAPIHandler(api_key)
-        valid = self.api_handler.validate_api_key()
-        if valid:
-            self.api_handler.initialize_session()
-        return valid
+        # A validação já cria a sessão autenticada, que é reaproveitada nas chamadas seguintes
+        self.api_handler = PlanetAPIHandler(api_key, cache_dir=self.file_manager.cache_dir)
+        return self.api_handler.validate_api_key()
     
-    def process_shapefile_to_json(self, shapefile_path=None):
+    @traced("aoi.process")
+    def process_shapefile_to_json(self, shapefile_path=None, output_format="json"):
         """
         Processa um shapefile para formato JSON
         
         Args:
             shapefile_path (str, optional): Caminho do arquivo shapefile. 
                                            Se None, abre diálogo para seleção
-            
+            output_format (str, optional): Formato do arquivo gerado: "json", "wkb",
+                                           "parquet" (GeoParquet) ou "fgb" (FlatGeobuf). Default: "json"
+        
         Returns:
             str: Caminho do arquivo JSON gerado ou None se houve erro
         """
@@ -57,17 +84,24 @@ class PlanetApp:
                 return None
         
         try:
-            # Processar o shapefile
-            geojson_data = self.api_handler.process_shapefile(shapefile_path)
+            # Processar o shapefile mantendo os atributos (usados pelos formatos GeoParquet/FlatGeobuf)
+            gdf_talhoes = self.api_handler.process_shapefile_to_gdf(shapefile_path)
             
             # Salvar o resultado
-            json_path = self.file_manager.save_json(geojson_data)
+            json_path = self.file_manager.save_aois(gdf_talhoes, output_format=output_format)
+            
+            # Construir o índice espacial uma vez e gravá-lo ao lado do arquivo de áreas
+            PlotIndex(gdf_talhoes["area_name"], gdf_talhoes.geometry.to_numpy()).save(
+                PlotIndex.index_path_for(json_path)
+            )
             return json_path
         except Exception as e:
             logger.error(f"Erro ao processar shapefile: {e}")
             return None
     
-    def search_images(self, json_path, start_date, end_date, cloud_cover):
+    @traced("search.run")
+    def search_images(self, json_path, start_date, end_date, cloud_cover, cancel_token=None, on_result=None,
+                      resume=True, precheck=False, use_saved_searches=False, on_batch=None):
         """
         Busca imagens com base em um arquivo GeoJSON
         
@@ -76,39 +110,300 @@ class PlanetApp:
             start_date (str): Data de início da busca
             end_date (str): Data de fim da busca
             cloud_cover (float): Cobertura máxima de nuvens (0-1)
-            
+            cancel_token (CancellationToken, optional): Token de cancelamento cooperativo
+            on_result (callable, optional): Chamado como on_result(imagens) a cada área concluída,
+                                            com as cenas novas daquela área
+            resume (bool, optional): Se True, retoma a busca a partir do diário de uma execução
+                                     anterior com os mesmos parâmetros, pulando as áreas concluídas.
+                                     Se False, descarta o diário e busca tudo de novo. Default: True
+            precheck (bool, optional): Se True, conta as cenas de cada área com o endpoint stats
+                                       e pula a quick-search das áreas sem cenas. Default: False
+            use_saved_searches (bool, optional): Se True, usa buscas salvas no servidor (uma por área,
+                                                 criadas na primeira execução e registradas ao lado do
+                                                 arquivo de áreas) em vez da quick-search. Default: False
+            on_batch (callable, optional): Chamado como on_batch(lote, resultados_por_id) a cada geometria
+                                           buscada nesta execução (ver iter_search_images)
+        
         Returns:
             tuple: (list de imagens encontradas, str caminho do arquivo de links)
+        
+        Os links são gravados no arquivo e cada área concluída é registrada no diário
+        (output/journals) à medida que a busca avança, de modo que uma busca cancelada
+        ou interrompida mantém o que já foi obtido e pode ser retomada.
         """
         if not self.api_handler:
             logger.error("API nao inicializada")
             return None, None
         
+        images = []
+        links_file_path = None
         try:
-            # Carregar o GeoJSON
-            with open(json_path, 'r') as f:
-                geojson = json.load(f)
+            # Carregar o GeoJSON (ou o arquivo binário de áreas)
+            geojson = self.file_manager.load_aois(json_path)
+            
+            # Índice espacial dos talhões (reaproveitado do disco quando disponível)
+            plot_index = self._load_plot_index(json_path, geojson)
             
-            # Buscar imagens
-            images, download_links = self.api_handler.search_images(
-                geojson, start_date, end_date, cloud_cover
+            # Diário da busca: áreas já concluídas em execuções anteriores são puladas
+            journal = SearchJournal.for_search(
+                self.file_manager.journals_dir, json_path, start_date, end_date, cloud_cover
             )
+            state = journal.load() if resume else journal.reset()
+            images.extend(state.images)
+            
+            # Arquivo de links criado no início e preenchido a cada área concluída
+            links_file_path = self.file_manager.save_links(state.links)
+            if on_result and images:
+                on_result(list(images))
+            
+            if state.complete:
+                logger.info("Busca ja concluida anteriormente; resultados carregados do diario")
+                return images, links_file_path
+            
+            # Buscar imagens área por área
+            for batch in self.api_handler.iter_search_images(
+                geojson, start_date, end_date, cloud_cover,
+                cancel_token=cancel_token, plot_index=plot_index,
+                completed_keys=state.completed_keys, known_results=state.results_by_id,
+                precheck=precheck,
+                saved_searches=SavedSearchStore.for_aoi_file(json_path) if use_saved_searches else None
+            ):
+                journal.append(batch)
+                self.file_manager.append_links(links_file_path, batch["links"])
+                images.extend(batch["images"])
+                if on_result and batch["images"]:
+                    on_result(batch["images"])
+                if on_batch:
+                    on_batch(batch, state.results_by_id)
             
-            # Salvar links para download posterior
-            links_file_path = self.file_manager.save_links(download_links)
+            if not (cancel_token and cancel_token.is_cancelled()):
+                journal.mark_complete()
             
+            logger.info(f"Busca finalizada. Encontradas {len(images)} imagens")
             return images, links_file_path
         except Exception as e:
+            # Os resultados parciais já gravados continuam disponíveis
             logger.error(f"Erro ao buscar imagens: {e}")
-            return [], None
+            return images, links_file_path
     
-    def create_order(self, selected_images):
+    @traced("search.ordered")
+    def search_and_order(self, json_path, start_date, end_date, cloud_cover, cancel_token=None, on_result=None,
+                         resume=True, precheck=False, use_saved_searches=False, template_name=DEFAULT_ORDER_TEMPLATE,
+                         delivery_options=None, select=True, on_order=None):
+        """
+        Busca imagens e cria as ordens de cada área assim que a sua busca termina
+        
+        As cenas de cada geometria buscada passam pela seleção (se select=True) e a
+        ordem da área é enviada por um OrderSubmitter enquanto a busca continua.
+        Áreas concluídas em uma execução anterior (retomada pelo diário) não geram
+        novas ordens.
+        
+        Args:
+            json_path (str): Caminho do arquivo GeoJSON
+            start_date (str): Data de início da busca
+            end_date (str): Data de fim da busca
+            cloud_cover (float): Cobertura máxima de nuvens (0-1)
+            cancel_token (CancellationToken, optional): Token de cancelamento cooperativo
+            on_result (callable, optional): Chamado com as cenas novas de cada área (ver search_images)
+            resume (bool, optional): Retomar a busca a partir do diário. Default: True
+            precheck (bool, optional): Pré-verificação com o endpoint stats. Default: False
+            use_saved_searches (bool, optional): Usar buscas salvas no servidor. Default: False
+            template_name (str, optional): Nome do modelo de ordem. Default: DEFAULT_ORDER_TEMPLATE
+            delivery_options (dict, optional): Opções de entrega do job (ver create_order)
+            select (bool, optional): Se True, ordena apenas as cenas escolhidas pela seleção
+                                     de cenas; se False, todas as cenas da área. Default: True
+            on_order (callable, optional): Chamado como on_order(ordem) a cada ordem criada
+        
+        Returns:
+            tuple: (list de imagens, str arquivo de links, dict resumo das ordens ou None)
+        """
+        if not self.api_handler:
+            logger.error("API nao inicializada")
+            return None, None, None
+        
+        template = self.order_templates.get(template_name)
+        if template is None:
+            logger.error(f"Modelo de ordem desconhecido: {template_name}")
+            return None, None, None
+        
+        try:
+            if delivery_options:
+                template = template.with_options(**delivery_options)
+            geojson = self.file_manager.load_aois(json_path)
+            aois = dict(named_geometries_from_geojson(geojson) or [])
+            plot_index = self._load_plot_index(json_path, geojson) if select else None
+        except Exception as e:
+            logger.error(f"Erro ao preparar a criacao de ordens: {e}")
+            return None, None, None
+        
+        submitter = OrderSubmitter(
+            self.api_handler, template, links_dir=self.file_manager.links_dir,
+            cancel_token=cancel_token, on_order=on_order, ledger=self.order_ledger
+        )
+        
+        def order_batch(batch, results_by_id):
+            # As áreas do lote compartilham a mesma geometria: uma única ordem, com o nome da primeira
+            area_name = batch["area_names"][0]
+            try:
+                records = [results_by_id[image_id] for image_id in batch["matched_ids"] if image_id in results_by_id]
+                if records and plot_index is not None:
+                    records = select_scenes(records, plot_index, area_names=batch["area_names"])
+            except Exception as e:
+                logger.error(f"Erro ao selecionar as cenas da area {area_name}: {e}")
+                return
+            submitter.submit(area_name, [record["id"] for record in records], aois.get(area_name))
+        
+        try:
+            images, links_file_path = self.search_images(
+                json_path, start_date, end_date, cloud_cover, cancel_token=cancel_token, on_result=on_result,
+                resume=resume, precheck=precheck, use_saved_searches=use_saved_searches, on_batch=order_batch
+            )
+        finally:
+            order = submitter.close()
+        return images, links_file_path, order
+    
+    @traced("search.sharded")
+    def search_images_sharded(self, json_path, start_date, end_date, cloud_cover, shards=None,
+                              cancel_token=None, on_result=None, resume=True, precheck=False,
+                              use_saved_searches=False):
+        """
+        Busca imagens dividindo as áreas em partições executadas por processos separados
+        
+        As partições ficam em um diretório de job (output/jobs) e cada processo
+        registra as áreas concluídas no diário da sua partição; ao final, os
+        diários são reunidos em um único catálogo e um único arquivo de links.
+        Todas as partições consomem o mesmo limite de taxa compartilhado.
+        
+        Args:
+            json_path (str): Caminho do arquivo de áreas
+            start_date (str): Data de início da busca
+            end_date (str): Data de fim da busca
+            cloud_cover (float): Cobertura máxima de nuvens (0-1)
+            shards (int, optional): Número de partições/processos. Default: número de CPUs
+            cancel_token (CancellationToken, optional): Token de cancelamento cooperativo
+            on_result (callable, optional): Chamado como on_result(imagens) a cada partição concluída
+            resume (bool, optional): Se False, descarta o job anterior com os mesmos parâmetros. Default: True
+            precheck (bool, optional): Pré-verificação com o endpoint stats. Default: False
+            use_saved_searches (bool, optional): Usar buscas salvas no servidor. Default: False
+        
+        Returns:
+            tuple: (list de imagens encontradas, str caminho do arquivo de links)
+        """
+        if not self.api_handler:
+            logger.error("API nao inicializada")
+            return None, None
+        
+        shards = shards or os.cpu_count() or 1
+        results_by_id = {}
+        links_file_path = None
+        try:
+            aois = self.file_manager.load_aois(json_path)
+            job_dir = job_dir_for(self.file_manager.jobs_dir, json_path, start_date, end_date, cloud_cover, shards)
+            if not resume and os.path.exists(job_dir):
+                shutil.rmtree(job_dir)
+            manifest = prepare_job(
+                job_dir, aois, start_date, end_date, cloud_cover, shards,
+                precheck=precheck, use_saved_searches=use_saved_searches, aoi_path=json_path
+            )
+            
+            stop_token = StopFileToken(job_dir)
+            stop_token.clear()
+            
+            # Cada partição configura o próprio logging (a fila de logging não atravessa processos)
+            with ProcessPoolExecutor(
+                max_workers=manifest["shards"], initializer=setup_worker_logging, initargs=(log_file_path(),)
+            ) as executor:
+                futures = {
+                    executor.submit(run_shard, self.api_handler.api_key, job_dir, index): index
+                    for index in range(manifest["shards"])
+                }
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    if cancel_token and cancel_token.is_cancelled() and not stop_token.is_cancelled():
+                        logger.info("Busca cancelada pelo usuario; aguardando as particoes pararem")
+                        stop_token.cancel()
+                    
+                    for future in done:
+                        index = futures[future]
+                        try:
+                            future.result()
+                        except Exception as e:
+                            logger.error(f"Erro na particao {index}: {e}")
+                        
+                        # O diário guarda o que a partição concluiu, mesmo se ela falhou ou foi cancelada
+                        new_records = merge_shard_results(job_dir, [index], manifest, results_by_id)
+                        if on_result and new_records:
+                            on_result(new_records)
+            
+            images = list(results_by_id.values())
+            links = [record["download_link"] for record in images if record.get("download_link")]
+            links_file_path = self.file_manager.save_links(links)
+            self.file_manager.save_json(images, f"catalog_{os.path.basename(job_dir)}.json")
+            
+            logger.info(f"Busca particionada finalizada. Encontradas {len(images)} imagens")
+            return images, links_file_path
+        except Exception as e:
+            logger.error(f"Erro na busca particionada: {e}")
+            return list(results_by_id.values()), links_file_path
+    
+    def _load_plot_index(self, json_path, geojson):
+        """
+        Obtém o índice espacial dos talhões de um arquivo de áreas
+        
+        Args:
+            json_path (str): Caminho do arquivo de áreas
+            geojson (dict): Conteúdo já carregado do arquivo
+        
+        Returns:
+            PlotIndex: Índice dos talhões ou None se não foi possível construí-lo
+        """
+        try:
+            named_geometries = named_geometries_from_geojson(geojson)
+            if not named_geometries:
+                return None
+            return PlotIndex.for_aoi_file(json_path, dict(named_geometries))
+        except Exception as e:
+            logger.warning(f"Indice espacial indisponivel: {e}")
+            return None
+    
+    @traced("search.select")
+    def select_best_scenes(self, images, json_path, window_days=DEFAULT_WINDOW_DAYS):
+        """
+        Seleciona o menor conjunto de cenas que cobre cada talhão em cada janela de tempo
+        
+        Args:
+            images (list): Imagens retornadas por search_images
+            json_path (str): Caminho do arquivo de áreas usado na busca
+            window_days (int, optional): Tamanho da janela de tempo em dias. Default: DEFAULT_WINDOW_DAYS
+        
+        Returns:
+            list: Imagens selecionadas (subconjunto de images) ou lista vazia se houve erro
+        """
+        try:
+            plot_index = self._load_plot_index(json_path, self.file_manager.load_aois(json_path))
+            if plot_index is None:
+                return []
+            return select_scenes(images, plot_index, window_days=window_days)
+        except Exception as e:
+            logger.error(f"Erro ao selecionar cenas: {e}")
+            return []
+    
+    @traced("order.run")
+    def create_order(self, selected_images, json_path=None, template_name=DEFAULT_ORDER_TEMPLATE,
+                     delivery_options=None):
         """
         Cria uma ordem para as imagens selecionadas
         
         Args:
             selected_images (list): Lista de dicionários com informações das imagens
-            
+            json_path (str, optional): Arquivo de áreas da busca; as ordens são recortadas
+                                       na geometria de cada área
+            template_name (str, optional): Nome do modelo de ordem. Default: DEFAULT_ORDER_TEMPLATE
+            delivery_options (dict, optional): Opções de entrega do job, aplicadas sobre o modelo
+                                               ({"bands", "pixel_type", "file_format", "composite"},
+                                               ver OrderTemplate.with_options)
+        
         Returns:
             dict: Informações da ordem criada ou None se houve erro
         """
@@ -116,24 +411,68 @@ class PlanetApp:
             logger.error("API nao inicializada")
             return None
         
+        template = self.order_templates.get(template_name)
+        if template is None:
+            logger.error(f"Modelo de ordem desconhecido: {template_name}")
+            return None
+        
         try:
-            image_ids = [img["id"] for img in selected_images]
-            order = self.api_handler.create_order(image_ids)
+            if delivery_options:
+                template = template.with_options(**delivery_options)
+            
+            aois = None
+            geojson = self.file_manager.load_aois(json_path) if json_path else None
+            if geojson:
+                aois = dict(named_geometries_from_geojson(geojson) or [])
+            
+            # O manipulador da API agrupa as imagens por área, por isso recebe os registros completos
+            order = self.api_handler.create_order(
+                selected_images, template=template, aois=aois, links_dir=self.file_manager.links_dir,
+                ledger=self.order_ledger
+            )
             return order
         except Exception as e:
             logger.error(f"Erro ao criar ordem: {e}")
             return None
     
-    def download_images(self, links_file=None):
+    def refresh_order_states(self):
+        """
+        Atualiza no registro de ordens o estado das ordens ainda não concluídas
+        
+        Returns:
+            list: Registros atualizados das ordens consultadas ou None se a API não foi inicializada
+        """
+        if not self.api_handler:
+            logger.error("API nao inicializada")
+            return None
+        
+        refreshed = []
+        for record in self.order_ledger.pending():
+            state = self.api_handler.get_order_state(record["order_id"])
+            if state:
+                self.order_ledger.update_state(record["order_id"], state)
+            refreshed.append(self.order_ledger.get(record["order_id"]))
+        logger.info(f"Estado de {len(refreshed)} ordens pendentes atualizado")
+        return refreshed
+    
+    @traced("download.run")
+    def download_images(self, links_file=None, cancel_token=None, progress=None, asset_type=DEFAULT_ASSET_TYPE):
         """
         Baixa imagens a partir de um arquivo de links
         
         Args:
             links_file (str, optional): Caminho do arquivo de links.
                                        Se None, abre diálogo para seleção
-            
+            cancel_token (CancellationToken, optional): Token consultado entre os arquivos
+            progress (ProgressTracker, optional): Rastreador atualizado com bytes e arquivos concluídos;
+                                                  o total de arquivos cresce à medida que os links são lidos
+            asset_type (str, optional): Asset baixado quando o link é uma listagem de assets da busca.
+                                        Default: DEFAULT_ASSET_TYPE
+        
         Returns:
-            list: Lista de caminhos das imagens baixadas ou None se houve erro
+            dict: {"downloaded": arquivos baixados, "failed": arquivos que falharam}, ou None se a
+                  API não foi inicializada. Os caminhos dos arquivos baixados são entregues ao
+                  rastreador de progresso (ProgressTracker.file_done) à medida que terminam
         """
         if not self.api_handler:
             logger.error("API nao inicializada")
@@ -144,22 +483,79 @@ class PlanetApp:
             if not links_file:
                 return None
         
-        try:
-            # Carregar links
-            with open(links_file, 'r') as f:
-                links = [line.strip() for line in f.readlines()]
-            
-            # Baixar cada imagem
-            downloaded_files = []
-            for i, link in enumerate(links):
+        # Links lidos sob demanda e entregues a um número fixo de threads por uma
+        # fila limitada: a memória não depende do tamanho do arquivo de links e o
+        # primeiro download começa assim que a primeira linha é lida. Listagens de
+        # assets (links salvos pela busca) passam antes pelo estágio de ativação,
+        # que entrega o "location" de cada asset à fila de download quando fica ativo
+        work_queue = queue.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+        counts = {"downloaded": 0, "failed": 0}
+        results_lock = threading.Lock()
+        
+        def worker():
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    return
+                
+                # Após o cancelamento a fila é apenas esvaziada
+                if cancel_token and cancel_token.is_cancelled():
+                    continue
+                
+                i, link = item
                 output_path = os.path.join(
                     self.file_manager.images_dir, 
                     f"planet_image_{i}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.tif"
                 )
-                downloaded_file = self.api_handler.download_image(link, output_path)
-                downloaded_files.append(downloaded_file)
-            
-            return downloaded_files
+                try:
+                    downloaded_file = self.api_handler.download_image(link, output_path, progress=progress)
+                except Exception as e:
+                    logger.error(f"Erro ao baixar {link}: {e}")
+                    downloaded_file = None
+                
+                record_result(downloaded_file)
+        
+        def record_result(downloaded_file):
+            with results_lock:
+                counts["downloaded" if downloaded_file is not None else "failed"] += 1
+            if progress:
+                progress.file_done(downloaded_file, success=downloaded_file is not None)
+        
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(DOWNLOAD_WORKERS)]
+        for thread in workers:
+            thread.start()
+        
+        activator = None
+        try:
+            for i, link in enumerate(self.file_manager.iter_links(links_file)):
+                if cancel_token and cancel_token.is_cancelled():
+                    logger.info("Download cancelado pelo usuario")
+                    break
+                if progress:
+                    progress.add_files_total(1)
+                
+                if not is_asset_listing(link):
+                    work_queue.put((i, link))
+                    continue
+                
+                if activator is None:
+                    activator = AssetActivator(
+                        self.api_handler,
+                        on_ready=lambda item_id, location: work_queue.put((item_id, location)),
+                        on_failed=lambda item_id: record_result(None),
+                        asset_type=asset_type,
+                        cancel_token=cancel_token
+                    )
+                activator.submit(i, link)
         except Exception as e:
-            logger.error(f"Erro ao baixar imagens: {e}")
-            return []
\ No newline at end of file
+            logger.error(f"Erro ao ler o arquivo de links: {e}")
+        finally:
+            if activator is not None:
+                activator.close()
+            for _ in workers:
+                work_queue.put(None)
+            for thread in workers:
+                thread.join()
+        
+        logger.info(f"Download finalizado: {counts['downloaded']} arquivos baixados, {counts['failed']} com erro")
+        return counts
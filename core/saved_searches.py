@@ -0,0 +1,123 @@
+"""
+Registro das buscas salvas (Data API "searches") de um arquivo de áreas.
+"""
+
+import os
+from planet_app.utils import serialization
+from planet_app.utils.file_lock import locked_path, atomic_write
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("SavedSearchStore")
+
+
+class SavedSearchStore:
+    """
+    Guarda os IDs das buscas salvas criadas para as geometrias de um arquivo de áreas.
+    
+    Cada busca salva corresponde a uma geometria única (chave canônica de
+    deduplicate_geometries) e a uma cobertura máxima de nuvens; o período é
+    aplicado ao paginar os resultados, de modo que a mesma busca salva atende
+    a execuções com datas diferentes (períodos recentes; ver
+    PlanetAPIHandler.SAVED_SEARCH_MAX_AGE_DAYS). O registro é gravado ao lado do arquivo
+    de áreas; as alterações são feitas sob uma trava de arquivo e gravadas de
+    forma atômica, pois várias partições de uma busca podem alterá-lo ao mesmo
+    tempo.
+    """
+    
+    # Sufixo do arquivo gravado ao lado do arquivo de áreas
+    STORE_SUFFIX = ".searches.json"
+    
+    def __init__(self, file_path):
+        """
+        Inicializa o registro
+        
+        Args:
+            file_path (str): Caminho do arquivo do registro
+        """
+        self.file_path = file_path
+        self.searches = self._read()
+    
+    def _read(self):
+        """Lê o registro gravado em disco"""
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            return serialization.load(self.file_path)
+        except Exception as e:
+            logger.warning(f"Registro de buscas salvas invalido, ignorando: {e}")
+            return {}
+    
+    @classmethod
+    def for_aoi_file(cls, aoi_path):
+        """
+        Abre o registro associado a um arquivo de áreas
+        
+        Args:
+            aoi_path (str): Caminho do arquivo de áreas
+        
+        Returns:
+            SavedSearchStore: Registro das buscas salvas
+        """
+        return cls(os.path.splitext(aoi_path)[0] + cls.STORE_SUFFIX)
+    
+    @staticmethod
+    def _entry_key(geometry_key, cloud_cover):
+        return f"{geometry_key}:{round(float(cloud_cover), 4)}"
+    
+    def get(self, geometry_key, cloud_cover):
+        """
+        Retorna o ID da busca salva de uma geometria
+        
+        Args:
+            geometry_key (str): Chave canônica da geometria
+            cloud_cover (float): Cobertura máxima de nuvens
+        
+        Returns:
+            str: ID da busca salva ou None se ainda não foi criada
+        """
+        return self.searches.get(self._entry_key(geometry_key, cloud_cover))
+    
+    def set(self, geometry_key, cloud_cover, search_id):
+        """
+        Registra a busca salva de uma geometria e grava o registro
+        
+        Args:
+            geometry_key (str): Chave canônica da geometria
+            cloud_cover (float): Cobertura máxima de nuvens
+            search_id (str): ID da busca salva
+        """
+        self._update(self._entry_key(geometry_key, cloud_cover), search_id)
+    
+    def discard(self, geometry_key, cloud_cover):
+        """
+        Remove a busca salva de uma geometria (ex: apagada no servidor)
+        
+        Args:
+            geometry_key (str): Chave canônica da geometria
+            cloud_cover (float): Cobertura máxima de nuvens
+        """
+        self._update(self._entry_key(geometry_key, cloud_cover), None)
+    
+    def _update(self, entry_key, search_id):
+        """
+        Altera uma entrada do registro em disco, preservando as gravadas por outros processos
+        
+        Args:
+            entry_key (str): Chave da entrada
+            search_id (str): ID da busca salva ou None para remover a entrada
+        """
+        try:
+            with locked_path(self.file_path):
+                searches = self._read()
+                if search_id is None:
+                    searches.pop(entry_key, None)
+                else:
+                    searches[entry_key] = search_id
+                atomic_write(self.file_path, serialization.dumps(searches, pretty=True))
+                self.searches = searches
+        except Exception as e:
+            logger.warning(f"Nao foi possivel salvar o registro de buscas salvas: {e}")
+            if search_id is None:
+                self.searches.pop(entry_key, None)
+            else:
+                self.searches[entry_key] = search_id
@@ -0,0 +1,188 @@
+"""
+Pontuação de cenas por talhão e seleção do menor conjunto de cenas que cobre cada talhão.
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("SceneSelection")
+
+# Pesos da qualidade da cena (somam 1): cobertura de nuvens e resolução (GSD)
+DEFAULT_WEIGHTS = {"cloud": 0.75, "gsd": 0.25}
+
+# Parâmetros padrão da seleção
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_TARGET_COVERAGE = 0.98
+DEFAULT_MIN_GAIN = 0.01
+
+
+def scene_quality(results, weights=None):
+    """
+    Calcula a qualidade de cada cena a partir da cobertura de nuvens e do GSD
+    
+    Args:
+        results (list): Registros de _process_image_result
+        weights (dict, optional): Pesos {"cloud": float, "gsd": float}. Default: DEFAULT_WEIGHTS
+    
+    Returns:
+        numpy.ndarray: Qualidade de cada cena, entre 0 e 1
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    cloud = np.array([float(r.get("cloud_cover") or 0.0) for r in results])
+    gsd = np.array([float(r.get("gsd") or 0.0) for r in results])
+    
+    # Menor GSD (melhor resolução) recebe nota 1; GSD desconhecido recebe a nota da pior cena
+    valid_gsd = gsd[gsd > 0]
+    if len(valid_gsd):
+        gsd = np.where(gsd > 0, gsd, valid_gsd.max())
+        gsd_score = valid_gsd.min() / gsd
+    else:
+        gsd_score = np.ones(len(results))
+    
+    return weights["cloud"] * (1.0 - np.clip(cloud, 0.0, 1.0)) + weights["gsd"] * gsd_score
+
+
+def score_scenes(results, weights=None):
+    """
+    Atribui a cada registro a nota "score" = cobertura do talhão x qualidade da cena
+    
+    Requer o campo "coverage" (ver PlotIndex.annotate_results).
+    
+    Args:
+        results (list): Registros de _process_image_result
+        weights (dict, optional): Pesos da qualidade. Default: DEFAULT_WEIGHTS
+    
+    Returns:
+        numpy.ndarray: Notas calculadas, na ordem dos registros
+    """
+    if not results:
+        return np.zeros(0)
+    coverage = np.array([float(r.get("coverage") or 0.0) for r in results])
+    scores = coverage * scene_quality(results, weights)
+    for record, score in zip(results, scores):
+        record["score"] = float(score)
+    return scores
+
+
+def _time_windows(results, window_days):
+    """
+    Calcula o índice da janela de tempo de cada registro
+    
+    Args:
+        results (list): Registros com o campo "date" (ISO)
+        window_days (int): Tamanho da janela em dias
+    
+    Returns:
+        numpy.ndarray: Índice da janela de cada registro (0 para datas inválidas)
+    """
+    dates = pd.to_datetime([r.get("date") for r in results], utc=True, errors="coerce")
+    if dates.isna().all():
+        return np.zeros(len(results), dtype=int)
+    days = (dates - dates.min()).days.to_numpy(dtype=float, na_value=0)
+    return (days // window_days).astype(int)
+
+
+def _greedy_cover(plot, parts, quality, target_coverage, min_gain):
+    """
+    Escolhe, de forma gulosa, as cenas que mais acrescentam área ponderada pela qualidade
+    
+    Args:
+        plot (shapely.Geometry): Geometria do talhão
+        parts (numpy.ndarray): Interseção de cada cena candidata com o talhão
+        quality (numpy.ndarray): Qualidade de cada cena candidata
+        target_coverage (float): Fração do talhão a partir da qual a seleção para
+        min_gain (float): Ganho mínimo de cobertura para incluir uma cena
+    
+    Returns:
+        tuple: (lista de posições escolhidas, fração do talhão coberta)
+    """
+    plot_area = plot.area
+    if plot_area <= 0:
+        return [], 0.0
+    
+    chosen = []
+    covered = shapely.Polygon()
+    available = np.ones(len(parts), dtype=bool)
+    covered_fraction = 0.0
+    
+    while covered_fraction < target_coverage and available.any():
+        gains = np.zeros(len(parts))
+        gains[available] = shapely.area(shapely.difference(parts[available], covered)) / plot_area
+        best = int(np.argmax(np.where(available, gains * quality, -1.0)))
+        if gains[best] < min_gain:
+            break
+        chosen.append(best)
+        available[best] = False
+        covered = shapely.union(covered, parts[best])
+        covered_fraction = min(covered.area / plot_area, 1.0)
+    
+    return chosen, covered_fraction
+
+
+def select_scenes(results, plot_index, window_days=DEFAULT_WINDOW_DAYS, target_coverage=DEFAULT_TARGET_COVERAGE,
+                  min_gain=DEFAULT_MIN_GAIN, weights=None, area_names=None):
+    """
+    Seleciona, para cada talhão e janela de tempo, o menor conjunto de cenas que cobre o talhão
+    
+    As cenas são pontuadas pela cobertura do talhão, cobertura de nuvens e GSD;
+    dentro de cada grupo (talhão, janela) a seleção é gulosa: a cada passo entra a
+    cena com maior área nova x qualidade, até atingir target_coverage ou até
+    nenhuma cena acrescentar pelo menos min_gain do talhão.
+    
+    Args:
+        results (list): Registros de _process_image_result com "footprint"
+        plot_index (PlotIndex): Índice dos talhões
+        window_days (int, optional): Tamanho da janela de tempo em dias. Default: DEFAULT_WINDOW_DAYS
+        target_coverage (float, optional): Cobertura desejada de cada talhão. Default: DEFAULT_TARGET_COVERAGE
+        min_gain (float, optional): Ganho mínimo para incluir uma cena. Default: DEFAULT_MIN_GAIN
+        weights (dict, optional): Pesos da qualidade. Default: DEFAULT_WEIGHTS
+        area_names (list, optional): Restringe a seleção a estes talhões. Default: todos
+    
+    Returns:
+        list: Registros selecionados (cada um com "score", "selected" e "window")
+    """
+    if not results:
+        return []
+    
+    if any("coverage" not in r for r in results):
+        plot_index.annotate_results(results)
+    score_scenes(results, weights)
+    quality = scene_quality(results, weights)
+    windows = _time_windows(results, window_days)
+    
+    # Uma cena encontrada em várias áreas concorre em cada uma delas
+    groups = {}
+    for position, (record, window) in enumerate(zip(results, windows)):
+        record["window"] = int(window)
+        record["selected"] = False
+        if not record.get("footprint"):
+            continue
+        for area_name in record.get("area_names") or [record.get("area_name")]:
+            if area_names is not None and area_name not in area_names:
+                continue
+            if plot_index.has_plot(area_name):
+                groups.setdefault((area_name, int(window)), []).append(position)
+    
+    selected = []
+    for (area_name, window), positions in groups.items():
+        plot = plot_index.geometry_for(area_name)
+        footprints = np.array([shape(results[p]["footprint"]) for p in positions], dtype=object)
+        parts = shapely.intersection(footprints, plot)
+        
+        chosen, covered_fraction = _greedy_cover(
+            plot, parts, quality[positions], target_coverage, min_gain
+        )
+        for c in chosen:
+            record = results[positions[c]]
+            if not record["selected"]:
+                record["selected"] = True
+                selected.append(record)
+        
+        if covered_fraction < target_coverage:
+            logger.info(f"Talhao {area_name} (janela {window}) coberto em {covered_fraction:.1%}")
+    
+    logger.info(f"Selecao de cenas: {len(selected)} de {len(results)} registros em {len(groups)} grupos talhao/janela")
+    return selected
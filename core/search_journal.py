@@ -0,0 +1,161 @@
+"""
+Diário (JSONL) de buscas, usado para retomar buscas interrompidas.
+"""
+
+import os
+import hashlib
+import datetime
+from planet_app.utils import serialization
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("SearchJournal")
+
+
+class SearchJournalState:
+    """Estado reconstruído a partir de um diário de busca"""
+    
+    def __init__(self):
+        self.completed_keys = set()
+        self.results_by_id = {}
+        self.links = []
+        self.complete = False
+    
+    @property
+    def images(self):
+        """Lista das cenas já encontradas, na ordem em que foram registradas"""
+        return list(self.results_by_id.values())
+
+
+class SearchJournal:
+    """
+    Diário de uma busca, com uma linha JSON por área concluída.
+    
+    Cada linha registra a chave da geometria buscada, as cenas novas e os links
+    daquela área, além dos IDs de todas as cenas encontradas nela. Ao retomar,
+    as áreas já registradas são puladas e seus resultados são recarregados do
+    diário. Uma linha final marca a busca como concluída.
+    """
+    
+    def __init__(self, file_path, params=None):
+        """
+        Inicializa o diário
+        
+        Args:
+            file_path (str): Caminho do arquivo JSONL
+            params (dict, optional): Parâmetros da busca, gravados no cabeçalho
+        """
+        self.file_path = file_path
+        self.params = params or {}
+    
+    @classmethod
+    def for_search(cls, journals_dir, json_path, start_date, end_date, cloud_cover):
+        """
+        Cria o diário associado a um arquivo de áreas e a um conjunto de parâmetros
+        
+        Args:
+            journals_dir (str): Diretório dos diários
+            json_path (str): Caminho do arquivo de áreas
+            start_date (str): Data de início da busca
+            end_date (str): Data de fim da busca
+            cloud_cover (float): Cobertura máxima de nuvens
+        
+        Returns:
+            SearchJournal: Diário da busca (o mesmo arquivo para os mesmos parâmetros)
+        """
+        params = {
+            "aoi_path": os.path.abspath(json_path),
+            "start_date": start_date,
+            "end_date": end_date,
+            "cloud_cover": round(float(cloud_cover), 4)
+        }
+        digest = hashlib.sha1(serialization.dumps(params)).hexdigest()[:16]
+        base_name = os.path.splitext(os.path.basename(json_path))[0]
+        return cls(os.path.join(journals_dir, f"search_{base_name}_{digest}.jsonl"), params)
+    
+    def _write(self, entry):
+        """Acrescenta uma linha ao diário e força a gravação em disco"""
+        with open(self.file_path, 'ab') as f:
+            f.write(serialization.dumps(entry) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def reset(self):
+        """
+        Descarta o diário existente e começa um novo
+        
+        Returns:
+            SearchJournalState: Estado vazio
+        """
+        with open(self.file_path, 'wb'):
+            pass
+        self._write({
+            "type": "header",
+            "params": self.params,
+            "created_at": datetime.datetime.now().isoformat()
+        })
+        return SearchJournalState()
+    
+    def load(self):
+        """
+        Reconstrói o estado a partir do diário (ou cria um novo diário, se não existir)
+        
+        Linhas incompletas (ex: gravação interrompida por uma queda) são ignoradas.
+        
+        Returns:
+            SearchJournalState: Áreas concluídas, cenas e links já registrados
+        """
+        if not os.path.exists(self.file_path):
+            return self.reset()
+        
+        state = SearchJournalState()
+        with open(self.file_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = serialization.loads(line)
+                except ValueError:
+                    logger.warning(f"Linha invalida ignorada no diario: {self.file_path}")
+                    continue
+                
+                entry_type = entry.get("type")
+                if entry_type == "area":
+                    state.completed_keys.add(entry["key"])
+                    for record in entry.get("images", []):
+                        state.results_by_id.setdefault(record["id"], record)
+                    state.links.extend(entry.get("links", []))
+                    
+                    # Atualizar as áreas das cenas já encontradas em áreas anteriores
+                    for img_id in entry.get("matched_ids", []):
+                        record = state.results_by_id.get(img_id)
+                        if record is None:
+                            continue
+                        for name in entry.get("area_names", []):
+                            if name not in record.setdefault("area_names", []):
+                                record["area_names"].append(name)
+                elif entry_type == "complete":
+                    state.complete = True
+        
+        logger.info(
+            f"Diario de busca carregado: {len(state.completed_keys)} areas concluidas, "
+            f"{len(state.results_by_id)} cenas"
+        )
+        return state
+    
+    def append(self, batch):
+        """
+        Registra uma área concluída
+        
+        Args:
+            batch (dict): Lote entregue por PlanetAPIHandler.iter_search_images
+        """
+        self._write({
+            "type": "area",
+            "key": batch["key"],
+            "area_names": batch["area_names"],
+            "images": batch["images"],
+            "links": batch["links"],
+            "matched_ids": batch.get("matched_ids", [])
+        })
+    
+    def mark_complete(self):
+        """Registra que todas as áreas foram buscadas"""
+        self._write({"type": "complete", "finished_at": datetime.datetime.now().isoformat()})
@@ -0,0 +1,284 @@
+"""
+Busca de imagens dividida em partições executadas por processos independentes.
+
+Cada busca particionada tem um diretório de job (output/jobs/<nome>) com:
+
+    job.json              parâmetros da busca e número de partições
+    shard_<n>.json        áreas da partição n
+    shard_<n>.journal.jsonl  diário de busca da partição (ver SearchJournal)
+    STOP                  criado para pedir que os processos parem
+
+Os processos locais são iniciados por PlanetApp.search_images_sharded, mas
+qualquer máquina com acesso ao diretório pode executar uma partição com:
+
+    python -m planet_app.core.sharded_search <diretorio_do_job> <n>
+
+(a chave de API é lida de PL_API_KEY). Como cada partição grava no seu próprio
+diário, partições interrompidas são retomadas e o resultado final é obtido
+juntando os diários. O ritmo das requisições de todas as partições é
+controlado pelo limite de taxa compartilhado (ver utils.rate_limit).
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import geopandas as gpd
+from shapely.geometry import shape
+from planet_app.core.api_handler import PlanetAPIHandler
+from planet_app.core.geometry_utils import deduplicate_geometries, named_geometries_from_geojson
+from planet_app.core.search_journal import SearchJournal
+from planet_app.core.saved_searches import SavedSearchStore
+from planet_app.core.spatial_index import PlotIndex
+from planet_app.utils import serialization
+from planet_app.utils.logging_config import get_logger, setup_worker_logging
+
+logger = get_logger("ShardedSearch")
+
+JOB_MANIFEST = "job.json"
+STOP_FILE = "STOP"
+
+
+class StopFileToken:
+    """
+    Token de cancelamento baseado em arquivo, visível para todos os processos
+    (e máquinas) que compartilham o diretório do job
+    """
+    
+    def __init__(self, job_dir):
+        self.stop_path = os.path.join(job_dir, STOP_FILE)
+    
+    def cancel(self):
+        with open(self.stop_path, 'w'):
+            pass
+    
+    def clear(self):
+        if os.path.exists(self.stop_path):
+            os.remove(self.stop_path)
+    
+    def is_cancelled(self):
+        return os.path.exists(self.stop_path)
+
+
+def partition_aois(aois, shards):
+    """
+    Divide as áreas em partições espacialmente contíguas
+    
+    Áreas com a mesma geometria canônica ficam na mesma partição (e continuam
+    sendo buscadas uma única vez); os grupos são ordenados pela curva de
+    Hilbert e divididos em blocos com número parecido de geometrias.
+    
+    Args:
+        aois (dict): Áreas processadas (dicionário {nome: geometria} ou FeatureCollection)
+        shards (int): Número de partições
+    
+    Returns:
+        list: Lista de dicionários {nome: geometria}, um por partição não vazia
+    """
+    named_geometries = named_geometries_from_geojson(aois)
+    if named_geometries is None:
+        raise ValueError("Formato de GeoJSON não reconhecido")
+    
+    groups = list(deduplicate_geometries(named_geometries).values())
+    if len(groups) > 1:
+        order = gpd.GeoSeries([shape(group["geometry"]) for group in groups]).hilbert_distance().to_numpy()
+        groups = [groups[i] for i in order.argsort(kind="stable")]
+    
+    geometries_by_name = dict(named_geometries)
+    shards = max(1, min(shards, len(groups)))
+    size, remainder = divmod(len(groups), shards)
+    
+    partitions = []
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < remainder else 0)
+        partition = {}
+        for group in groups[start:end]:
+            for name in group["names"]:
+                partition[name] = geometries_by_name[name]
+        if partition:
+            partitions.append(partition)
+        start = end
+    return partitions
+
+
+def job_dir_for(jobs_dir, json_path, start_date, end_date, cloud_cover, shards):
+    """
+    Retorna o diretório do job de uma busca (o mesmo para os mesmos parâmetros)
+    
+    Args:
+        jobs_dir (str): Diretório dos jobs
+        json_path (str): Caminho do arquivo de áreas
+        start_date (str): Data de início
+        end_date (str): Data de fim
+        cloud_cover (float): Cobertura máxima de nuvens
+        shards (int): Número de partições
+    
+    Returns:
+        str: Caminho do diretório do job
+    """
+    params = [os.path.abspath(json_path), start_date, end_date, round(float(cloud_cover), 4), shards]
+    digest = hashlib.sha1(serialization.dumps(params)).hexdigest()[:12]
+    base_name = os.path.splitext(os.path.basename(json_path))[0]
+    return os.path.join(jobs_dir, f"{base_name}_{digest}")
+
+
+def prepare_job(job_dir, aois, start_date, end_date, cloud_cover, shards, precheck=False,
+                use_saved_searches=False, aoi_path=None):
+    """
+    Cria o diretório do job com o manifesto e as áreas de cada partição
+    
+    Se o job já existir (mesmos parâmetros), as partições gravadas são mantidas,
+    de modo que os diários das partições continuam válidos.
+    
+    Args:
+        job_dir (str): Diretório do job
+        aois (dict): Áreas processadas
+        start_date (str): Data de início
+        end_date (str): Data de fim
+        cloud_cover (float): Cobertura máxima de nuvens
+        shards (int): Número de partições desejado
+        precheck (bool, optional): Pré-verificação com o endpoint stats. Default: False
+        use_saved_searches (bool, optional): Usar buscas salvas no servidor. Default: False
+        aoi_path (str, optional): Arquivo de áreas original (onde fica o registro de buscas salvas)
+    
+    Returns:
+        dict: Manifesto do job
+    """
+    manifest_path = os.path.join(job_dir, JOB_MANIFEST)
+    if os.path.exists(manifest_path):
+        return serialization.load(manifest_path)
+    
+    os.makedirs(job_dir, exist_ok=True)
+    partitions = partition_aois(aois, shards)
+    for index, partition in enumerate(partitions):
+        serialization.dump(partition, os.path.join(job_dir, f"shard_{index}.json"))
+    
+    manifest = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "cloud_cover": cloud_cover,
+        "shards": len(partitions),
+        "precheck": precheck,
+        "use_saved_searches": use_saved_searches,
+        "aoi_path": os.path.abspath(aoi_path) if aoi_path else None
+    }
+    serialization.dump(manifest, manifest_path, pretty=True)
+    logger.info(f"Job de busca criado em {job_dir} com {len(partitions)} particoes")
+    return manifest
+
+
+def shard_journal(job_dir, index, manifest):
+    """
+    Retorna o diário de busca de uma partição
+    
+    Args:
+        job_dir (str): Diretório do job
+        index (int): Índice da partição
+        manifest (dict): Manifesto do job
+    
+    Returns:
+        SearchJournal: Diário da partição
+    """
+    params = {key: manifest[key] for key in ("start_date", "end_date", "cloud_cover")}
+    return SearchJournal(os.path.join(job_dir, f"shard_{index}.journal.jsonl"), params)
+
+
+def run_shard(api_key, job_dir, index):
+    """
+    Executa a busca de uma partição, registrando cada área concluída no seu diário
+    
+    Função de nível de módulo para poder ser executada em outro processo.
+    
+    Args:
+        api_key (str): Chave de API da Planet
+        job_dir (str): Diretório do job
+        index (int): Índice da partição
+    
+    Returns:
+        int: Índice da partição
+    """
+    manifest = serialization.load(os.path.join(job_dir, JOB_MANIFEST))
+    shard_path = os.path.join(job_dir, f"shard_{index}.json")
+    aois = serialization.load(shard_path)
+    journal = shard_journal(job_dir, index, manifest)
+    state = journal.load()
+    if state.complete:
+        return index
+    
+    # O registro de buscas salvas fica ao lado do arquivo de áreas original, e não
+    # no diretório do job, para ser reaproveitado por outros períodos e execuções
+    saved_searches = None
+    if manifest.get("use_saved_searches"):
+        saved_searches = SavedSearchStore.for_aoi_file(manifest.get("aoi_path") or shard_path)
+    
+    handler = PlanetAPIHandler(api_key)
+    stop_token = StopFileToken(job_dir)
+    for batch in handler.iter_search_images(
+        aois, manifest["start_date"], manifest["end_date"], manifest["cloud_cover"],
+        cancel_token=stop_token, plot_index=PlotIndex.from_aois(aois),
+        completed_keys=state.completed_keys, known_results=state.results_by_id,
+        precheck=manifest.get("precheck", False),
+        saved_searches=saved_searches
+    ):
+        journal.append(batch)
+    
+    if not stop_token.is_cancelled():
+        journal.mark_complete()
+        logger.info(f"Particao {index} concluida")
+    return index
+
+
+def merge_shard_results(job_dir, indices, manifest, results_by_id):
+    """
+    Junta os resultados de partições ao catálogo, sem duplicar cenas
+    
+    Uma cena encontrada em várias partições recebe a união das áreas e das
+    coberturas de talhões.
+    
+    Args:
+        job_dir (str): Diretório do job
+        indices (list): Índices das partições a juntar
+        manifest (dict): Manifesto do job
+        results_by_id (dict): Catálogo {id: registro}, atualizado no lugar
+    
+    Returns:
+        list: Registros novos no catálogo
+    """
+    new_records = []
+    for index in indices:
+        journal = shard_journal(job_dir, index, manifest)
+        if not os.path.exists(journal.file_path):
+            continue
+        for record in journal.load().images:
+            existing = results_by_id.get(record["id"])
+            if existing is None:
+                results_by_id[record["id"]] = record
+                new_records.append(record)
+                continue
+            for name in record.get("area_names", []):
+                if name not in existing.setdefault("area_names", []):
+                    existing["area_names"].append(name)
+            existing.setdefault("covered_areas", {}).update(record.get("covered_areas", {}))
+    return new_records
+
+
+def main(argv=None):
+    """Executa uma partição de um job a partir da linha de comando"""
+    arg_parser = argparse.ArgumentParser(description="Executa uma particao de uma busca do Planet App")
+    arg_parser.add_argument("job_dir", help="Diretorio do job (output/jobs/<nome>)")
+    arg_parser.add_argument("shard", type=int, help="Indice da particao")
+    args = arg_parser.parse_args(argv)
+    setup_worker_logging()
+    
+    api_key = os.environ.get("PL_API_KEY", "")
+    if not api_key:
+        logger.error("Defina a variavel de ambiente PL_API_KEY")
+        return 1
+    
+    run_shard(api_key, args.job_dir, args.shard)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Índice espacial dos talhões processados.
+"""
+
+import os
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import shape, box, Point
+from planet_app.core.geometry_utils import write_wkb_collection, read_wkb_collection
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("PlotIndex")
+
+
+class PlotIndex:
+    """
+    Índice STRtree sobre os talhões, usado para descobrir quais talhões cada
+    cena intersecta e qual fração de cada talhão a cena cobre.
+    
+    As consultas recebem arrays de geometrias e são resolvidas com uma única
+    chamada vetorizada ao STRtree, de modo que uma busca pode atender vários
+    talhões ao mesmo tempo.
+    """
+    
+    # Sufixo do arquivo do índice gravado ao lado do arquivo de áreas
+    INDEX_SUFFIX = ".index.wkb"
+    
+    def __init__(self, names, geometries):
+        """
+        Inicializa o índice
+        
+        Args:
+            names (list): Nomes dos talhões
+            geometries (list): Geometrias shapely dos talhões, na mesma ordem dos nomes
+        """
+        self.names = np.asarray(list(names), dtype=object)
+        self.geometries = np.asarray(list(geometries), dtype=object)
+        self.areas = shapely.area(self.geometries)
+        self.tree = STRtree(self.geometries)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def has_plot(self, name):
+        """Indica se o talhão existe no índice"""
+        return name in self._positions
+    
+    def geometry_for(self, name):
+        """
+        Retorna a geometria de um talhão
+        
+        Args:
+            name (str): Nome do talhão
+        
+        Returns:
+            shapely.Geometry: Geometria do talhão
+        """
+        return self.geometries[self._positions[name]]
+    
+    @classmethod
+    def from_aois(cls, aois):
+        """
+        Cria o índice a partir de um dicionário de áreas
+        
+        Args:
+            aois (dict): Dicionário {nome: geometria GeoJSON}
+        
+        Returns:
+            PlotIndex: Índice construído
+        """
+        return cls(aois.keys(), [shape(geometry) for geometry in aois.values()])
+    
+    @classmethod
+    def index_path_for(cls, aoi_path):
+        """
+        Retorna o caminho do arquivo de índice associado a um arquivo de áreas
+        
+        Args:
+            aoi_path (str): Caminho do arquivo de áreas
+        
+        Returns:
+            str: Caminho do arquivo de índice
+        """
+        return os.path.splitext(aoi_path)[0] + cls.INDEX_SUFFIX
+    
+    def save(self, file_path):
+        """
+        Grava as geometrias do índice em formato WKB
+        
+        Args:
+            file_path (str): Caminho do arquivo de índice
+        """
+        write_wkb_collection(file_path, dict(zip(self.names, self.geometries)))
+        logger.info(f"Indice espacial salvo: {file_path}")
+    
+    @classmethod
+    def load(cls, file_path):
+        """
+        Carrega um índice gravado com save()
+        
+        Args:
+            file_path (str): Caminho do arquivo de índice
+        
+        Returns:
+            PlotIndex: Índice carregado
+        """
+        plots = read_wkb_collection(file_path, as_geojson=False)
+        return cls(plots.keys(), plots.values())
+    
+    @classmethod
+    def for_aoi_file(cls, aoi_path, aois):
+        """
+        Carrega o índice salvo ao lado do arquivo de áreas ou, se ele não existir
+        ou estiver desatualizado, constrói e grava um novo
+        
+        Args:
+            aoi_path (str): Caminho do arquivo de áreas
+            aois (dict): Dicionário {nome: geometria GeoJSON} já carregado do arquivo
+        
+        Returns:
+            PlotIndex: Índice dos talhões
+        """
+        index_path = cls.index_path_for(aoi_path)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(aoi_path):
+            try:
+                return cls.load(index_path)
+            except Exception as e:
+                logger.warning(f"Indice espacial invalido, reconstruindo: {e}")
+        
+        index = cls.from_aois(aois)
+        try:
+            index.save(index_path)
+        except Exception as e:
+            logger.warning(f"Nao foi possivel salvar o indice espacial: {e}")
+        return index
+    
+    def query_footprints(self, footprints):
+        """
+        Calcula, em lote, os talhões intersectados por cada footprint
+        
+        Args:
+            footprints (numpy.ndarray): Array de geometrias shapely (ex: footprints de cenas)
+        
+        Returns:
+            tuple: (índices dos footprints, índices dos talhões, fração coberta de cada talhão),
+                   três arrays alinhados com um elemento por par que se intersecta
+        """
+        footprints = np.asarray(footprints, dtype=object)
+        footprint_idx, plot_idx = self.tree.query(footprints, predicate="intersects")
+        if len(plot_idx) == 0:
+            return footprint_idx, plot_idx, np.zeros(0)
+        
+        intersection_area = shapely.area(shapely.intersection(footprints[footprint_idx], self.geometries[plot_idx]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = np.where(self.areas[plot_idx] > 0, intersection_area / self.areas[plot_idx], 0.0)
+        return footprint_idx, plot_idx, np.clip(coverage, 0.0, 1.0)
+    
+    def query_bbox(self, bbox):
+        """
+        Retorna os talhões que intersectam um retângulo
+        
+        Args:
+            bbox (tuple): (minx, miny, maxx, maxy)
+        
+        Returns:
+            list: Nomes dos talhões
+        """
+        return list(self.names[np.sort(self.tree.query(box(*bbox), predicate="intersects"))])
+    
+    def query_point(self, x, y):
+        """
+        Retorna os talhões que contêm um ponto
+        
+        Args:
+            x (float): Longitude
+            y (float): Latitude
+        
+        Returns:
+            list: Nomes dos talhões
+        """
+        return list(self.names[np.sort(self.tree.query(Point(x, y), predicate="intersects"))])
+    
+    def annotate_results(self, results):
+        """
+        Acrescenta a cobertura dos talhões aos resultados da busca
+        
+        Cada registro recebe "coverage" (fração do seu talhão coberta pela cena) e
+        "covered_areas" ({talhão: fração coberta} para todos os talhões que a cena toca).
+        
+        Args:
+            results (list): Registros de _process_image_result com o campo "footprint"
+        
+        Returns:
+            list: Os mesmos registros, atualizados
+        """
+        with_footprint = [i for i, record in enumerate(results) if record.get("footprint")]
+        for record in results:
+            record["coverage"] = 0.0
+            record["covered_areas"] = {}
+        if not with_footprint:
+            return results
+        
+        footprints = [shape(results[i]["footprint"]) for i in with_footprint]
+        footprint_idx, plot_idx, coverage = self.query_footprints(footprints)
+        
+        for f_idx, p_idx, fraction in zip(footprint_idx, plot_idx, coverage):
+            record = results[with_footprint[f_idx]]
+            record["covered_areas"][self.names[p_idx]] = float(fraction)
+        
+        for i in with_footprint:
+            record = results[i]
+            record["coverage"] = record["covered_areas"].get(record.get("area_name"), 0.0)
+        
+        logger.info(f"Cobertura calculada para {len(with_footprint)} resultados ({len(plot_idx)} pares cena/talhao)")
+        return results
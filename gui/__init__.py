@@ -7,5 +7,7 @@ from planet_app.gui.config_tab import ConfigTab
 from planet_app.gui.shapefile_tab import ShapefileTab
 from planet_app.gui.search_tab import SearchTab
 from planet_app.gui.download_tab import DownloadTab
+from planet_app.gui.metrics_tab import MetricsTab
+from planet_app.gui.task_executor import TaskExecutor
 
-__all__ = ['PlanetAppGUI', 'ConfigTab', 'ShapefileTab', 'SearchTab', 'DownloadTab']
\ No newline at end of file
+__all__ = ['PlanetAppGUI', 'ConfigTab', 'ShapefileTab', 'SearchTab', 'DownloadTab', 'MetricsTab', 'TaskExecutor']
\ No newline at end of file
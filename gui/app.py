@@ -10,7 +10,10 @@ from planet_app.gui.config_tab import ConfigTab
 from planet_app.gui.shapefile_tab import ShapefileTab
 from planet_app.gui.search_tab import SearchTab
 from planet_app.gui.download_tab import DownloadTab
+from planet_app.gui.metrics_tab import MetricsTab
+from planet_app.gui.task_executor import TaskExecutor
 from planet_app.utils.logging_config import get_logger
+from planet_app.utils.tracing import finish_tracing
 
 logger = get_logger("GUI")
 
@@ -24,6 +27,10 @@ class PlanetAppGUI:
         self.planet_app = None
         self.file_manager = FileManager()
         
+        # Executor compartilhado para as tarefas em segundo plano das abas
+        self.task_executor = TaskExecutor(self.root, max_workers=3)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Configuração de estilo
         self.setup_styles()
         
@@ -63,12 +70,14 @@ class PlanetAppGUI:
         self.shapefile_tab = ShapefileTab(self.notebook, self)
         self.search_tab = SearchTab(self.notebook, self)
         self.download_tab = DownloadTab(self.notebook, self)
+        self.metrics_tab = MetricsTab(self.notebook, self)
         
         # Adicionar abas ao notebook
         self.notebook.add(self.config_tab.frame, text="Configuração")
         self.notebook.add(self.shapefile_tab.frame, text="Shapefile")
         self.notebook.add(self.search_tab.frame, text="Buscar Imagens")
         self.notebook.add(self.download_tab.frame, text="Download")
+        self.notebook.add(self.metrics_tab.frame, text="Métricas")
     
     def validate_api_key(self, api_key):
         """
@@ -99,6 +108,12 @@ class PlanetAppGUI:
             self.status_var.set("Erro na validação da chave API.")
             return False
     
+    def on_close(self):
+        """Cancela as tarefas em andamento, registra o resumo de desempenho e fecha a janela"""
+        self.task_executor.shutdown()
+        finish_tracing()
+        self.root.destroy()
+    
     def update_status(self, message):
         """
         Atualiza a mensagem na barra de status
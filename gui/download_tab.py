@@ -4,16 +4,18 @@ Aba de download de imagens da GUI do Planet App.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
-import os
-import datetime
 from planet_app.utils.logging_config import get_logger
+from planet_app.utils.progress import ProgressTracker, format_bytes, format_duration
+from planet_app.core.asset_activation import ASSET_TYPES, DEFAULT_ASSET_TYPE
 
 logger = get_logger("DownloadTab")
 
 class DownloadTab:
     """Aba de download de imagens da GUI"""
     
+    # Intervalo de amostragem do progresso (ms) - cerca de 5 atualizações por segundo
+    PROGRESS_REFRESH_MS = 200
+    
     def __init__(self, parent, main_app):
         """
         Inicializa a aba de download de imagens
@@ -28,10 +30,17 @@ class DownloadTab:
         
         # Variáveis de controle
         self.links_path_var = tk.StringVar()
+        self.asset_type_var = tk.StringVar(value=DEFAULT_ASSET_TYPE)
         self.progress_var = tk.DoubleVar()
         self.download_status_var = tk.StringVar()
         self.download_status_var.set("Aguardando início do download...")
         
+        # ID da tarefa de download em andamento no executor
+        self.download_task_id = None
+        
+        # Rastreador de progresso compartilhado com as threads de download
+        self.progress_tracker = None
+        
         # Criar componentes da interface
         self._setup_ui()
         
@@ -55,6 +64,19 @@ class DownloadTab:
             command=self._select_links_file
         ).pack(side=tk.LEFT, padx=5)
         
+        # Tipo de asset ativado e baixado a partir das listagens de assets da busca
+        asset_frame = ttk.Frame(links_frame)
+        asset_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(asset_frame, text="Tipo de asset:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(
+            asset_frame,
+            textvariable=self.asset_type_var,
+            values=ASSET_TYPES,
+            state="readonly",
+            width=25
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Botão para iniciar download
         download_button = ttk.Button(
             links_frame, 
@@ -63,6 +85,13 @@ class DownloadTab:
         )
         download_button.pack(pady=10)
         
+        # Botão para cancelar o download em andamento
+        ttk.Button(
+            links_frame,
+            text="Cancelar Download",
+            command=self._cancel_download
+        ).pack(pady=5)
+        
         # Progress frame
         progress_frame = ttk.LabelFrame(self.frame, text="Progresso", padding="10")
         progress_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
@@ -115,48 +144,90 @@ class DownloadTab:
         self.progress_var.set(0)
         self.download_status_var.set("Iniciando download...")
         
-        # Iniciar download em uma thread separada
-        def download_thread():
-            try:
-                # Carregar links
-                with open(links_path, 'r') as f:
-                    links = [line.strip() for line in f.readlines()]
-                
-                total_links = len(links)
-                downloaded_files = []
-                
-                # Download de cada imagem
-                for i, link in enumerate(links):
-                    # Atualizar status na thread principal
-                    status_msg = f"Baixando imagem {i+1} de {total_links}..."
-                    self.frame.after(0, lambda msg=status_msg: self.download_status_var.set(msg))
-                    
-                    # Calcular progresso
-                    progress = (i / total_links) * 100
-                    self.frame.after(0, lambda p=progress: self.progress_var.set(p))
-                    
-                    # Realizar download
-                    output_path = os.path.join(
-                        self.main_app.file_manager.images_dir, 
-                        f"planet_image_{i}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.tif"
-                    )
-                    downloaded_file = self.main_app.planet_app.api_handler.download_image(link, output_path)
-                    downloaded_files.append(downloaded_file)
-                    
-                    # Adicionar à lista
-                    self.frame.after(0, lambda df=downloaded_file: self.download_list.insert(tk.END, df))
-                
-                # Finalizar
-                self.frame.after(0, lambda: self.progress_var.set(100))
-                finish_msg = f"Download concluído! {len(downloaded_files)} arquivos baixados."
-                self.frame.after(0, lambda msg=finish_msg: self.download_status_var.set(msg))
-                self.frame.after(0, lambda msg=finish_msg: messagebox.showinfo("Sucesso", msg))
-                self.frame.after(0, lambda: self.main_app.update_status("Download concluído."))
-                
-            except Exception as e:
-                logger.error(f"Erro ao baixar imagens: {e}")
-                # Atualizar UI na thread principal
-                self.frame.after(0, lambda: messagebox.showerror("Erro", f"Erro ao baixar imagens: {e}"))
-                self.frame.after(0, lambda: self.main_app.update_status("Erro ao baixar imagens."))
-        
-        threading.Thread(target=download_thread).start()
\ No newline at end of file
+        # Iniciar download no executor de tarefas; as threads apenas atualizam o
+        # rastreador de progresso, que a interface amostra em intervalo fixo
+        self.progress_tracker = ProgressTracker()
+        tracker = self.progress_tracker
+        asset_type = self.asset_type_var.get()
+        
+        def download_task(task):
+            return self.main_app.planet_app.download_images(
+                links_path,
+                cancel_token=task.token,
+                progress=tracker,
+                asset_type=asset_type
+            )
+        
+        self.download_task_id = self.main_app.task_executor.submit(
+            download_task,
+            key=("download", links_path, asset_type),
+            on_success=self._on_download_finished,
+            on_error=self._on_download_error
+        )
+        self.frame.after(self.PROGRESS_REFRESH_MS, self._refresh_progress)
+    
+    def _cancel_download(self):
+        """Solicita o cancelamento do download em andamento"""
+        if self.download_task_id is not None and self.main_app.task_executor.cancel(self.download_task_id):
+            self.download_status_var.set("Cancelando download...")
+    
+    def _refresh_progress(self):
+        """Amostra o rastreador de progresso e atualiza a interface enquanto o download estiver ativo"""
+        if not self.progress_tracker:
+            return
+        
+        self._show_progress(self.progress_tracker)
+        
+        if self.main_app.task_executor.is_running(self.download_task_id):
+            self.frame.after(self.PROGRESS_REFRESH_MS, self._refresh_progress)
+    
+    def _show_progress(self, tracker):
+        """
+        Atualiza barra, status e lista de arquivos a partir de um snapshot do rastreador
+        
+        Args:
+            tracker (ProgressTracker): Rastreador do download em andamento
+        """
+        snapshot = tracker.snapshot()
+        
+        for downloaded_file in tracker.drain_completed():
+            self.download_list.insert(tk.END, downloaded_file)
+        
+        self.progress_var.set(snapshot["fraction"] * 100)
+        
+        status_msg = (
+            f"{snapshot['files_done']} de {snapshot['files_total']} arquivos - "
+            f"{format_bytes(snapshot['bytes_done'])} - {format_bytes(snapshot['rate'])}/s"
+        )
+        if snapshot["eta"] is not None:
+            status_msg += f" - restante: {format_duration(snapshot['eta'])}"
+        self.download_status_var.set(status_msg)
+    
+    def _on_download_finished(self, counts):
+        """
+        Finaliza o download e informa o usuário
+        
+        Args:
+            counts (dict): {"downloaded": arquivos baixados, "failed": arquivos que falharam}
+        """
+        if self.progress_tracker:
+            self._show_progress(self.progress_tracker)
+        
+        counts = counts or {}
+        self.progress_var.set(100)
+        finish_msg = f"Download concluído! {counts.get('downloaded', 0)} arquivos baixados."
+        if counts.get("failed"):
+            finish_msg += f" {counts['failed']} com erro."
+        self.download_status_var.set(finish_msg)
+        messagebox.showinfo("Sucesso", finish_msg)
+        self.main_app.update_status("Download concluído.")
+    
+    def _on_download_error(self, error):
+        """
+        Exibe o erro ocorrido no download
+        
+        Args:
+            error (Exception): Exceção levantada pela tarefa
+        """
+        messagebox.showerror("Erro", f"Erro ao baixar imagens: {error}")
+        self.main_app.update_status("Erro ao baixar imagens.")
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Aba de métricas HTTP da GUI do Planet App.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from planet_app.utils.logging_config import get_logger
+from planet_app.utils.http_metrics import metrics
+from planet_app.utils.progress import format_bytes
+
+logger = get_logger("MetricsTab")
+
+class MetricsTab:
+    """Aba com as métricas das requisições HTTP por endpoint"""
+    
+    # Intervalo de atualização da tabela (ms)
+    REFRESH_MS = 2000
+    
+    COLUMNS = (
+        ("endpoint", "Endpoint", 130),
+        ("requests", "Requisições", 80),
+        ("status_2xx", "2xx", 50),
+        ("status_4xx", "4xx", 50),
+        ("status_429", "429", 50),
+        ("status_5xx", "5xx", 50),
+        ("errors", "Erros", 50),
+        ("retries", "Retentativas", 80),
+        ("latency_p50", "p50", 60),
+        ("latency_p95", "p95", 60),
+        ("bytes", "Enviado / Recebido", 150),
+    )
+    
+    def __init__(self, parent, main_app):
+        """
+        Inicializa a aba de métricas
+        
+        Args:
+            parent: Widget pai (notebook)
+            main_app: Instância principal da aplicação GUI
+        """
+        self.parent = parent
+        self.main_app = main_app
+        self.frame = ttk.Frame(parent, padding="10")
+        self.summary_var = tk.StringVar()
+        
+        # Criar componentes da interface
+        self._setup_ui()
+        self.frame.after(self.REFRESH_MS, self._refresh)
+        
+        logger.info("Aba de metricas inicializada")
+    
+    def _setup_ui(self):
+        """Configura os elementos da interface da aba"""
+        metrics_frame = ttk.LabelFrame(self.frame, text="Requisições HTTP por endpoint", padding="10")
+        metrics_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.metrics_tree = ttk.Treeview(
+            metrics_frame,
+            columns=[column for column, _, _ in self.COLUMNS],
+            show="headings"
+        )
+        for column, title, width in self.COLUMNS:
+            self.metrics_tree.heading(column, text=title)
+            self.metrics_tree.column(column, width=width, anchor=tk.CENTER)
+        self.metrics_tree.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(metrics_frame, textvariable=self.summary_var).pack(anchor=tk.W, pady=5)
+        
+        ttk.Button(
+            self.frame,
+            text="Zerar Métricas",
+            command=self._reset
+        ).pack(pady=5)
+    
+    @staticmethod
+    def _format_latency(seconds):
+        if seconds is None:
+            return "-"
+        if seconds == float("inf"):
+            return "> 60s"
+        return f"≤ {seconds:g}s"
+    
+    def _refresh(self):
+        """Atualiza a tabela a partir de um snapshot das métricas"""
+        try:
+            snapshot = metrics.snapshot()
+            
+            for item in self.metrics_tree.get_children():
+                self.metrics_tree.delete(item)
+            
+            for endpoint, stats in sorted(snapshot.items()):
+                self.metrics_tree.insert("", tk.END, values=(
+                    endpoint,
+                    stats["requests"],
+                    stats["status_2xx"],
+                    stats["status_4xx"],
+                    stats["status_429"],
+                    stats["status_5xx"],
+                    stats["errors"],
+                    stats["retries"],
+                    self._format_latency(stats["latency_p50"]),
+                    self._format_latency(stats["latency_p95"]),
+                    f"{format_bytes(stats['bytes_sent'])} / {format_bytes(stats['bytes_received'])}"
+                ))
+            
+            total = sum(stats["requests"] for stats in snapshot.values())
+            throttled = sum(stats["status_429"] for stats in snapshot.values())
+            failed = sum(stats["status_5xx"] + stats["errors"] for stats in snapshot.values())
+            self.summary_var.set(
+                f"Total: {total} requisições - {throttled} limitadas (429) - {failed} falhas (5xx/conexão)"
+            )
+        finally:
+            self.frame.after(self.REFRESH_MS, self._refresh)
+    
+    def _reset(self):
+        """Zera as métricas acumuladas e limpa a tabela"""
+        metrics.reset()
+        for item in self.metrics_tree.get_children():
+            self.metrics_tree.delete(item)
+        self.summary_var.set("")
@@ -4,8 +4,9 @@ Aba de busca de imagens da GUI do Planet App.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 import datetime
+import os
+from planet_app.core.order_templates import DEFAULT_ORDER_TEMPLATE, PIXEL_TYPES, FILE_FORMATS
 from planet_app.utils.logging_config import get_logger
 
 logger = get_logger("SearchTab")
@@ -13,6 +14,9 @@ logger = get_logger("SearchTab")
 class SearchTab:
     """Aba de busca de imagens da GUI"""
     
+    # Opção das listas de entrega que mantém o valor definido pelo modelo de ordem
+    FROM_TEMPLATE = "Do modelo"
+    
     def __init__(self, parent, main_app):
         """
         Inicializa a aba de busca de imagens
@@ -35,10 +39,23 @@ class SearchTab:
         self.cloud_cover_var.set(0.25)
         self.cloud_value_var = tk.StringVar()
         self.cloud_value_var.set("0.25")
+        self.resume_search_var = tk.BooleanVar(value=True)
+        self.precheck_var = tk.BooleanVar(value=False)
+        self.saved_searches_var = tk.BooleanVar(value=False)
+        self.processes_var = tk.IntVar(value=1)
+        self.order_during_search_var = tk.BooleanVar(value=False)
+        self.order_template_var = tk.StringVar(value=DEFAULT_ORDER_TEMPLATE)
+        self.bands_var = tk.StringVar()
+        self.pixel_type_var = tk.StringVar(value=self.FROM_TEMPLATE)
+        self.file_format_var = tk.StringVar(value=self.FROM_TEMPLATE)
+        self.composite_var = tk.StringVar(value=self.FROM_TEMPLATE)
         
         # Armazenar imagens encontradas
         self.found_images = []
         
+        # ID da tarefa de busca em andamento no executor
+        self.search_task_id = None
+        
         # Criar componentes da interface
         self._setup_ui()
         
@@ -89,6 +106,47 @@ class SearchTab:
         
         ttk.Label(cloud_frame, textvariable=self.cloud_value_var, width=5).pack(side=tk.LEFT, padx=5)
         
+        # Retomar a busca a partir do diário de uma execução interrompida
+        ttk.Checkbutton(
+            search_params_frame,
+            text="Retomar busca interrompida",
+            variable=self.resume_search_var
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        
+        # Contar as cenas de cada área antes da busca e pular as áreas vazias
+        ttk.Checkbutton(
+            search_params_frame,
+            text="Pular áreas sem imagens (pré-verificação)",
+            variable=self.precheck_var
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        
+        # Monitoramento recorrente: reaproveitar buscas salvas no servidor
+        ttk.Checkbutton(
+            search_params_frame,
+            text="Usar buscas salvas (monitoramento recorrente)",
+            variable=self.saved_searches_var
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        
+        # Enviar as ordens de cada área (com o modelo e as opções de entrega abaixo) durante a busca
+        ttk.Checkbutton(
+            search_params_frame,
+            text="Criar ordens durante a busca (cenas selecionadas de cada área)",
+            variable=self.order_during_search_var
+        ).pack(anchor=tk.W, padx=5, pady=5)
+        
+        # Número de processos (mais de um divide as áreas em partições paralelas)
+        processes_frame = ttk.Frame(search_params_frame)
+        processes_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(processes_frame, text="Processos:").pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(
+            processes_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.processes_var,
+            width=5
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Botão de busca
         search_button = ttk.Button(
             search_params_frame, 
@@ -97,6 +155,13 @@ class SearchTab:
         )
         search_button.pack(pady=10)
         
+        # Botão para cancelar a busca em andamento
+        ttk.Button(
+            search_params_frame,
+            text="Cancelar Busca",
+            command=self._cancel_search
+        ).pack(pady=5)
+        
         # Frame para resultados
         self.search_results_frame = ttk.LabelFrame(self.frame, text="Resultados da Busca", padding="10")
         self.search_results_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
@@ -104,18 +169,20 @@ class SearchTab:
         # Lista de imagens encontradas
         self.images_tree = ttk.Treeview(
             self.search_results_frame,
-            columns=("ID", "Data", "Cobertura de Nuvens", "gsd"),
+            columns=("ID", "Data", "Cobertura de Nuvens", "gsd", "coverage"),
             show="headings"
         )
         self.images_tree.heading("ID", text="Nome da Imagem")
         self.images_tree.heading("Data", text="Data")
         self.images_tree.heading("Cobertura de Nuvens", text="Cobertura de Nuvens")
         self.images_tree.heading('gsd', text='GSD (m)')
+        self.images_tree.heading('coverage', text='Cobertura do Talhão')
         
         self.images_tree.column("ID", width=250)
         self.images_tree.column("Data", width=120)
         self.images_tree.column("Cobertura de Nuvens", width=100)
         self.images_tree.column('gsd', width=80)
+        self.images_tree.column('coverage', width=120)
         
         # Adicionar scrollbar
         scrollbar = ttk.Scrollbar(self.search_results_frame, orient="vertical", command=self.images_tree.yview)
@@ -123,6 +190,27 @@ class SearchTab:
         self.images_tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        # Opções de entrega do job, aplicadas sobre o modelo de ordem
+        delivery_frame = ttk.LabelFrame(self.frame, text="Opções de entrega", padding="5")
+        delivery_frame.pack(fill=tk.X, padx=10)
+        
+        ttk.Label(delivery_frame, text="Bandas (ex: 2,4,6,8):").pack(side=tk.LEFT, padx=5)
+        ttk.Entry(delivery_frame, textvariable=self.bands_var, width=12).pack(side=tk.LEFT, padx=5)
+        
+        for label, variable, values in (
+            ("Pixel:", self.pixel_type_var, PIXEL_TYPES),
+            ("Formato:", self.file_format_var, FILE_FORMATS),
+            ("Composição:", self.composite_var, ("Sim", "Não")),
+        ):
+            ttk.Label(delivery_frame, text=label).pack(side=tk.LEFT, padx=5)
+            ttk.Combobox(
+                delivery_frame,
+                textvariable=variable,
+                values=(self.FROM_TEMPLATE,) + tuple(values),
+                state="readonly",
+                width=10
+            ).pack(side=tk.LEFT, padx=5)
+        
         # Botão para criar ordem
         order_frame = ttk.Frame(self.frame)
         order_frame.pack(fill=tk.X, pady=10, padx=10)
@@ -132,6 +220,16 @@ class SearchTab:
             text="Criar Ordem de Download",
             command=self._create_order
         ).pack(side=tk.RIGHT)
+        
+        # Modelo da ordem (pacote de produto e ferramentas)
+        ttk.Combobox(
+            order_frame,
+            textvariable=self.order_template_var,
+            values=sorted(self.main_app.planet_app.order_templates),
+            state="readonly",
+            width=12
+        ).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(order_frame, text="Modelo:").pack(side=tk.RIGHT)
             # Botão para selecionar todas as imagens
         ttk.Button(
             order_frame,
@@ -145,11 +243,18 @@ class SearchTab:
             text="Limpar Seleção",
             command=self._clear_selection
         ).pack(side=tk.LEFT, padx=5)
+        
+        # Botão para selecionar o menor conjunto de cenas que cobre cada talhão
+        ttk.Button(
+            order_frame,
+            text="Selecionar Melhores Cenas",
+            command=self._select_best_scenes
+        ).pack(side=tk.LEFT, padx=5)
     
     def _select_json_file(self):
         """Seleciona um arquivo JSON"""
         json_path = self.main_app.file_manager.select_file(
-            ("Arquivos JSON", "*.json"),
+            ("Arquivos de áreas", "*.json *.wkb *.parquet *.fgb"),
             "Selecionar Arquivo GeoJSON"
         )
         if json_path:
@@ -172,47 +277,140 @@ class SearchTab:
             start_date = f"{self.start_date_var.get()}T00:00:00.00Z"
             end_date = f"{self.end_date_var.get()}T23:59:59.99Z"
             cloud_cover = self.cloud_cover_var.get()
+            resume = self.resume_search_var.get()
+            precheck = self.precheck_var.get()
+            use_saved_searches = self.saved_searches_var.get()
+            processes = max(1, self.processes_var.get())
+            order_during_search = self.order_during_search_var.get()
+            template_name = self.order_template_var.get()
+            try:
+                delivery_options = self._delivery_options()
+            except ValueError:
+                messagebox.showerror("Erro", "Bandas inválidas. Use números separados por vírgula (ex: 2,4,6,8).")
+                return
+            
+            # Iniciar busca no executor de tarefas (buscas idênticas não são duplicadas)
+            # e cada área concluída é exibida na tabela assim que chega
+            def search_task(task):
+                # A criação de ordens durante a busca usa um único processo de busca
+                if order_during_search:
+                    return self.main_app.planet_app.search_and_order(
+                        json_path, start_date, end_date, cloud_cover,
+                        cancel_token=task.token, on_result=task.report_progress,
+                        resume=resume, precheck=precheck, use_saved_searches=use_saved_searches,
+                        template_name=template_name, delivery_options=delivery_options
+                    )
+                if processes > 1:
+                    return self.main_app.planet_app.search_images_sharded(
+                        json_path, start_date, end_date, cloud_cover, shards=processes,
+                        cancel_token=task.token, on_result=task.report_progress,
+                        resume=resume, precheck=precheck, use_saved_searches=use_saved_searches
+                    )
+                return self.main_app.planet_app.search_images(
+                    json_path, start_date, end_date, cloud_cover,
+                    cancel_token=task.token, on_result=task.report_progress,
+                    resume=resume, precheck=precheck, use_saved_searches=use_saved_searches
+                )
+            
+            previous_task_id = self.search_task_id
+            self.search_task_id = self.main_app.task_executor.submit(
+                search_task,
+                key=("search", json_path, start_date, end_date, cloud_cover, processes, resume, precheck,
+                     use_saved_searches, order_during_search, template_name,
+                     repr(sorted(delivery_options.items()))),
+                on_success=self._on_search_done,
+                on_error=self._on_search_error,
+                on_progress=self._on_search_progress
+            )
             
-            # Limpar tabela anterior
+            # Busca idêntica já em andamento: a tabela continua recebendo as cenas dela
+            if self.search_task_id == previous_task_id:
+                return
+            
+            # Limpar tabela anterior (o progresso da nova busca só é entregue depois, pelo loop do Tk)
             for item in self.images_tree.get_children():
                 self.images_tree.delete(item)
+            self.found_images = []
             
             self.main_app.update_status("Buscando imagens...")
-            
-            # Iniciar busca em uma thread separada
-            def search_thread():
-                try:
-                    images, links_file_path = self.main_app.planet_app.search_images(
-                        json_path, start_date, end_date, cloud_cover
-                    )
-                    
-                    # Atualizar UI na thread principal
-                    self.frame.after(0, lambda: self._update_search_results(images, links_file_path))
-                except Exception as e:
-                    logger.error(f"Erro ao buscar imagens: {e}")
-                    # Atualizar UI na thread principal
-                    self.frame.after(0, lambda: messagebox.showerror("Erro", f"Erro ao buscar imagens: {e}"))
-                    self.frame.after(0, lambda: self.main_app.update_status("Erro ao buscar imagens."))
-            
-            threading.Thread(target=search_thread).start()
         except Exception as e:
             logger.error(f"Erro ao configurar busca: {e}")
             messagebox.showerror("Erro", f"Erro ao configurar busca: {e}")
     
-    def _update_search_results(self, images, links_file_path):
+    def _on_search_done(self, result):
         """
-        Atualiza os resultados da busca de imagens
+        Exibe o resultado da busca e, no modo de ordens durante a busca, o resumo das ordens
+        
+        Args:
+            result (tuple): (imagens, arquivo de links) ou (imagens, arquivo de links, ordens)
+        """
+        if len(result) > 2:
+            # As ordens já foram criadas durante a busca: exibe o resumo em vez de oferecer uma nova ordem
+            self._update_search_results(result[0], result[1], ask_order=False)
+            self._update_order_result(result[2])
+        else:
+            self._update_search_results(result[0], result[1])
+    
+    def _cancel_search(self):
+        """Solicita o cancelamento da busca em andamento"""
+        if self.search_task_id is not None and self.main_app.task_executor.cancel(self.search_task_id):
+            self.main_app.update_status("Cancelando busca...")
+    
+    def _on_search_error(self, error):
+        """
+        Exibe o erro ocorrido na busca de imagens
+        
+        Args:
+            error (Exception): Exceção levantada pela tarefa
+        """
+        messagebox.showerror("Erro", f"Erro ao buscar imagens: {error}")
+        self.main_app.update_status("Erro ao buscar imagens.")
+    
+    def _on_search_progress(self, images):
+        """
+        Exibe as cenas de uma área assim que a busca daquela área termina
+        
+        Args:
+            images (list): Cenas novas encontradas na área
+        """
+        self._insert_images(images)
+        self.main_app.update_status(f"Buscando imagens... {len(self.found_images)} encontradas até agora.")
+    
+    def _update_search_results(self, images, links_file_path, ask_order=True):
+        """
+        Finaliza a busca de imagens
         
         Args:
             images (list): Lista de imagens encontradas
             links_file_path (str): Caminho do arquivo de links salvo
+            ask_order (bool, optional): Perguntar se deve criar uma ordem para as imagens. Default: True
         """
-        if not images or not links_file_path:
+        # Cenas que não chegaram pela fila de progresso (ex: busca sem streaming)
+        if len(images) > len(self.found_images):
+            self._insert_images(images[len(self.found_images):])
+        
+        if not self.found_images or not links_file_path:
             self.main_app.update_status("Nenhuma imagem encontrada.")
             return
         
+        self.main_app.update_status(f"{len(self.found_images)} imagens encontradas. Links salvos em: {links_file_path}")
+        
+        # Preencher automaticamente o campo na aba de download
+        self.main_app.download_tab.links_path_var.set(links_file_path)
+        
+        # Perguntar ao usuário se deseja criar uma ordem
+        if ask_order and messagebox.askyesno("Sucesso", "Deseja criar uma ordem de download para estas imagens?"):
+            self._create_order()
+    
+    def _insert_images(self, images):
+        """
+        Acrescenta imagens à tabela e à lista de imagens encontradas
+        
+        Args:
+            images (list): Imagens a serem exibidas
+        """
         # Armazenar imagens para uso posterior
-        self.found_images = images
+        self.found_images.extend(images)
         
         # Preencher a tabela com as imagens encontradas
         for img in images:
@@ -242,41 +440,70 @@ class SearchTab:
             else:
                 gsd_formatted = "N/A"
             
+            # Cobertura do talhão pela cena, quando calculada pelo índice espacial
+            coverage = img.get("coverage")
+            coverage_formatted = f"{coverage:.0%}" if coverage is not None else "N/A"
+            
             # Inserir na tabela
             self.images_tree.insert(
                 "", 
                 "end", 
                 values=(
-                    img["area_name"], 
+                    ", ".join(img.get("area_names") or [img["area_name"]]), 
                     formatted_date,
                     f"{img['cloud_cover']:.2f}",
-                    gsd_formatted
+                    gsd_formatted,
+                    coverage_formatted
                 )
             )
-        
-        self.main_app.update_status(f"{len(images)} imagens encontradas. Links salvos em: {links_file_path}")
-        
-        # Preencher automaticamente o campo na aba de download
-        self.main_app.download_tab.links_path_var.set(links_file_path)
-        
-        # Perguntar ao usuário se deseja criar uma ordem
-        if messagebox.askyesno("Sucesso", "Deseja criar uma ordem de download para estas imagens?"):
-            self._create_order()
-            
-
-
-
-
     
     def _select_all_images(self):
         """Seleciona todas as imagens na tabela"""
         for item in self.images_tree.get_children():
             self.images_tree.selection_add(item)
-        
+    
     def _clear_selection(self):
         """Limpa a seleção na tabela"""
         self.images_tree.selection_remove(self.images_tree.selection())
-
+    
+    def _select_best_scenes(self):
+        """Seleciona na tabela o menor conjunto de cenas que cobre cada talhão por janela de tempo"""
+        if not self.found_images:
+            messagebox.showerror("Erro", "Nenhuma imagem encontrada. Por favor, faça uma busca primeiro.")
+            return
+        
+        json_path = self.json_path_var.get().strip()
+        images = self.found_images
+        self.main_app.update_status("Selecionando melhores cenas...")
+        
+        def selection_task(task):
+            return self.main_app.planet_app.select_best_scenes(images, json_path)
+        
+        self.main_app.task_executor.submit(
+            selection_task,
+            key=("select_scenes", json_path),
+            on_success=self._apply_scene_selection,
+            on_error=lambda e: self.main_app.update_status(f"Erro ao selecionar cenas: {e}")
+        )
+    
+    def _apply_scene_selection(self, selected_images):
+        """
+        Marca na tabela as cenas escolhidas pelo motor de seleção
+        
+        Args:
+            selected_images (list): Imagens selecionadas
+        """
+        selected_ids = {id(img) for img in selected_images}
+        items = self.images_tree.get_children()
+        self._clear_selection()
+        for item, img in zip(items, self.found_images):
+            if id(img) in selected_ids:
+                self.images_tree.selection_add(item)
+        
+        self.main_app.update_status(
+            f"{len(selected_images)} de {len(self.found_images)} cenas selecionadas para cobrir os talhões."
+        )
+    
     def _create_order(self):
         """Cria uma ordem para as imagens selecionadas"""
         # Verificar se há imagens encontradas
@@ -299,8 +526,50 @@ class SearchTab:
             selected_indices = [self.images_tree.index(item) for item in selected_items]
             selected_images = [self.found_images[i] for i in selected_indices]
         
+        try:
+            delivery_options = self._delivery_options()
+        except ValueError:
+            messagebox.showerror("Erro", "Bandas inválidas. Use números separados por vírgula (ex: 2,4,6,8).")
+            return
+        
+        json_path = self.json_path_var.get().strip()
+        template_name = self.order_template_var.get()
         self.main_app.update_status(f"Criando ordens para {len(selected_images)} imagens...")
-
+        
+        def order_task(task):
+            return self.main_app.planet_app.create_order(
+                selected_images, json_path=json_path, template_name=template_name,
+                delivery_options=delivery_options
+            )
+        
+        # Ordens para o mesmo conjunto de imagens não são submetidas duas vezes em paralelo
+        self.main_app.task_executor.submit(
+            order_task,
+            key=("order", template_name, repr(sorted(delivery_options.items())),
+                 tuple(sorted(img["id"] for img in selected_images))),
+            on_success=self._update_order_result,
+            on_error=lambda e: self._update_order_result(None)
+        )
+    
+    def _delivery_options(self):
+        """
+        Lê as opções de entrega da interface
+        
+        Returns:
+            dict: Opções para OrderTemplate.with_options (apenas as alteradas em relação ao modelo)
+        """
+        options = {}
+        bands = self.bands_var.get().replace(" ", "")
+        if bands:
+            options["bands"] = [int(band) for band in bands.split(",") if band]
+        if self.pixel_type_var.get() != self.FROM_TEMPLATE:
+            options["pixel_type"] = self.pixel_type_var.get()
+        if self.file_format_var.get() != self.FROM_TEMPLATE:
+            options["file_format"] = self.file_format_var.get()
+        if self.composite_var.get() != self.FROM_TEMPLATE:
+            options["composite"] = self.composite_var.get() == "Sim"
+        return options
+    
     def _update_order_result(self, order):
         """
         Atualiza o resultado da criação de ordem
@@ -4,7 +4,6 @@ Aba de processamento de shapefile da GUI do Planet App.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 from planet_app.utils.logging_config import get_logger
 
 logger = get_logger("ShapefileTab")
@@ -27,6 +26,8 @@ class ShapefileTab:
         # Variáveis de controle
         self.shapefile_path_var = tk.StringVar()
         self.shapefile_result_var = tk.StringVar()
+        self.output_format_var = tk.StringVar()
+        self.output_format_var.set("json")
         
         # Criar componentes da interface
         self._setup_ui()
@@ -52,6 +53,19 @@ class ShapefileTab:
             command=self._select_shapefile
         ).pack(side=tk.LEFT, padx=5)
         
+        # Formato do arquivo de áreas gerado
+        format_frame = ttk.Frame(shapefile_frame)
+        format_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(format_frame, text="Formato de saída:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(
+            format_frame,
+            textvariable=self.output_format_var,
+            values=("json", "wkb", "parquet", "fgb"),
+            state="readonly",
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Botão para processar
         process_button = ttk.Button(
             shapefile_frame, 
@@ -91,22 +105,30 @@ class ShapefileTab:
             messagebox.showerror("Erro", "Por favor, selecione um arquivo shapefile.")
             return
         
-        # Iniciar processamento em uma thread separada
+        # Iniciar processamento no executor de tarefas (caminhos iguais não são processados em paralelo)
         self.main_app.update_status("Processando shapefile...")
         
-        def process_thread():
-            try:
-                json_path = self.main_app.planet_app.process_shapefile_to_json(shapefile_path)
-                
-                # Atualizar UI na thread principal
-                self.frame.after(0, lambda: self._update_shapefile_result(json_path))
-            except Exception as e:
-                logger.error(f"Erro ao processar shapefile: {e}")
-                # Atualizar UI na thread principal
-                self.frame.after(0, lambda: messagebox.showerror("Erro", f"Erro ao processar shapefile: {e}"))
-                self.frame.after(0, lambda: self.main_app.update_status("Erro ao processar shapefile."))
-        
-        threading.Thread(target=process_thread).start()
+        output_format = self.output_format_var.get()
+        
+        def process_task(task):
+            return self.main_app.planet_app.process_shapefile_to_json(shapefile_path, output_format=output_format)
+        
+        self.main_app.task_executor.submit(
+            process_task,
+            key=("shapefile", shapefile_path, output_format),
+            on_success=self._update_shapefile_result,
+            on_error=self._on_process_error
+        )
+    
+    def _on_process_error(self, error):
+        """
+        Exibe o erro ocorrido no processamento do shapefile
+        
+        Args:
+            error (Exception): Exceção levantada pela tarefa
+        """
+        messagebox.showerror("Erro", f"Erro ao processar shapefile: {error}")
+        self.main_app.update_status("Erro ao processar shapefile.")
     
     def _update_shapefile_result(self, json_path):
         """
@@ -116,7 +138,7 @@ class ShapefileTab:
             json_path (str): Caminho do arquivo JSON gerado
         """
         if json_path:
-            self.shapefile_result_var.set(f"Arquivo JSON gerado com sucesso:\n{json_path}")
+            self.shapefile_result_var.set(f"Arquivo de áreas gerado com sucesso:\n{json_path}")
             self.main_app.update_status("Shapefile processado com sucesso.")
             
             # Preencher automaticamente o campo na aba de busca
@@ -0,0 +1,218 @@
+"""
+Executor de tarefas em segundo plano compartilhado pelas abas da GUI.
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from planet_app.utils.cancellation import CancellationToken, CancelledError
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("TaskExecutor")
+
+
+class Task:
+    """Contexto de uma tarefa em execução, entregue como primeiro argumento da função"""
+    
+    def __init__(self, task_id, key, executor, on_success=None, on_error=None,
+                 on_progress=None, on_cancel=None):
+        self.task_id = task_id
+        self.key = key
+        self.token = CancellationToken()
+        self._executor = executor
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+    
+    def is_cancelled(self):
+        """Atalho para o token de cancelamento da tarefa"""
+        return self.token.is_cancelled()
+    
+    def raise_if_cancelled(self):
+        """Atalho para o token de cancelamento da tarefa"""
+        self.token.raise_if_cancelled()
+    
+    def report_progress(self, *args):
+        """
+        Envia uma atualização de progresso para a thread da interface
+        
+        Args:
+            *args: Argumentos repassados ao callback on_progress
+        """
+        if self.on_progress:
+            self._executor._post(self.on_progress, args)
+    
+    def call_in_ui(self, callback, *args):
+        """
+        Agenda uma função para ser executada na thread da interface
+        
+        Args:
+            callback (callable): Função a ser executada
+            *args: Argumentos da função
+        """
+        self._executor._post(callback, args)
+
+
+class TaskExecutor:
+    """
+    Pool limitado de threads para as tarefas da GUI.
+    
+    Cada tarefa recebe um ID e um token de cancelamento cooperativo. Tarefas
+    com a mesma chave não são executadas em paralelo: enquanto uma estiver em
+    andamento, novas submissões com a mesma chave retornam o ID existente.
+    Os callbacks (sucesso, erro, progresso) são entregues por uma fila que o
+    loop do Tk esvazia periodicamente.
+    """
+    
+    def __init__(self, root, max_workers=3, poll_interval_ms=100, max_events_per_poll=500):
+        """
+        Inicializa o executor
+        
+        Args:
+            root: Widget Tk usado para agendar o esvaziamento da fila
+            max_workers (int, optional): Número máximo de tarefas simultâneas. Default: 3
+            poll_interval_ms (int, optional): Intervalo de leitura da fila em ms. Default: 100
+            max_events_per_poll (int, optional): Máximo de eventos processados por ciclo. Default: 500
+        """
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self.max_events_per_poll = max_events_per_poll
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PlanetTask")
+        self._events = queue.Queue()
+        self._tasks = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+        
+        self.root.after(self.poll_interval_ms, self._drain)
+        logger.info(f"Executor de tarefas inicializado com {max_workers} workers")
+    
+    def submit(self, func, *args, key=None, on_success=None, on_error=None,
+               on_progress=None, on_cancel=None, **kwargs):
+        """
+        Submete uma tarefa para execução em segundo plano
+        
+        Args:
+            func (callable): Função executada como func(task, *args, **kwargs)
+            *args: Argumentos posicionais da função
+            key (hashable, optional): Chave de de-duplicação da tarefa
+            on_success (callable, optional): Chamado com o resultado na thread da interface
+            on_error (callable, optional): Chamado com a exceção na thread da interface
+            on_progress (callable, optional): Chamado com os argumentos de task.report_progress
+            on_cancel (callable, optional): Chamado sem argumentos se a tarefa for cancelada
+            **kwargs: Argumentos nomeados da função
+        
+        Returns:
+            int: ID da tarefa (o ID existente, se uma tarefa idêntica já estiver em andamento)
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Executor de tarefas encerrado")
+            
+            if key is not None and key in self._keys:
+                existing_id = self._keys[key]
+                logger.info(f"Tarefa {existing_id} identica ja em andamento; submissao ignorada")
+                return existing_id
+            
+            task_id = next(self._ids)
+            task = Task(task_id, key, self, on_success, on_error, on_progress, on_cancel)
+            self._tasks[task_id] = task
+            if key is not None:
+                self._keys[key] = task_id
+        
+        self._pool.submit(self._run, task, func, args, kwargs)
+        logger.info(f"Tarefa {task_id} submetida")
+        return task_id
+    
+    def _run(self, task, func, args, kwargs):
+        """Executa a tarefa na thread do pool e publica o resultado na fila"""
+        try:
+            task.raise_if_cancelled()
+            result = func(task, *args, **kwargs)
+        except CancelledError:
+            logger.info(f"Tarefa {task.task_id} cancelada")
+            if task.on_cancel:
+                self._post(task.on_cancel, ())
+        except Exception as e:
+            logger.error(f"Erro na tarefa {task.task_id}: {e}")
+            if task.on_error:
+                self._post(task.on_error, (e,))
+        else:
+            if task.on_success:
+                self._post(task.on_success, (result,))
+        finally:
+            self._release(task)
+    
+    def _release(self, task):
+        """Remove a tarefa dos registros de tarefas em andamento"""
+        with self._lock:
+            self._tasks.pop(task.task_id, None)
+            if task.key is not None and self._keys.get(task.key) == task.task_id:
+                del self._keys[task.key]
+    
+    def _post(self, callback, args):
+        """Enfileira um callback para execução na thread da interface"""
+        self._events.put((callback, args))
+    
+    def _drain(self):
+        """Executa os callbacks pendentes na thread da interface e reagenda a leitura"""
+        for _ in range(self.max_events_per_poll):
+            try:
+                callback, args = self._events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Erro ao executar callback da interface: {e}")
+        
+        if not self._closed:
+            self.root.after(self.poll_interval_ms, self._drain)
+    
+    def cancel(self, task_id):
+        """
+        Solicita o cancelamento de uma tarefa
+        
+        Args:
+            task_id (int): ID da tarefa
+        
+        Returns:
+            bool: True se a tarefa estava em andamento
+        """
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        task.token.cancel()
+        return True
+    
+    def cancel_all(self):
+        """Solicita o cancelamento de todas as tarefas em andamento"""
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            task.token.cancel()
+    
+    def is_running(self, task_id):
+        """
+        Verifica se uma tarefa ainda está em andamento
+        
+        Args:
+            task_id (int): ID da tarefa
+        
+        Returns:
+            bool: True se a tarefa não terminou
+        """
+        with self._lock:
+            return task_id in self._tasks
+    
+    def shutdown(self):
+        """Cancela as tarefas em andamento e encerra o pool sem bloquear a interface"""
+        with self._lock:
+            self._closed = True
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
+        logger.info("Executor de tarefas encerrado")
@@ -10,8 +10,10 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from gui.app import PlanetAppGUI
-from utils.logging_config import setup_logging
+from planet_app.gui.app import PlanetAppGUI
+from planet_app.utils.logging_config import setup_logging
+from planet_app.utils.tracing import enable_tracing_from_env
+from planet_app.utils.http_metrics import start_metrics_server, METRICS_PORT_ENV_VAR
 
 # Carregar variáveis de ambiente do arquivo .env, se existir
 from dotenv import load_dotenv
@@ -22,6 +24,13 @@ def main():
     # Configurar logging
     setup_logging()
     
+    # Rastreamento de desempenho (PLANET_APP_TRACE=1 ou caminho do arquivo JSONL)
+    enable_tracing_from_env(os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
+    
+    # Endpoint local de métricas HTTP no formato do Prometheus (opcional)
+    if os.environ.get(METRICS_PORT_ENV_VAR, ""):
+        start_metrics_server(int(os.environ[METRICS_PORT_ENV_VAR]))
+    
     # Iniciar a interface gráfica
     root = tk.Tk()
     app = PlanetAppGUI(root)
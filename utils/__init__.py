@@ -3,5 +3,7 @@ Utilitários do Planet App.
 """
 
 from planet_app.utils.logging_config import setup_logging, get_logger
+from planet_app.utils.cancellation import CancellationToken, CancelledError
+from planet_app.utils.progress import ProgressTracker
 
-__all__ = ['setup_logging', 'get_logger']
\ No newline at end of file
+__all__ = ['setup_logging', 'get_logger', 'CancellationToken', 'CancelledError', 'ProgressTracker']
\ No newline at end of file
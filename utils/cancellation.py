@@ -0,0 +1,39 @@
+"""
+Sinalização cooperativa de cancelamento para tarefas em segundo plano.
+"""
+
+import threading
+
+
+class CancelledError(Exception):
+    """Exceção levantada quando uma tarefa é cancelada"""
+
+
+class CancellationToken:
+    """
+    Token de cancelamento cooperativo.
+    
+    A tarefa consulta o token periodicamente (por exemplo, entre talhões ou
+    entre arquivos) e interrompe o trabalho quando ele é acionado.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        """Solicita o cancelamento da tarefa"""
+        self._event.set()
+    
+    def is_cancelled(self):
+        """
+        Verifica se o cancelamento foi solicitado
+        
+        Returns:
+            bool: True se a tarefa deve ser interrompida
+        """
+        return self._event.is_set()
+    
+    def raise_if_cancelled(self):
+        """Levanta CancelledError se o cancelamento foi solicitado"""
+        if self._event.is_set():
+            raise CancelledError("Tarefa cancelada")
@@ -0,0 +1,83 @@
+"""
+Travas de arquivo exclusivas, válidas entre processos (flock ou msvcrt).
+"""
+
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Trava exclusiva sobre um arquivo aberto
+    
+    A trava pertence à descrição de arquivo aberta: processos filhos criados
+    por fork que herdam o mesmo arquivo não são excluídos por ela e devem
+    abrir o arquivo de novo.
+    """
+    
+    def __init__(self, file):
+        self.file = file
+    
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        return False
+
+
+@contextlib.contextmanager
+def locked_path(path):
+    """
+    Trava exclusiva associada a um caminho, por meio de um arquivo "<caminho>.lock"
+    
+    Uso:
+        with locked_path(registro):
+            ... ler, alterar e gravar o registro ...
+    
+    Args:
+        path (str): Caminho do arquivo protegido
+    """
+    lock_path = path + ".lock"
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(lock_path, 'a+b') as lock_file:
+        with FileLock(lock_file):
+            yield
+
+
+def atomic_write(path, data):
+    """
+    Grava um arquivo de forma atômica (arquivo temporário + os.replace)
+    
+    Args:
+        path (str): Caminho do arquivo
+        data (bytes): Conteúdo
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
@@ -0,0 +1,392 @@
+"""
+Métricas HTTP das chamadas à API da Planet.
+
+Cada requisição feita pela sessão do PlanetAPIHandler é contabilizada por
+endpoint: número de requisições, respostas por classe de status (2xx, 4xx,
+429, 5xx), erros de conexão, novas tentativas, bytes enviados/recebidos e um
+histograma de latência. Os valores podem ser consultados com snapshot(),
+exportados no formato texto do Prometheus ou servidos localmente por HTTP.
+"""
+
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import requests
+from urllib3.util.retry import Retry
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("HttpMetrics")
+
+# Limites superiores (segundos) dos intervalos do histograma de latência
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Variável de ambiente com a porta do endpoint local de métricas (Prometheus)
+METRICS_PORT_ENV_VAR = "PLANET_APP_METRICS_PORT"
+
+# Classificação das URLs em endpoints (o primeiro padrão que casar com o caminho vale)
+ENDPOINT_PATTERNS = (
+    ("quick-search", re.compile(r"/data/v1/quick-search")),
+    ("stats", re.compile(r"/data/v1/stats")),
+    ("searches.results", re.compile(r"/data/v1/searches/[^/]+/results")),
+    ("searches", re.compile(r"/data/v1/searches")),
+    ("assets.activate", re.compile(r"/activate")),
+    ("assets", re.compile(r"/items/[^/]+/assets")),
+    ("download", re.compile(r"/(data/v1|compute/ops)/download")),
+    ("item-types", re.compile(r"/data/v1/item-types")),
+    ("orders", re.compile(r"/compute/ops/orders")),
+)
+
+
+def endpoint_for(url):
+    """
+    Classifica uma URL em um endpoint da API
+    
+    Args:
+        url (str): URL da requisição
+    
+    Returns:
+        str: Nome do endpoint (ou o host, para URLs não reconhecidas)
+    """
+    parsed = urlparse(url)
+    for name, pattern in ENDPOINT_PATTERNS:
+        if pattern.search(parsed.path):
+            return name
+    return parsed.netloc or "outros"
+
+
+class _EndpointStats:
+    """Contadores e histograma de um endpoint"""
+    
+    __slots__ = ("requests", "status", "errors", "retries", "bytes_sent", "bytes_received",
+                 "latency_sum", "latency_buckets")
+    
+    def __init__(self):
+        self.requests = 0
+        self.status = {}
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def _count_status(status, low, high):
+    """Soma as respostas com status no intervalo [low, high)"""
+    return sum(count for code, count in status.items() if low <= code < high)
+
+
+def _quantile(buckets, total, q):
+    """Estima um quantil da latência a partir do histograma (limite superior do intervalo)"""
+    if not total:
+        return None
+    target = q * total
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+
+class HttpMetrics:
+    """Registro das métricas HTTP, seguro para uso por várias threads"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+    
+    def record(self, endpoint, status=None, latency=0.0, bytes_sent=0, bytes_received=0, retries=0,
+               error=False, retry_statuses=()):
+        """
+        Registra uma requisição
+        
+        Args:
+            endpoint (str): Nome do endpoint (ver endpoint_for)
+            status (int, optional): Status HTTP da resposta (None se não houve resposta)
+            latency (float, optional): Duração da requisição em segundos
+            bytes_sent (int, optional): Tamanho do corpo enviado
+            bytes_received (int, optional): Tamanho do corpo recebido
+            retries (int, optional): Novas tentativas feitas pelo adaptador HTTP
+            error (bool, optional): True se a requisição falhou sem resposta (conexão, timeout)
+            retry_statuses (list, optional): Status das tentativas descartadas pelo adaptador HTTP
+                                             (None para tentativas sem resposta)
+        """
+        bucket = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                bucket = i
+                break
+        
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.requests += 1
+            if status is not None:
+                stats.status[status] = stats.status.get(status, 0) + 1
+            if error:
+                stats.errors += 1
+            for retry_status in retry_statuses:
+                if retry_status is None:
+                    stats.errors += 1
+                else:
+                    stats.status[retry_status] = stats.status.get(retry_status, 0) + 1
+            stats.retries += retries
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency_sum += latency
+            stats.latency_buckets[bucket] += 1
+    
+    def add_bytes_received(self, endpoint, count):
+        """
+        Soma bytes recebidos a um endpoint (corpo lido depois do registro da requisição)
+        
+        Args:
+            endpoint (str): Nome do endpoint (ver endpoint_for)
+            count (int): Bytes lidos
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.bytes_received += count
+    
+    def reset(self):
+        """Zera todas as métricas"""
+        with self._lock:
+            self._endpoints = {}
+    
+    def snapshot(self):
+        """
+        Retorna o estado atual das métricas
+        
+        Returns:
+            dict: {endpoint: {"requests", "status_2xx", "status_4xx", "status_429", "status_5xx",
+                   "errors", "retries", "bytes_sent", "bytes_received", "latency_mean",
+                   "latency_p50", "latency_p95", "status", "latency_buckets"}}
+        """
+        with self._lock:
+            endpoints = {
+                name: (stats.requests, dict(stats.status), stats.errors, stats.retries, stats.bytes_sent,
+                       stats.bytes_received, stats.latency_sum, list(stats.latency_buckets))
+                for name, stats in self._endpoints.items()
+            }
+        
+        result = {}
+        for name, (total, status, errors, retries, sent, received, latency_sum, buckets) in endpoints.items():
+            result[name] = {
+                "requests": total,
+                "status_2xx": _count_status(status, 200, 300),
+                "status_4xx": _count_status(status, 400, 500),
+                "status_429": status.get(429, 0),
+                "status_5xx": _count_status(status, 500, 600),
+                "errors": errors,
+                "retries": retries,
+                "bytes_sent": sent,
+                "bytes_received": received,
+                "latency_mean": latency_sum / total if total else 0.0,
+                "latency_p50": _quantile(buckets, total, 0.5),
+                "latency_p95": _quantile(buckets, total, 0.95),
+                "status": status,
+                "latency_buckets": buckets
+            }
+        return result
+    
+    def to_prometheus(self):
+        """
+        Exporta as métricas no formato texto do Prometheus
+        
+        Returns:
+            str: Métricas no formato de exposição do Prometheus
+        """
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP planet_app_http_requests_total Requisicoes HTTP por endpoint e status",
+            "# TYPE planet_app_http_requests_total counter",
+        ]
+        for name, stats in snapshot.items():
+            for code, count in sorted(stats["status"].items()):
+                lines.append(f'planet_app_http_requests_total{{endpoint="{name}",status="{code}"}} {count}')
+            if stats["errors"]:
+                lines.append(f'planet_app_http_requests_total{{endpoint="{name}",status="error"}} {stats["errors"]}')
+        
+        for metric, key, help_text in (
+            ("planet_app_http_retries_total", "retries", "Novas tentativas por endpoint"),
+            ("planet_app_http_sent_bytes_total", "bytes_sent", "Bytes enviados por endpoint"),
+            ("planet_app_http_received_bytes_total", "bytes_received", "Bytes recebidos por endpoint"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in snapshot.items():
+                lines.append(f'{metric}{{endpoint="{name}"}} {stats[key]}')
+        
+        lines.append("# HELP planet_app_http_latency_seconds Latencia das requisicoes por endpoint")
+        lines.append("# TYPE planet_app_http_latency_seconds histogram")
+        for name, stats in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats["latency_buckets"]):
+                cumulative += count
+                lines.append(f'planet_app_http_latency_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'planet_app_http_latency_seconds_bucket{{endpoint="{name}",le="+Inf"}} {stats["requests"]}')
+            lines.append(
+                f'planet_app_http_latency_seconds_sum{{endpoint="{name}"}} {stats["latency_mean"] * stats["requests"]}'
+            )
+            lines.append(f'planet_app_http_latency_seconds_count{{endpoint="{name}"}} {stats["requests"]}')
+        
+        return "\n".join(lines) + "\n"
+
+
+# Registro compartilhado por todas as sessões da aplicação
+metrics = HttpMetrics()
+
+
+class MeteredSession(requests.Session):
+    """
+    Sessão HTTP que registra cada requisição em HttpMetrics
+    
+    A latência cobre a requisição completa (para respostas em stream, até a
+    chegada dos cabeçalhos). Os bytes recebidos são os do corpo efetivamente
+    lido: nas respostas em stream, são somados à medida que iter_content (ou
+    content, text, json) entrega os blocos. As novas tentativas vêm do
+    histórico de retry do urllib3, e o status de cada tentativa descartada
+    (ex: 429, 503) também é contabilizado.
+    
+    Com um limitador de taxa (ver rate_limit.SharedRateLimiter), cada
+    requisição aguarda uma ficha do balde do seu endpoint antes de ser enviada;
+    a espera não entra na latência. As novas tentativas do adaptador HTTP só
+    consomem fichas se o adaptador usar RateLimitedRetry.
+    """
+    
+    def __init__(self, registry=None, rate_limiter=None):
+        super().__init__()
+        self.metrics = registry or metrics
+        self.rate_limiter = rate_limiter
+    
+    def request(self, method, url, *args, **kwargs):
+        endpoint = endpoint_for(url)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_for_endpoint(endpoint)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.metrics.record(endpoint, latency=time.perf_counter() - start, error=True)
+            raise
+        
+        latency = time.perf_counter() - start
+        body = response.request.body if response.request is not None else None
+        retries = getattr(getattr(response.raw, "retries", None), "history", ()) or ()
+        if kwargs.get("stream"):
+            bytes_received = 0
+            self._count_stream(response, endpoint)
+        else:
+            bytes_received = len(response.content or b"")
+        self.metrics.record(
+            endpoint,
+            status=response.status_code,
+            latency=latency,
+            bytes_sent=len(body) if body else 0,
+            bytes_received=bytes_received,
+            retries=len(retries),
+            retry_statuses=[entry.status for entry in retries]
+        )
+        return response
+    
+    def _count_stream(self, response, endpoint):
+        """Conta os bytes de uma resposta em stream à medida que o corpo é lido"""
+        iter_content = response.iter_content
+        registry = self.metrics
+        
+        def counted_iter_content(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                if chunk:
+                    registry.add_bytes_received(endpoint, len(chunk))
+                yield chunk
+        
+        response.iter_content = counted_iter_content
+
+
+class RateLimitedRetry(Retry):
+    """
+    Retry do urllib3 em que cada nova tentativa aguarda uma ficha do limitador de taxa
+    
+    As novas tentativas são feitas pelo adaptador HTTP, abaixo da sessão, e não
+    passariam pelo limitador de MeteredSession; sem isso, as respostas 429 de
+    vários processos gerariam ainda mais requisições acima do limite da conta.
+    A ficha é pedida depois da espera do backoff (ou do Retry-After).
+    """
+    
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        """
+        Inicializa a política de novas tentativas
+        
+        Args:
+            *args: Argumentos de urllib3.util.retry.Retry
+            rate_limiter (SharedRateLimiter, optional): Limitador consultado antes de cada nova tentativa
+            **kwargs: Argumentos nomeados de urllib3.util.retry.Retry
+        """
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+        self.endpoint = None
+    
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.rate_limiter = self.rate_limiter
+        retry.endpoint = self.endpoint
+        return retry
+    
+    def increment(self, method=None, url=None, *args, **kwargs):
+        retry = super().increment(method, url, *args, **kwargs)
+        if url:
+            retry.endpoint = endpoint_for(url)
+        return retry
+    
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_for_endpoint(self.endpoint or "outros")
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve as métricas em /metrics"""
+    
+    registry = metrics
+    
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Inicia, em uma thread, um servidor HTTP local com as métricas no formato do Prometheus
+    
+    Args:
+        port (int): Porta do servidor
+        host (str, optional): Endereço de escuta. Default: "127.0.0.1"
+    
+    Returns:
+        ThreadingHTTPServer: Servidor iniciado ou None em caso de erro
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    except OSError as e:
+        logger.error(f"Nao foi possivel iniciar o servidor de metricas na porta {port}: {e}")
+        return None
+    
+    threading.Thread(target=server.serve_forever, daemon=True, name="MetricsServer").start()
+    logger.info(f"Metricas HTTP disponiveis em http://{host}:{port}/metrics")
+    return server
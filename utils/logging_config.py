@@ -2,19 +2,80 @@
 Configuração de logging para o Planet App.
 """
 
+import atexit
+import datetime
 import logging
+import logging.handlers
 import os
+import queue
 from pathlib import Path
 import sys
+from planet_app.utils import serialization
 
-def setup_logging():
+# Rotação do arquivo de log: tamanho máximo de cada arquivo e número de arquivos antigos mantidos
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Variável de ambiente que escolhe o formato do arquivo de log ("text" ou "json")
+LOG_FORMAT_ENV_VAR = "PLANET_APP_LOG_FORMAT"
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Thread que grava os registros enfileirados pelos demais threads
+_listener = None
+
+# Arquivo de log configurado por setup_logging
+_log_file = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON"""
+    
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return serialization.dumps(entry).decode("utf-8")
+
+
+def stop_logging():
+    """Grava os registros pendentes na fila e encerra a thread de logging"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def setup_logging(json_format=None, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
     """
     Configura o sistema de logging para a aplicação.
     Os logs serão armazenados no mesmo diretório que o arquivo main.py
     
+    As threads apenas enfileiram os registros (QueueHandler); uma única thread
+    (QueueListener) formata e grava no console e no arquivo, que é rotacionado
+    ao atingir max_bytes.
+    
+    Args:
+        json_format (bool, optional): Se True, o arquivo de log recebe uma linha JSON por registro.
+                                      Default: valor de PLANET_APP_LOG_FORMAT ("json") ou texto
+        max_bytes (int, optional): Tamanho máximo do arquivo de log. Default: LOG_MAX_BYTES
+        backup_count (int, optional): Arquivos rotacionados mantidos. Default: LOG_BACKUP_COUNT
+    
     Returns:
         logging.Logger: Logger principal configurado
     """
+    global _listener, _log_file
+    if _listener is not None:
+        return logging.getLogger("PlanetApp")
+    
+    if json_format is None:
+        json_format = os.environ.get(LOG_FORMAT_ENV_VAR, "").strip().lower() == "json"
     
     # Determinar o diretório base a partir do local do arquivo atual
     # ou do __main__ se estiver executando como um módulo
@@ -41,22 +102,80 @@ def setup_logging():
         os.makedirs(log_dir)
     
     log_file = os.path.join(log_dir, "planet_app.log")
+    _log_file = log_file
+    
+    # Handlers de saída, usados apenas pela thread de logging
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonLineFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    # Configuração de logging: os registros vão para a fila e são gravados em segundo plano
+    # (o QueueHandler só interpola a mensagem; a formatação final fica com a thread de logging)
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
     
-    # Configuração de logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
     )
+    _listener.start()
+    atexit.register(stop_logging)
     
     logger = logging.getLogger("PlanetApp")
     logger.info(f"Logging inicializado. Arquivo de log: {log_file}")
     
     return logger
 
+
+def log_file_path():
+    """
+    Retorna o arquivo de log configurado por setup_logging
+    
+    Returns:
+        str: Caminho do arquivo de log ou None se o logging não foi configurado
+    """
+    return _log_file
+
+
+def setup_worker_logging(log_file=None, json_format=None):
+    """
+    Configura o logging de um processo de trabalho (ex: partições da busca)
+    
+    A fila e a thread de logging do processo principal não sobrevivem ao fork
+    e não existem em processos criados por spawn; os handlers herdados são
+    descartados e o processo grava diretamente no console e, se informado, no
+    arquivo de log (em modo de acréscimo, sem rotação, que fica a cargo do
+    processo principal).
+    
+    Args:
+        log_file (str, optional): Arquivo de log do processo principal (ver log_file_path)
+        json_format (bool, optional): Se True, o arquivo recebe uma linha JSON por registro.
+                                      Default: valor de PLANET_APP_LOG_FORMAT
+    """
+    global _listener
+    _listener = None
+    
+    if json_format is None:
+        json_format = os.environ.get(LOG_FORMAT_ENV_VAR, "").strip().lower() == "json"
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [stream_handler]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler.setFormatter(JsonLineFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+    logging.basicConfig(level=logging.INFO, handlers=handlers, force=True)
+
+
 def get_logger(name=None):
     """
     Obtém um logger configurado.
@@ -0,0 +1,198 @@
+"""
+Agregação de progresso compartilhada entre threads de trabalho e a interface.
+"""
+
+import collections
+import threading
+import time
+
+
+def format_bytes(num_bytes):
+    """
+    Formata uma quantidade de bytes em unidade legível
+    
+    Args:
+        num_bytes (float): Quantidade de bytes
+    
+    Returns:
+        str: Valor formatado (ex: "12.3 MB")
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def format_duration(seconds):
+    """
+    Formata uma duração em segundos como "1h02m03s", "2m05s" ou "7s"
+    
+    Args:
+        seconds (float): Duração em segundos
+    
+    Returns:
+        str: Duração formatada
+    """
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressTracker:
+    """
+    Contadores de progresso atualizados pelas threads de trabalho.
+    
+    As threads apenas incrementam contadores protegidos por um lock; a
+    interface consulta snapshot() em intervalos fixos, de modo que o custo de
+    atualização da tela não depende do número de arquivos ou de blocos baixados.
+    """
+    
+    def __init__(self, rate_window=5.0):
+        """
+        Inicializa o rastreador
+        
+        Args:
+            rate_window (float, optional): Janela em segundos usada no cálculo da taxa. Default: 5.0
+        """
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._samples = collections.deque()
+        self._completed = []
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.files_total = 0
+        self.files_started = 0
+        self.files_sized = 0
+        self.files_done = 0
+        self.files_failed = 0
+    
+    def set_files_total(self, total):
+        """
+        Define o total de arquivos esperado
+        
+        Args:
+            total (int): Número total de arquivos
+        """
+        with self._lock:
+            self.files_total = total
+    
+    def add_files_total(self, count=1):
+        """
+        Incrementa o total de arquivos esperado (útil quando a lista é lida aos poucos)
+        
+        Args:
+            count (int, optional): Quantidade a adicionar. Default: 1
+        """
+        with self._lock:
+            self.files_total += count
+    
+    def file_started(self, size=None):
+        """
+        Registra o início de um arquivo
+        
+        Args:
+            size (int, optional): Tamanho do arquivo em bytes, se conhecido
+        """
+        with self._lock:
+            self.files_started += 1
+            if size:
+                self.bytes_total += size
+                self.files_sized += 1
+    
+    def add_bytes(self, count):
+        """
+        Registra bytes recebidos
+        
+        Args:
+            count (int): Quantidade de bytes
+        """
+        with self._lock:
+            self.bytes_done += count
+    
+    def file_done(self, path=None, success=True):
+        """
+        Registra o término de um arquivo
+        
+        Args:
+            path (str, optional): Caminho do arquivo concluído, entregue depois por drain_completed()
+            success (bool, optional): False se o download falhou. Default: True
+        """
+        with self._lock:
+            if success:
+                self.files_done += 1
+                if path:
+                    self._completed.append(path)
+            else:
+                self.files_failed += 1
+    
+    def drain_completed(self):
+        """
+        Retorna e limpa a lista de arquivos concluídos desde a última chamada
+        
+        Returns:
+            list: Caminhos dos arquivos concluídos
+        """
+        with self._lock:
+            completed, self._completed = self._completed, []
+        return completed
+    
+    def snapshot(self):
+        """
+        Retorna o estado atual do progresso
+        
+        Returns:
+            dict: Contadores, taxa em bytes/s, fração concluída (0-1) e ETA em segundos (ou None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            bytes_done = self.bytes_done
+            bytes_total = self.bytes_total
+            files_total = self.files_total
+            files_started = self.files_started
+            files_sized = self.files_sized
+            files_done = self.files_done
+            files_failed = self.files_failed
+            
+            # Taxa calculada sobre a janela deslizante das amostras anteriores
+            self._samples.append((now, bytes_done))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.rate_window:
+                self._samples.popleft()
+            first_time, first_bytes = self._samples[0]
+        
+        elapsed = now - first_time
+        rate = (bytes_done - first_bytes) / elapsed if elapsed > 0 else 0.0
+        
+        # Estimar o volume total a partir do tamanho médio dos arquivos já iniciados
+        estimated_total = bytes_total
+        if files_sized and files_total > files_started:
+            estimated_total += (files_total - files_started) * (bytes_total / files_sized)
+        
+        if estimated_total:
+            fraction = min(bytes_done / estimated_total, 1.0)
+        elif files_total:
+            fraction = (files_done + files_failed) / files_total
+        else:
+            fraction = 0.0
+        
+        eta = None
+        if rate > 0 and estimated_total > bytes_done:
+            eta = (estimated_total - bytes_done) / rate
+        
+        return {
+            "bytes_done": bytes_done,
+            "bytes_total": estimated_total,
+            "files_done": files_done,
+            "files_failed": files_failed,
+            "files_total": files_total,
+            "rate": rate,
+            "fraction": fraction,
+            "eta": eta,
+            "elapsed": now - self._start_time
+        }
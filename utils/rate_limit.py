@@ -0,0 +1,211 @@
+"""
+Limite de taxa de requisições compartilhado entre processos.
+
+Todos os processos do Planet App na mesma máquina e com a mesma chave de API
+(GUI, jobs agendados, partições de uma busca) consomem os mesmos baldes de
+fichas (token buckets). O estado dos baldes fica em um pequeno arquivo
+mapeado em memória (mmap) no diretório temporário do sistema, e cada
+consumo é feito com o arquivo travado (flock/msvcrt), de modo que a soma das
+requisições da máquina fica logo abaixo do limite da conta.
+
+Um pedido sem fichas disponíveis reserva a próxima ficha (o saldo fica
+negativo) e dorme apenas o tempo até ela ser gerada: os processos são
+atendidos na ordem de chegada e nenhum fica parado se houver folga.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from planet_app.utils.file_lock import FileLock
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("RateLimit")
+
+# Requisições por segundo de cada balde, um pouco abaixo dos limites publicados
+# pela Planet (busca/Data API 10/s, ativação 5/s, download 15/s, ordens 5/s)
+RATE_LIMITS = {
+    "search": 9.0,
+    "activate": 4.5,
+    "download": 13.5,
+    "orders": 4.5,
+    "default": 9.0,
+}
+
+# Rajada máxima acumulada por um balde ocioso (segundos de fichas)
+BURST_SECONDS = 1.0
+
+# Balde usado por cada endpoint (ver http_metrics.endpoint_for)
+ENDPOINT_BUCKETS = {
+    "quick-search": "search",
+    "stats": "search",
+    "searches": "search",
+    "searches.results": "search",
+    "item-types": "search",
+    "assets": "activate",
+    "assets.activate": "activate",
+    "download": "download",
+    "orders": "orders",
+}
+
+# Variável de ambiente com o diretório do arquivo de estado (padrão: diretório temporário)
+RATE_LIMIT_DIR_ENV_VAR = "PLANET_APP_RATE_LIMIT_DIR"
+
+# Estado de cada balde no arquivo: (fichas disponíveis, instante da última atualização)
+_SLOT = struct.Struct("<dd")
+_BUCKETS = tuple(RATE_LIMITS)
+
+
+class SharedRateLimiter:
+    """
+    Baldes de fichas compartilhados por todos os processos que usam o mesmo arquivo
+    
+    A trava do arquivo pertence à descrição de arquivo aberta; por isso um
+    processo criado por fork reabre o arquivo e o mapeamento antes do primeiro
+    uso, em vez de usar os herdados do processo pai.
+    """
+    
+    def __init__(self, state_path, rates=None, burst_seconds=BURST_SECONDS):
+        """
+        Abre (ou cria) o arquivo de estado dos baldes
+        
+        Args:
+            state_path (str): Caminho do arquivo de estado
+            rates (dict, optional): Requisições por segundo de cada balde. Default: RATE_LIMITS
+            burst_seconds (float, optional): Rajada máxima em segundos de fichas. Default: BURST_SECONDS
+        """
+        self.state_path = state_path
+        self.rates = dict(RATE_LIMITS, **(rates or {}))
+        self.burst_seconds = burst_seconds
+        self._open()
+    
+    def _open(self):
+        """Abre o arquivo de estado e o mapeamento no processo atual"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        
+        size = _SLOT.size * len(_BUCKETS)
+        self._file = open(self.state_path, 'a+b')
+        with FileLock(self._file):
+            if os.fstat(self._file.fileno()).st_size < size:
+                self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+    
+    def _slot_offset(self, bucket):
+        if bucket not in _BUCKETS:
+            bucket = "default"
+        return _BUCKETS.index(bucket) * _SLOT.size, self.rates[bucket]
+    
+    def reserve(self, bucket="default"):
+        """
+        Reserva uma ficha do balde
+        
+        Args:
+            bucket (str, optional): Nome do balde (ver RATE_LIMITS). Default: "default"
+        
+        Returns:
+            float: Espera em segundos até a ficha reservada ficar disponível
+        """
+        if self._pid != os.getpid():
+            with _limiters_lock:
+                if self._pid != os.getpid():
+                    self._open()
+        
+        offset, rate = self._slot_offset(bucket)
+        capacity = max(1.0, rate * self.burst_seconds)
+        
+        with self._lock, FileLock(self._file):
+            tokens, updated = _SLOT.unpack_from(self._map, offset)
+            now = time.time()
+            if updated <= 0:
+                tokens = capacity
+            else:
+                tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            tokens -= 1.0
+            _SLOT.pack_into(self._map, offset, tokens, now)
+        
+        return -tokens / rate if tokens < 0 else 0.0
+    
+    def acquire(self, bucket="default"):
+        """
+        Aguarda uma ficha do balde
+        
+        Args:
+            bucket (str, optional): Nome do balde (ver RATE_LIMITS). Default: "default"
+        
+        Returns:
+            float: Tempo de espera em segundos
+        """
+        wait = self.reserve(bucket)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def acquire_for_endpoint(self, endpoint):
+        """
+        Aguarda uma ficha do balde de um endpoint
+        
+        Args:
+            endpoint (str): Nome do endpoint (ver http_metrics.endpoint_for)
+        
+        Returns:
+            float: Tempo de espera em segundos
+        """
+        return self.acquire(ENDPOINT_BUCKETS.get(endpoint, "default"))
+    
+    def close(self):
+        """Libera o mapeamento e o arquivo de estado"""
+        with self._lock:
+            self._map.close()
+            self._file.close()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _after_fork_in_child():
+    """Descarta, no processo filho, as travas de thread herdadas (o arquivo é reaberto no primeiro uso)"""
+    global _limiters_lock
+    _limiters_lock = threading.Lock()
+    for limiter in _limiters.values():
+        limiter._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def shared_rate_limiter(api_key):
+    """
+    Retorna o limitador compartilhado da chave de API (um por processo)
+    
+    O arquivo de estado fica em PLANET_APP_RATE_LIMIT_DIR ou no diretório
+    temporário do sistema, com o nome derivado do hash da chave (a chave
+    nunca é gravada em disco).
+    
+    Args:
+        api_key (str): Chave de API da Planet
+    
+    Returns:
+        SharedRateLimiter: Limitador compartilhado ou None se o arquivo de estado não pôde ser aberto
+    """
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    with _limiters_lock:
+        limiter = _limiters.get(key_hash)
+        if limiter is not None:
+            return limiter
+        
+        state_dir = os.environ.get(RATE_LIMIT_DIR_ENV_VAR) or tempfile.gettempdir()
+        state_path = os.path.join(state_dir, f"planet_app_ratelimit_{key_hash}.bin")
+        try:
+            limiter = SharedRateLimiter(state_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Nao foi possivel abrir o limite de taxa compartilhado em {state_path}: {e}")
+            return None
+        
+        _limiters[key_hash] = limiter
+        return limiter
@@ -0,0 +1,80 @@
+"""
+Camada de serialização JSON do Planet App.
+
+Usa orjson quando estiver instalado e o módulo json da biblioteca padrão
+caso contrário. A saída é compacta por padrão.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Nome do backend em uso, útil para logs e diagnóstico
+BACKEND = "orjson" if orjson else "json"
+
+
+def dumps(data, pretty=False):
+    """
+    Serializa dados para JSON
+    
+    Args:
+        data: Dados a serem serializados
+        pretty (bool, optional): Se True, indenta a saída com 2 espaços. Default: False
+    
+    Returns:
+        bytes: JSON codificado em UTF-8
+    """
+    if orjson:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """
+    Desserializa JSON
+    
+    Args:
+        data (bytes | str): Conteúdo JSON
+    
+    Returns:
+        Dados desserializados
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(data, file_path, pretty=False):
+    """
+    Grava dados em um arquivo JSON
+    
+    Args:
+        data: Dados a serem serializados
+        file_path (str): Caminho do arquivo
+        pretty (bool, optional): Se True, indenta a saída com 2 espaços. Default: False
+    """
+    with open(file_path, 'wb') as f:
+        f.write(dumps(data, pretty=pretty))
+
+
+def load(file_path):
+    """
+    Carrega dados de um arquivo JSON
+    
+    Args:
+        file_path (str): Caminho do arquivo
+    
+    Returns:
+        Dados desserializados
+    """
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,278 @@
+"""
+Spans de desempenho do Planet App.
+
+Cada etapa instrumentada (leitura do shapefile, simplificação, buscas,
+ordens, downloads) é registrada como um span com duração, bytes, número de
+itens e status HTTP. Os spans são gravados em um arquivo JSONL e agregados
+em uma tabela de resumo exibida no fim da execução.
+
+Com o rastreamento desativado (padrão), span() devolve um objeto vazio
+compartilhado e o custo se resume a uma verificação de variável global.
+"""
+
+import collections
+import functools
+import itertools
+import os
+import threading
+import time
+from planet_app.utils import serialization
+from planet_app.utils.logging_config import get_logger
+
+logger = get_logger("Tracing")
+
+# Variável de ambiente que ativa o rastreamento ("1" ou caminho do arquivo JSONL)
+TRACE_ENV_VAR = "PLANET_APP_TRACE"
+
+_tracer = None
+
+
+class _NullSpan:
+    """Span usado com o rastreamento desativado: todas as operações são vazias"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set(self, key, value):
+        pass
+    
+    def add(self, key, amount=1):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Etapa cronometrada, com atributos livres (bytes, items, status, ...)"""
+    
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "start", "_t0")
+    
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = None
+        self.parent_id = None
+        self.start = None
+        self._t0 = None
+    
+    def set(self, key, value):
+        """Define um atributo do span (ex: status HTTP)"""
+        self.attrs[key] = value
+    
+    def add(self, key, amount=1):
+        """Soma uma quantidade a um atributo numérico do span (ex: bytes, items)"""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+    
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.span_id = next(self.tracer._ids)
+        self.parent_id = stack[-1].span_id if stack else None
+        stack.append(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._record(self, duration)
+        return False
+
+
+class Tracer:
+    """Destino dos spans: arquivo JSONL e agregação por nome de etapa"""
+    
+    def __init__(self, trace_path):
+        """
+        Inicializa o rastreador
+        
+        Args:
+            trace_path (str): Caminho do arquivo JSONL de spans
+        """
+        self.trace_path = trace_path
+        self._file = open(trace_path, 'ab')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._stats = collections.OrderedDict()
+    
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _record(self, span, duration):
+        entry = {
+            "name": span.name,
+            "id": span.span_id,
+            "parent": span.parent_id,
+            "thread": threading.current_thread().name,
+            "start": round(span.start, 6),
+            "duration": round(duration, 6)
+        }
+        entry.update(span.attrs)
+        line = serialization.dumps(entry) + b"\n"
+        
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = {
+                    "count": 0, "total": 0.0, "max": 0.0, "bytes": 0, "items": 0, "errors": 0
+                }
+            stats["count"] += 1
+            stats["total"] += duration
+            stats["max"] = max(stats["max"], duration)
+            stats["bytes"] += span.attrs.get("bytes", 0) or 0
+            stats["items"] += span.attrs.get("items", 0) or 0
+            status = span.attrs.get("status")
+            if "error" in span.attrs or (isinstance(status, int) and status >= 400):
+                stats["errors"] += 1
+    
+    def summary(self):
+        """
+        Retorna os totais por etapa
+        
+        Returns:
+            dict: {nome: {"count", "total", "max", "bytes", "items", "errors"}}
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+    
+    def format_summary(self):
+        """
+        Formata os totais por etapa como tabela de texto
+        
+        Returns:
+            str: Tabela com uma linha por etapa, da mais demorada para a mais rápida
+        """
+        rows = sorted(self.summary().items(), key=lambda item: item[1]["total"], reverse=True)
+        header = f"{'etapa':<28} {'n':>7} {'total(s)':>10} {'medio(ms)':>10} {'max(ms)':>10} {'bytes':>12} {'itens':>8} {'erros':>6}"
+        lines = [header, "-" * len(header)]
+        for name, stats in rows:
+            lines.append(
+                f"{name:<28} {stats['count']:>7} {stats['total']:>10.3f} "
+                f"{1000 * stats['total'] / stats['count']:>10.1f} {1000 * stats['max']:>10.1f} "
+                f"{stats['bytes']:>12} {stats['items']:>8} {stats['errors']:>6}"
+            )
+        return "\n".join(lines)
+    
+    def close(self):
+        """Grava o resumo ao lado do arquivo de spans e fecha o arquivo"""
+        table = self.format_summary()
+        with self._lock:
+            self._file.close()
+        with open(os.path.splitext(self.trace_path)[0] + ".summary.txt", 'w', encoding='utf-8') as f:
+            f.write(table + "\n")
+        return table
+
+
+def enable_tracing(trace_path):
+    """
+    Ativa o rastreamento, gravando os spans no arquivo indicado
+    
+    Args:
+        trace_path (str): Caminho do arquivo JSONL de spans
+    
+    Returns:
+        Tracer: Rastreador ativo
+    """
+    global _tracer
+    if _tracer is not None:
+        finish_tracing()
+    _tracer = Tracer(trace_path)
+    logger.info(f"Rastreamento de desempenho ativado: {trace_path}")
+    return _tracer
+
+
+def enable_tracing_from_env(log_dir):
+    """
+    Ativa o rastreamento se a variável PLANET_APP_TRACE estiver definida
+    
+    Args:
+        log_dir (str): Diretório usado quando a variável vale "1" (arquivo trace_<data>.jsonl)
+    
+    Returns:
+        Tracer: Rastreador ativo ou None se o rastreamento não foi pedido
+    """
+    value = os.environ.get(TRACE_ENV_VAR, "").strip()
+    if not value or value == "0":
+        return None
+    if value == "1":
+        value = os.path.join(log_dir, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    return enable_tracing(value)
+
+
+def finish_tracing():
+    """Desativa o rastreamento e registra a tabela de resumo no log"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return
+    table = tracer.close()
+    logger.info(f"Resumo de desempenho ({tracer.trace_path}):\n{table}")
+
+
+def is_tracing():
+    """Indica se o rastreamento está ativo"""
+    return _tracer is not None
+
+
+def span(name, **attrs):
+    """
+    Cria um span para uma etapa
+    
+    Uso:
+        with span("search.quick_search") as s:
+            ...
+            s.set("status", response.status_code)
+            s.add("items", len(results))
+    
+    Args:
+        name (str): Nome da etapa
+        **attrs: Atributos iniciais do span
+    
+    Returns:
+        Span: Span a ser usado em um bloco with (vazio se o rastreamento estiver desativado)
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, attrs)
+
+
+def traced(name=None):
+    """
+    Decorador que registra cada chamada da função como um span
+    
+    Args:
+        name (str, optional): Nome da etapa. Default: nome qualificado da função
+    
+    Returns:
+        callable: Decorador
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator